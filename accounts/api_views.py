@@ -5,6 +5,7 @@ from rest_framework.response import Response
 from django.db.models import Q
 from django.utils import timezone
 from datetime import timedelta
+from core.paginacao import CursorPorOrdenacao, cursor_solicitado
 from .models import Usuario, UsuarioAtividadeLog
 from .activity import registrar_atividade
 from .rbac import processos_visiveis_queryset
@@ -214,5 +215,10 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         if not request.user.is_administrador():
             qs = qs.filter(Q(usuario=request.user) | Q(autor=request.user))
 
+        if cursor_solicitado(request):
+            paginador = CursorPorOrdenacao(('-criado_em', '-id'))
+            pagina = paginador.paginate_queryset(qs, request, self)
+            return paginador.get_paginated_response(UsuarioAtividadeLogSerializer(pagina, many=True).data)
+
         serializer = UsuarioAtividadeLogSerializer(qs[:limit], many=True)
         return Response(serializer.data)
@@ -1,11 +1,16 @@
-from django.db.models import Q
+from collections import defaultdict
+
+from django.db import transaction
+
+PAPEIS_JUNIOR = {'estagiario', 'assistente'}
+LOTE_ACESSOS = 500
 
 
 def usuario_eh_junior(usuario):
     return bool(
         usuario
         and getattr(usuario, 'is_authenticated', False)
-        and getattr(usuario, 'papel', None) in {'estagiario', 'assistente'}
+        and getattr(usuario, 'papel', None) in PAPEIS_JUNIOR
     )
 
 
@@ -13,49 +18,177 @@ def supervisor_do_usuario(usuario):
     return getattr(usuario, 'responsavel_advogado', None)
 
 
+def calcular_acessos(processos, responsaveis, usuarios):
+    """
+    Regra de visibilidade aplicada a dados já carregados.
+
+    processos: {processo_id: advogado_id}
+    responsaveis: pares (processo_id, usuario_id) de vínculos ativos
+    usuarios: {usuario_id: (papel, responsavel_advogado_id)}
+
+    Retorna o conjunto de pares (usuario_id, processo_id) com acesso.
+    Advogados veem os processos em que são o advogado ou responsáveis;
+    estagiários/assistentes precisam estar vinculados a um processo do qual
+    o seu advogado responsável também participe.
+    """
+    vinculados = defaultdict(set)
+    for processo_id, usuario_id in responsaveis:
+        vinculados[processo_id].add(usuario_id)
+
+    acessos = set()
+    for processo_id, advogado_id in processos.items():
+        participantes = vinculados.get(processo_id, set())
+        for usuario_id in participantes | ({advogado_id} if advogado_id else set()):
+            papel, supervisor_id = usuarios.get(usuario_id, (None, None))
+            if papel not in PAPEIS_JUNIOR:
+                acessos.add((usuario_id, processo_id))
+            elif (
+                usuario_id in participantes
+                and supervisor_id
+                and (supervisor_id == advogado_id or supervisor_id in participantes)
+            ):
+                acessos.add((usuario_id, processo_id))
+    return acessos
+
+
+def sincronizar_acessos(processos_ids):
+    """
+    Recalcula ProcessoAcesso dos processos informados e registra em
+    AlteracaoAcesso cada acesso concedido ou retirado, para a sincronização
+    incremental.
+    """
+    from accounts.models import Usuario
+    from processos.models import AlteracaoAcesso, Processo, ProcessoAcesso, ProcessoResponsavel
+
+    processos_ids = sorted(set(processos_ids))
+    for inicio in range(0, len(processos_ids), LOTE_ACESSOS):
+        lote = processos_ids[inicio:inicio + LOTE_ACESSOS]
+        processos = dict(Processo.objects.filter(id__in=lote).values_list('id', 'advogado_id'))
+        responsaveis = list(
+            ProcessoResponsavel.objects.filter(processo_id__in=lote, ativo=True).values_list('processo_id', 'usuario_id')
+        )
+        usuarios_ids = {usuario_id for _, usuario_id in responsaveis} | {a for a in processos.values() if a}
+        usuarios = {
+            usuario_id: (papel, supervisor_id)
+            for usuario_id, papel, supervisor_id in Usuario.objects.filter(id__in=usuarios_ids).values_list(
+                'id', 'papel', 'responsavel_advogado_id',
+            )
+        }
+        esperado = calcular_acessos(processos, responsaveis, usuarios)
+        atual = set(ProcessoAcesso.objects.filter(processo_id__in=lote).values_list('usuario_id', 'processo_id'))
+
+        retirados, concedidos = atual - esperado, esperado - atual
+        remover = defaultdict(list)
+        for usuario_id, processo_id in retirados:
+            remover[processo_id].append(usuario_id)
+        with transaction.atomic():
+            for processo_id, usuarios_ids in remover.items():
+                ProcessoAcesso.objects.filter(processo_id=processo_id, usuario_id__in=usuarios_ids).delete()
+            ProcessoAcesso.objects.bulk_create(
+                [ProcessoAcesso(usuario_id=u, processo_id=p) for u, p in concedidos],
+                ignore_conflicts=True,
+            )
+            AlteracaoAcesso.objects.bulk_create(
+                [AlteracaoAcesso(usuario_id=u, processo_id=p, concedido=False) for u, p in sorted(retirados)]
+                + [AlteracaoAcesso(usuario_id=u, processo_id=p, concedido=True) for u, p in sorted(concedidos)]
+            )
+
+
+def sincronizar_acessos_do_usuario(usuario_id):
+    """Recalcula os processos em que o usuário é advogado ou responsável (mudança de papel/supervisor)."""
+    from processos.models import Processo, ProcessoResponsavel
+
+    ids = set(Processo.objects.filter(advogado_id=usuario_id).values_list('id', flat=True))
+    ids |= set(ProcessoResponsavel.objects.filter(usuario_id=usuario_id).values_list('processo_id', flat=True))
+    sincronizar_acessos(ids)
+
+
+def reconstruir_acessos():
+    from processos.models import Processo, ProcessoAcesso
+
+    ids = list(Processo.objects.values_list('id', flat=True))
+    ProcessoAcesso.objects.exclude(processo_id__in=Processo.objects.values('id')).delete()
+    sincronizar_acessos(ids)
+    return len(ids)
+
+
+def processos_visiveis_ids(usuario):
+    """Subconsulta com os ids dos processos visíveis, para filtros `processo_id__in=`."""
+    from processos.models import Processo, ProcessoAcesso
+
+    if not usuario or not usuario.is_authenticated:
+        return ProcessoAcesso.objects.none().values('processo_id')
+    if usuario.is_administrador():
+        return Processo.objects.values('id')
+    return ProcessoAcesso.objects.filter(usuario=usuario).values('processo_id')
+
+
 def processos_visiveis_queryset(queryset, usuario):
     if not usuario or not usuario.is_authenticated:
         return queryset.none()
     if usuario.is_administrador():
         return queryset
+    # Uma linha por (usuário, processo) em ProcessoAcesso: join simples, sem DISTINCT.
+    return queryset.filter(acessos__usuario=usuario)
 
-    if usuario_eh_junior(usuario):
-        supervisor_id = getattr(usuario, 'responsavel_advogado_id', None)
-        if not supervisor_id:
-            return queryset.none()
-        return queryset.filter(
-            Q(responsaveis__usuario=usuario, responsaveis__ativo=True),
-            Q(advogado_id=supervisor_id) | Q(responsaveis__usuario_id=supervisor_id, responsaveis__ativo=True),
-        ).distinct()
 
-    return queryset.filter(
-        Q(advogado=usuario)
-        | Q(responsaveis__usuario=usuario, responsaveis__ativo=True)
-    ).distinct()
+class ContextoAcesso:
+    """
+    Acessos de um usuário carregados uma única vez e consultados em memória.
 
+    Criado por `contexto_acesso(request)` e válido durante a requisição: as
+    verificações seguintes à primeira não vão ao banco, e
+    `consultas_economizadas` conta quantas consultas deixaram de ser feitas.
+    """
 
-def usuario_pode_entrar_processo(processo, usuario):
-    if not usuario or not usuario.is_authenticated:
-        return False
-    if usuario.is_administrador():
-        return True
-    if processo.advogado_id == usuario.id:
-        return True
+    def __init__(self, usuario):
+        self.usuario = usuario
+        self.consultas_economizadas = 0
+        self._processos_ids = None
 
-    usuario_vinculado = processo.responsaveis.filter(usuario=usuario, ativo=True).exists()
-    if not usuario_vinculado:
-        return False
+    @property
+    def autenticado(self):
+        return bool(self.usuario and self.usuario.is_authenticated)
 
-    if not usuario_eh_junior(usuario):
-        return True
+    @property
+    def irrestrito(self):
+        return self.autenticado and self.usuario.is_administrador()
 
-    supervisor_id = getattr(usuario, 'responsavel_advogado_id', None)
-    if not supervisor_id:
-        return False
-    return (
-        processo.advogado_id == supervisor_id
-        or processo.responsaveis.filter(usuario_id=supervisor_id, ativo=True).exists()
-    )
+    def processos_ids(self):
+        if self._processos_ids is None:
+            from processos.models import ProcessoAcesso
+
+            self._processos_ids = frozenset(
+                ProcessoAcesso.objects.filter(usuario=self.usuario).values_list('processo_id', flat=True)
+            )
+        else:
+            self.consultas_economizadas += 1
+        return self._processos_ids
+
+    def pode_entrar(self, processo):
+        """Administradores, o advogado do processo e quem tem ProcessoAcesso nele."""
+        if not self.autenticado:
+            return False
+        if self.irrestrito or processo.advogado_id == self.usuario.id:
+            return True
+        return processo.pk in self.processos_ids()
+
+    def visiveis(self, processos_ids):
+        """Subconjunto de `processos_ids` visível ao usuário."""
+        if not self.autenticado:
+            return set()
+        if self.irrestrito:
+            return set(processos_ids)
+        return self.processos_ids().intersection(processos_ids)
+
+
+def contexto_acesso(request):
+    """ContextoAcesso do usuário da requisição, criado no primeiro uso."""
+    contexto = getattr(request, '_contexto_acesso', None)
+    if contexto is None or contexto.usuario is not request.user:
+        contexto = ContextoAcesso(request.user)
+        request._contexto_acesso = contexto
+    return contexto
 
 
 def validar_vinculo_junior_no_processo(processo, usuario_alvo):
@@ -6,8 +6,7 @@ from datetime import datetime, timedelta
 from django.db.models import Q
 from django.utils import timezone
 from accounts.permissions import IsAdvogadoOuAdministradorWrite
-from accounts.rbac import processos_visiveis_queryset, usuario_pode_entrar_processo
-from processos.models import Processo
+from accounts.rbac import contexto_acesso, processos_visiveis_ids
 from .models import Compromisso
 from .serializers import CompromissoSerializer
 
@@ -18,19 +17,23 @@ class CompromissoViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAdvogadoOuAdministradorWrite]
     ordering_fields = ['data', 'hora', 'status']
 
-    def get_queryset(self):
+    def queryset_visivel(self):
+        """Compromissos visíveis ao usuário, sem os filtros da listagem."""
         queryset = super().get_queryset()
         if self.request.user.is_administrador():
             return queryset
-        processos_ids = processos_visiveis_queryset(Processo.objects.all(), self.request.user).values_list('id', flat=True)
-        return queryset.filter(Q(advogado=self.request.user) | Q(processo_id__in=processos_ids)).distinct()
+        processos_ids = processos_visiveis_ids(self.request.user)
+        return queryset.filter(Q(advogado=self.request.user) | Q(processo_id__in=processos_ids))
+
+    def get_queryset(self):
+        return self.queryset_visivel()
 
     def perform_create(self, serializer):
         processo = serializer.validated_data.get('processo')
         if (
             processo
             and not self.request.user.is_administrador()
-            and not usuario_pode_entrar_processo(processo, self.request.user)
+            and not contexto_acesso(self.request).pode_entrar(processo)
         ):
             raise PermissionDenied('Você não pode vincular compromisso a processo de outro advogado.')
         if self.request.user.is_administrador():
@@ -43,7 +46,7 @@ class CompromissoViewSet(viewsets.ModelViewSet):
         if (
             processo
             and not self.request.user.is_administrador()
-            and not usuario_pode_entrar_processo(processo, self.request.user)
+            and not contexto_acesso(self.request).pode_entrar(processo)
         ):
             raise PermissionDenied('Você não pode vincular compromisso a processo de outro advogado.')
         if self.request.user.is_administrador():
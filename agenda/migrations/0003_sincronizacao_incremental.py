@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-17 21:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agenda', '0002_compromisso_alertas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='compromisso',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='compromisso',
+            index=models.Index(fields=['atualizado_em'], name='idx_compromisso_atualizado'),
+        ),
+    ]
@@ -38,11 +38,15 @@ class Compromisso(models.Model):
     alerta_horas_antes = models.PositiveSmallIntegerField(default=0, verbose_name='Horas de Antecedência do Alerta')
     alerta_enviado = models.BooleanField(default=False)
     criado_em = models.DateTimeField(auto_now_add=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = 'Compromisso'
         verbose_name_plural = 'Compromissos'
         ordering = ['data', 'hora']
+        indexes = [
+            models.Index(fields=['atualizado_em'], name='idx_compromisso_atualizado'),
+        ]
 
     def __str__(self):
         return f'{self.data} – {self.titulo}'
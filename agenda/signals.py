@@ -0,0 +1,11 @@
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from processos.sincronizacao import registrar_exclusao
+
+from .models import Compromisso
+
+
+@receiver(pre_delete, sender=Compromisso, dispatch_uid='agenda_compromisso_exclusao_sincronizacao')
+def registrar_exclusao_compromisso(sender, instance, **kwargs):
+    registrar_exclusao('compromissos', instance)
@@ -5,11 +5,11 @@ from accounts.auth_views import login_view, refresh_view, logout_view
 from accounts.api_views import UsuarioViewSet
 from processos.api_views import (
     ComarcaViewSet, VaraViewSet, TipoProcessoViewSet,
-    ClienteViewSet, ProcessoViewSet, MovimentacaoViewSet
+    ClienteViewSet, ProcessoViewSet, MovimentacaoViewSet, sincronizacao
 )
 from agenda.api_views import CompromissoViewSet
 from jurisprudencia.api_views import DocumentoViewSet
-from ia_preditiva.api_views import AnaliseRiscoViewSet, ia_chat, ia_sugerir
+from ia_preditiva.api_views import AnaliseRiscoViewSet, TarefaIAViewSet, ia_chat, ia_sugerir
 from consulta_tribunais.api_views import TribunalViewSet, ConsultaProcessoViewSet
 from financeiro.api_views import LancamentoViewSet, CategoriaFinanceiraViewSet, ContaBancariaViewSet
 from financeiro.api_views import RegraCobrancaViewSet, ApontamentoTempoViewSet, FaturaViewSet
@@ -37,6 +37,7 @@ router.register(r'documentos', DocumentoViewSet, basename='documento')
 # IA Preditiva
 router.register(r'analises', AnaliseRiscoViewSet, basename='analise')
 router.register(r'ia/analises', AnaliseRiscoViewSet, basename='ia-analise')
+router.register(r'ia/tarefas', TarefaIAViewSet, basename='ia-tarefa')
 
 # Consulta Tribunais
 router.register(r'tribunais', TribunalViewSet, basename='tribunal')
@@ -61,6 +62,9 @@ urlpatterns = [
     path('ia/chat/', ia_chat, name='ia-chat'),
     path('ia/sugestoes/sugerir/', ia_sugerir, name='ia-sugestoes'),
 
+    # Sincronização incremental
+    path('sincronizacao/', sincronizacao, name='sincronizacao'),
+
     # Router URLs
     path('', include(router.urls)),
 ]
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Tribunal, ConsultaProcesso, PerguntaProcesso
+from .models import Tribunal, ConsultaProcesso, MonitoramentoProcesso, PerguntaProcesso
 
 
 @admin.register(Tribunal)
@@ -26,3 +26,10 @@ class PerguntaProcessoAdmin(admin.ModelAdmin):
     def pergunta_resumo(self, obj):
         return obj.pergunta[:50] + '...' if len(obj.pergunta) > 50 else obj.pergunta
     pergunta_resumo.short_description = 'Pergunta'
+
+
+@admin.register(MonitoramentoProcesso)
+class MonitoramentoProcessoAdmin(admin.ModelAdmin):
+    list_display = ['processo', 'ultimo_movimento_em', 'movimentos_importados', 'verificado_em']
+    search_fields = ['processo__numero']
+    readonly_fields = ['verificado_em']
@@ -0,0 +1,59 @@
+import hashlib
+import json
+import os
+
+from django.utils import timezone
+
+from .models import ConsultaProcesso
+from .services.datajud_service import formatar_dados_processo
+from .services.groq_service import GroqService
+
+
+def hash_dados(dados_processo):
+    """
+    Hash do conteúdo que entra no prompt da análise: os campos de
+    `formatar_dados_processo`, com os movimentos em ordem de data e código.
+    Campos que mudam a cada indexação do DataJud (como `@timestamp`) ficam de fora.
+    """
+    formatado = formatar_dados_processo(dados_processo)
+    formatado['movimentos'] = sorted(
+        formatado.get('movimentos') or [],
+        key=lambda movimento: (str(movimento.get('dataHora') or ''), str(movimento.get('codigo') or '')),
+    )
+    conteudo = json.dumps(formatado, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+
+def gerar_analise(consulta, forcar=False):
+    """
+    Preenche `analise_ia` da consulta. Sem `forcar`, reaproveita a análise já
+    feita para os mesmos dados, na própria consulta ou em outra do mesmo
+    tribunal, e o modelo só é chamado quando os dados mudaram. Retorna True
+    quando gerou uma análise nova.
+    """
+    analise_hash = hash_dados(consulta.dados_processo)
+    campos = ['analise_ia', 'analise_hash', 'analise_atualizada_em']
+    if not forcar:
+        if consulta.analise_ia and consulta.analise_hash == analise_hash:
+            return False
+        anterior = (
+            ConsultaProcesso.objects.filter(tribunal_id=consulta.tribunal_id, analise_hash=analise_hash)
+            .exclude(analise_ia='')
+            .exclude(pk=consulta.pk)
+            .order_by('-analise_atualizada_em')
+            .values('analise_ia', 'analise_atualizada_em')
+            .first()
+        )
+        if anterior is not None:
+            consulta.analise_ia = anterior['analise_ia']
+            consulta.analise_hash = analise_hash
+            consulta.analise_atualizada_em = anterior['analise_atualizada_em']
+            consulta.save(update_fields=campos)
+            return False
+
+    groq = GroqService(os.getenv('GROQ_API_KEY'))
+    consulta.analise_ia = groq.analisar_processo(formatar_dados_processo(consulta.dados_processo), usar_cache=not forcar)
+    consulta.analise_hash = analise_hash
+    consulta.analise_atualizada_em = timezone.now()
+    consulta.save(update_fields=campos)
+    return True
@@ -1,18 +1,24 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.utils import timezone
+from django.conf import settings
+from django.db import transaction
+from django.urls import reverse
 import os
 import logging
 from accounts.permissions import IsAdvogadoOuAdministradorWrite
+from core.long_poll import aguardar_conclusao, segundos_aguardar
 
+from .analise import gerar_analise
 from .models import Tribunal, ConsultaProcesso, PerguntaProcesso
 from .serializers import (
     TribunalSerializer, ConsultaProcessoSerializer,
     ConsultaProcessoCreateSerializer, PerguntaProcessoSerializer
 )
-from .services.datajud_service import DataJudService, formatar_dados_processo
+from .services.datajud_service import DataJudService, buscar_em_tribunais
+from .services import cache_ia, contexto_ia
 from .services.groq_service import GroqService
+from .tasks import ERRO_NAO_ENCONTRADO, STATUS_FINAIS, enfileirar, processar_consulta
 
 logger = logging.getLogger(__name__)
 
@@ -51,8 +57,13 @@ class ConsultaProcessoViewSet(viewsets.ModelViewSet):
         - assunto: Assunto (ex: "Horas Extras")
         - data_inicio: Data inicial YYYYMMDD (ex: "20240101")
         - data_fim: Data final YYYYMMDD (ex: "20241231")
+
+        Com `tribunal_ids` (lista) em vez de `tribunal_id`, a busca é feita em
+        todos os tribunais informados ao mesmo tempo; tribunais lentos ou com
+        falha são indicados em `tribunais` e a resposta sai com `parcial: true`.
         """
         tribunal_id = request.data.get('tribunal_id')
+        tribunal_ids = request.data.get('tribunal_ids')
         filtros = {
             'classe': request.data.get('classe', '').strip(),
             'orgao_julgador': request.data.get('orgao_julgador', '').strip(),
@@ -72,6 +83,9 @@ class ConsultaProcessoViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         max_results = max(1, min(max_results, 100))
+
+        if tribunal_ids is not None:
+            return self._buscar_em_varios_tribunais(tribunal_ids, filtros, max_results)
         
         try:
             tribunal = Tribunal.objects.get(id=tribunal_id, ativo=True)
@@ -99,9 +113,49 @@ class ConsultaProcessoViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    def _buscar_em_varios_tribunais(self, tribunal_ids, filtros, max_results):
+        if not isinstance(tribunal_ids, list) or not tribunal_ids:
+            return Response(
+                {'error': 'tribunal_ids deve ser uma lista de IDs de tribunais.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            tribunal_ids = {int(tribunal_id) for tribunal_id in tribunal_ids}
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'tribunal_ids deve ser uma lista de IDs de tribunais.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        tribunais = list(Tribunal.objects.filter(id__in=tribunal_ids, ativo=True))
+        if not tribunais:
+            return Response(
+                {'error': 'Tribunal não encontrado'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        processos, situacao = buscar_em_tribunais(tribunais, filtros, max_results)
+        if not any(item['status'] == 'ok' for item in situacao):
+            return Response(
+                {'error': 'Falha ao consultar os tribunais no momento.', 'tribunais': situacao},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        return Response({
+            'total': len(processos),
+            'processos': processos,
+            'tribunais': situacao,
+            'parcial': any(item['status'] != 'ok' for item in situacao),
+            'filtros_aplicados': filtros,
+            'aviso': 'A API pública DataJud não possui dados de partes/advogados.'
+        }, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=['post'])
     def consultar(self, request):
-        """Realiza uma nova consulta no tribunal"""
+        """
+        Registra uma nova consulta no tribunal. Com CONSULTA_TRIBUNAIS_USE_CELERY,
+        responde 202 de imediato e o andamento é acompanhado em
+        `GET /consultas-processos/{id}/situacao/`; sem Celery, a consulta roda
+        na própria requisição e a resposta é 201 com o resultado.
+        """
         serializer = ConsultaProcessoCreateSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
@@ -126,63 +180,59 @@ class ConsultaProcessoViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Cria registro da consulta
+        # Cria registro da consulta; DataJud e análise IA rodam em task
         consulta = ConsultaProcesso.objects.create(
             tribunal=tribunal,
             numero_processo=numero_processo,
             usuario=request.user,
             processo_vinculado_id=processo_vinculado_id,
-            status='processando'
+            status='pendente'
         )
-        
-        try:
-            # Consulta no DataJud
-            datajud = DataJudService(tribunal)
-            dados = datajud.consultar_processo(numero_processo)
-            
-            if not dados:
-                consulta.status = 'erro'
-                consulta.erro_mensagem = 'Processo não encontrado no tribunal'
-                consulta.save()
-                return Response(
-                    {'error': 'Processo não encontrado'},
-                    status=status.HTTP_404_NOT_FOUND
-                )
-            
-            consulta.dados_processo = dados
-            consulta.status = 'sucesso'
-            
-            # Análise com IA se solicitado
-            if analisar_com_ia:
-                try:
-                    groq_api_key = os.getenv('GROQ_API_KEY')
-                    if groq_api_key:
-                        groq = GroqService(groq_api_key)
-                        dados_formatados = formatar_dados_processo(dados)
-                        analise = groq.analisar_processo(dados_formatados)
-                        consulta.analise_ia = analise
-                        consulta.analise_atualizada_em = timezone.now()
-                except Exception:
-                    logger.exception('Falha ao gerar análise IA na consulta %s', consulta.id)
-                    # Falha na IA não impede a consulta
-                    consulta.erro_mensagem = 'Aviso: Falha ao gerar análise IA.'
-            
-            consulta.save()
-            
-            serializer = ConsultaProcessoSerializer(consulta)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-            
-        except Exception:
-            logger.exception('Falha ao consultar processo no DataJud')
-            consulta.status = 'erro'
-            consulta.erro_mensagem = 'Falha interna ao consultar tribunal.'
-            consulta.save()
-            
+        if not getattr(settings, 'CONSULTA_TRIBUNAIS_USE_CELERY', False):
+            # Sem workers, um 202 seria enganoso: a task rodaria aqui mesmo.
+            processar_consulta.run(consulta.id, analisar_com_ia=analisar_com_ia)
+            consulta.refresh_from_db()
+            if consulta.status == 'sucesso':
+                return Response(ConsultaProcessoSerializer(consulta).data, status=status.HTTP_201_CREATED)
+            if consulta.erro_mensagem == ERRO_NAO_ENCONTRADO:
+                return Response({'error': 'Processo não encontrado'}, status=status.HTTP_404_NOT_FOUND)
             return Response(
                 {'error': 'Falha ao consultar tribunal no momento.'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-    
+        transaction.on_commit(
+            lambda: enfileirar(processar_consulta, consulta.id, analisar_com_ia=analisar_com_ia)
+        )
+        return Response(
+            self._situacao(ConsultaProcesso.objects.get(pk=consulta.pk)),
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+    def _situacao(self, consulta):
+        dados = {
+            'id': consulta.id,
+            'status': consulta.status,
+            'status_display': consulta.get_status_display(),
+            'concluida': consulta.status in STATUS_FINAIS,
+            'erro_mensagem': consulta.erro_mensagem,
+            'status_url': self.request.build_absolute_uri(
+                reverse('consulta-processo-situacao', args=[consulta.id])
+            ),
+        }
+        if dados['concluida']:
+            dados['consulta'] = ConsultaProcessoSerializer(consulta).data
+        return dados
+
+    @action(detail=True, methods=['get'])
+    def situacao(self, request, pk=None):
+        """
+        Situação da consulta. Com `?aguardar=<segundos>` (até
+        LONG_POLL_MAXIMO_SEGUNDOS), segura a resposta até a consulta terminar.
+        """
+        consulta = self.get_object()
+        aguardar_conclusao(consulta, lambda c: c.status in STATUS_FINAIS, segundos_aguardar(request))
+        return Response(self._situacao(consulta))
+
     @action(detail=True, methods=['post'])
     def fazer_pergunta(self, request, pk=None):
         """Faz uma pergunta sobre o processo consultado"""
@@ -210,12 +260,15 @@ class ConsultaProcessoViewSet(viewsets.ModelViewSet):
                 )
             
             groq = GroqService(groq_api_key)
-            dados_formatados = formatar_dados_processo(consulta.dados_processo)
+            contexto = contexto_ia.contexto_da_consulta(consulta)
             
-            # Pega histórico de perguntas
+            # Últimas 3 perguntas, em ordem cronológica e truncadas
             historico = list(consulta.perguntas.values('pergunta', 'resposta').order_by('-data_pergunta')[:3])
+            historico = contexto_ia.compactar_historico(historico[::-1])
             
-            resposta = groq.responder_pergunta(dados_formatados, pergunta_texto, historico)
+            resposta = groq.responder_pergunta(
+                contexto, pergunta_texto, historico, usar_cache=cache_ia.usar_cache_na_requisicao(request),
+            )
             
             # Salva a pergunta e resposta
             pergunta_obj = PerguntaProcesso.objects.create(
@@ -237,7 +290,11 @@ class ConsultaProcessoViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['post'])
     def reanalisar(self, request, pk=None):
-        """Gera nova análise IA do processo"""
+        """
+        Análise IA do processo. Se os dados não mudaram desde a última análise
+        (desta ou de outra consulta do mesmo número), ela é reaproveitada;
+        `sem_cache=true` força uma análise nova.
+        """
         consulta = self.get_object()
         
         if not consulta.dados_processo:
@@ -254,13 +311,7 @@ class ConsultaProcessoViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_503_SERVICE_UNAVAILABLE
                 )
             
-            groq = GroqService(groq_api_key)
-            dados_formatados = formatar_dados_processo(consulta.dados_processo)
-            analise = groq.analisar_processo(dados_formatados)
-            
-            consulta.analise_ia = analise
-            consulta.analise_atualizada_em = timezone.now()
-            consulta.save()
+            gerar_analise(consulta, forcar=not cache_ia.usar_cache_na_requisicao(request))
             
             serializer = ConsultaProcessoSerializer(consulta)
             return Response(serializer.data)
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from consulta_tribunais.monitoramento import monitorar_processos
+
+
+class Command(BaseCommand):
+    help = 'Reconsulta no DataJud, em lote por tribunal, os processos vinculados e importa os movimentos novos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=None, help='Números por consulta terms (padrão DATAJUD_LOTE_TERMOS).')
+        parser.add_argument(
+            '--historico',
+            action='store_true',
+            default=None,
+            help='Importa todos os movimentos de processos vistos pela primeira vez (padrão CONSULTA_TRIBUNAIS_IMPORTAR_HISTORICO).',
+        )
+
+    def handle(self, *args, **options):
+        resumo = monitorar_processos(lote_termos=options['lote'], importar_historico=options['historico'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Consultas verificadas: {resumo['consultas']} | atualizadas: {resumo['atualizadas']} | "
+            f"sem alteração: {resumo['sem_alteracao']} | não encontradas: {resumo['nao_encontradas']} | "
+            f"falhas: {resumo['falhas']} | movimentações importadas: {resumo['movimentacoes']}"
+        ))
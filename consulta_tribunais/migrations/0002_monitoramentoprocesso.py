@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-17 21:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('processos', '0011_sincronizacao_incremental'),
+        ('consulta_tribunais', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonitoramentoProcesso',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ultimo_movimento_em', models.DateTimeField(blank=True, null=True, verbose_name='Data do Último Movimento')),
+                ('codigos_ultimo_movimento', models.JSONField(blank=True, default=list, verbose_name='Códigos no Último Instante')),
+                ('movimentos_importados', models.PositiveIntegerField(default=0, verbose_name='Movimentos Importados')),
+                ('verificado_em', models.DateTimeField(blank=True, null=True, verbose_name='Última Verificação')),
+                ('processo', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='monitoramento_tribunal', to='processos.processo', verbose_name='Processo')),
+            ],
+            options={
+                'verbose_name': 'Monitoramento de Processo',
+                'verbose_name_plural': 'Monitoramentos de Processos',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 21:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consulta_tribunais', '0002_monitoramentoprocesso'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='consultaprocesso',
+            name='analise_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64, verbose_name='Hash dos Dados Analisados'),
+        ),
+    ]
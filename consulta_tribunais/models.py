@@ -58,6 +58,8 @@ class ConsultaProcesso(models.Model):
     # Cache da análise por IA
     analise_ia = models.TextField(blank=True, verbose_name='Análise da IA')
     analise_atualizada_em = models.DateTimeField(null=True, blank=True)
+    analise_hash = models.CharField(max_length=64, blank=True, db_index=True,
+                                    verbose_name='Hash dos Dados Analisados')
     
     class Meta:
         verbose_name = 'Consulta de Processo'
@@ -89,3 +91,23 @@ class PerguntaProcesso(models.Model):
     
     def __str__(self):
         return f"{self.pergunta[:50]}..."
+
+
+class MonitoramentoProcesso(models.Model):
+    """Marca d'água dos movimentos do DataJud já importados para um processo"""
+    processo = models.OneToOneField('processos.Processo', on_delete=models.CASCADE,
+                                    related_name='monitoramento_tribunal',
+                                    verbose_name='Processo')
+    ultimo_movimento_em = models.DateTimeField(null=True, blank=True,
+                                               verbose_name='Data do Último Movimento')
+    codigos_ultimo_movimento = models.JSONField(default=list, blank=True,
+                                                verbose_name='Códigos no Último Instante')
+    movimentos_importados = models.PositiveIntegerField(default=0, verbose_name='Movimentos Importados')
+    verificado_em = models.DateTimeField(null=True, blank=True, verbose_name='Última Verificação')
+
+    class Meta:
+        verbose_name = 'Monitoramento de Processo'
+        verbose_name_plural = 'Monitoramentos de Processos'
+
+    def __str__(self):
+        return f"{self.processo} - {self.ultimo_movimento_em or 'sem movimentos'}"
@@ -0,0 +1,184 @@
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from processos.models import Movimentacao, Processo
+from processos.resultados import atualizar_resultado_processos, classificar_texto
+
+from .models import ConsultaProcesso, MonitoramentoProcesso
+from .services.datajud_service import DataJudService
+from .services.limite_groq import em_lote
+
+logger = logging.getLogger(__name__)
+
+
+def consultas_mais_recentes():
+    """Última consulta de cada par (processo vinculado, tribunal)."""
+    ultimas = (
+        ConsultaProcesso.objects.filter(processo_vinculado__isnull=False, tribunal__ativo=True)
+        .order_by()
+        .values('processo_vinculado_id', 'tribunal_id')
+        .annotate(ultima=Max('id'))
+        .values('ultima')
+    )
+    return ConsultaProcesso.objects.filter(id__in=ultimas).select_related('tribunal')
+
+
+def atualizar_processos_vinculados(consultas=None, lote_termos=None):
+    """
+    Reconsulta no DataJud, em lote por tribunal, os processos vinculados a
+    consultas anteriores. Só grava uma nova ConsultaProcesso quando o
+    retorno difere da consulta mais recente. Retorna os contadores da
+    execução.
+    """
+    consultas = list(consultas if consultas is not None else consultas_mais_recentes())
+    por_tribunal = defaultdict(list)
+    for consulta in consultas:
+        por_tribunal[consulta.tribunal_id].append(consulta)
+
+    resumo = {'consultas': len(consultas), 'atualizadas': 0, 'sem_alteracao': 0, 'nao_encontradas': 0, 'falhas': 0}
+    novas = []
+    for itens in por_tribunal.values():
+        tribunal = itens[0].tribunal
+        try:
+            dados = DataJudService(tribunal).consultar_processos(
+                [c.numero_processo for c in itens],
+                usar_cache=False,
+                lote_termos=lote_termos,
+            )
+        except Exception:
+            logger.exception('Falha na consulta em lote do tribunal %s', tribunal.sigla)
+            resumo['falhas'] += len(itens)
+            continue
+
+        for consulta in itens:
+            atual = dados.get(consulta.numero_processo)
+            if atual is None:
+                resumo['nao_encontradas'] += 1
+            if (atual is None and consulta.status == 'erro') or (atual is not None and atual == consulta.dados_processo):
+                resumo['sem_alteracao'] += 1
+                continue
+            novas.append(ConsultaProcesso(
+                tribunal=tribunal,
+                numero_processo=consulta.numero_processo,
+                usuario_id=consulta.usuario_id,
+                processo_vinculado_id=consulta.processo_vinculado_id,
+                status='sucesso' if atual is not None else 'erro',
+                dados_processo=atual,
+                erro_mensagem='' if atual is not None else 'Processo não encontrado no tribunal',
+            ))
+
+    ConsultaProcesso.objects.bulk_create(novas, batch_size=500)
+    resumo['atualizadas'] = len(novas)
+    return resumo
+
+
+def _instante(movimento):
+    valor = movimento.get('dataHora')
+    instante = parse_datetime(valor) if isinstance(valor, str) else None
+    if instante is not None and timezone.is_naive(instante):
+        instante = timezone.make_aware(instante)
+    return instante
+
+
+def _movimentacao(processo_id, instante, movimento):
+    nome = (movimento.get('nome') or '').strip() or f"Movimento {movimento.get('codigo', '')}".strip()
+    complementos = [
+        ': '.join(str(parte) for parte in (c.get('nome'), c.get('descricao')) if parte)
+        for c in movimento.get('complementosTabelados') or []
+    ]
+    descricao = '\n'.join([nome, *(c for c in complementos if c)])
+    return Movimentacao(
+        processo_id=processo_id,
+        data=timezone.localtime(instante).date(),
+        titulo=nome[:200],
+        descricao=descricao,
+        resultado=classificar_texto(nome[:200], descricao),
+    )
+
+
+def importar_movimentos(consultas=None, importar_historico=None):
+    """
+    Cria em Movimentacao apenas os movimentos do DataJud posteriores à marca
+    d'água (data do movimento e códigos vistos nesse instante) de cada
+    processo vinculado. Na primeira vez que um processo é visto, a marca vai
+    para o movimento mais recente sem importar nada, a não ser com
+    `importar_historico` (padrão CONSULTA_TRIBUNAIS_IMPORTAR_HISTORICO).
+
+    As marcas ficam bloqueadas (select_for_update) até o fim da importação,
+    para duas execuções simultâneas não importarem o mesmo movimento.
+    """
+    if importar_historico is None:
+        importar_historico = getattr(settings, 'CONSULTA_TRIBUNAIS_IMPORTAR_HISTORICO', False)
+    consultas = [
+        c for c in (consultas if consultas is not None else consultas_mais_recentes())
+        if c.processo_vinculado_id and c.status == 'sucesso' and c.dados_processo
+    ]
+    processos_ids = {c.processo_vinculado_id for c in consultas}
+    # Marcas novas nascem vazias (verificado_em nulo); quem chegar depois
+    # encontra a linha e espera no bloqueio abaixo.
+    MonitoramentoProcesso.objects.bulk_create(
+        [MonitoramentoProcesso(processo_id=processo_id) for processo_id in processos_ids],
+        ignore_conflicts=True,
+    )
+    agora = timezone.now()
+    novas = []
+    with transaction.atomic():
+        marcas = {
+            m.processo_id: m
+            for m in MonitoramentoProcesso.objects.select_for_update().filter(processo_id__in=processos_ids)
+        }
+        for consulta in consultas:
+            marca = marcas[consulta.processo_vinculado_id]
+            primeira_vez = marca.verificado_em is None
+            limite, vistos = marca.ultimo_movimento_em, set(marca.codigos_ultimo_movimento)
+
+            movimentos = []
+            for movimento in consulta.dados_processo.get('movimentos') or []:
+                instante = _instante(movimento)
+                if instante is not None:
+                    movimentos.append((instante, movimento))
+            movimentos.sort(key=lambda item: item[0])
+
+            for instante, movimento in movimentos:
+                codigo = movimento.get('codigo')
+                if limite is not None and (instante < limite or (instante == limite and codigo in vistos)):
+                    continue
+                if importar_historico or not primeira_vez:
+                    novas.append(_movimentacao(marca.processo_id, instante, movimento))
+                    marca.movimentos_importados += 1
+                if marca.ultimo_movimento_em is None or instante > marca.ultimo_movimento_em:
+                    marca.ultimo_movimento_em = instante
+                    marca.codigos_ultimo_movimento = []
+                if instante == marca.ultimo_movimento_em and codigo not in marca.codigos_ultimo_movimento:
+                    marca.codigos_ultimo_movimento.append(codigo)
+            marca.verificado_em = agora
+
+        # bulk_create não dispara o post_save de Movimentacao: o resultado de
+        # cada linha já vem calculado e o do processo é recalculado uma vez.
+        Movimentacao.objects.bulk_create(novas, batch_size=500)
+        atualizados = {m.processo_id for m in novas}
+        if atualizados:
+            atualizar_resultado_processos(Processo.objects.filter(pk__in=atualizados))
+        MonitoramentoProcesso.objects.bulk_update(
+            list(marcas.values()),
+            ['ultimo_movimento_em', 'codigos_ultimo_movimento', 'movimentos_importados', 'verificado_em'],
+            batch_size=500,
+        )
+    return {'processos': len(marcas), 'processos_com_novidades': len(atualizados), 'movimentacoes': len(novas)}
+
+
+def monitorar_processos(lote_termos=None, importar_historico=None):
+    """
+    Reconsulta os processos vinculados no DataJud e importa os movimentos
+    novos. Chamadas ao Groq feitas aqui entram como chamadas em lote.
+    """
+    with em_lote():
+        resumo = atualizar_processos_vinculados(lote_termos=lote_termos)
+        resumo['movimentacoes'] = importar_movimentos(importar_historico=importar_historico)['movimentacoes']
+    return resumo
@@ -0,0 +1,179 @@
+"""
+Cache em dois níveis para as respostas do DataJud.
+
+O nível local é um LRU em memória do processo, com validade curta; o
+compartilhado é o cache do Django configurado em DATAJUD_CACHE_ALIAS (Redis
+em produção, ver CACHE_REDIS_URL). Cada entrada guarda o instante até o qual
+é considerada fresca: depois disso continua sendo servida por mais
+DATAJUD_CACHE_OBSOLETO_SEGUNDOS enquanto é revalidada em segundo plano.
+Processos não encontrados também são guardados, por DATAJUD_CACHE_NEGATIVO_SEGUNDOS.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core.cache_local import CacheLocalLRU
+
+logger = logging.getLogger(__name__)
+
+FRESCO_PADRAO_SEGUNDOS = 86400
+OBSOLETO_PADRAO_SEGUNDOS = 6 * 86400
+NEGATIVO_PADRAO_SEGUNDOS = 900
+LOCAL_PADRAO_ITENS = 1024
+LOCAL_PADRAO_SEGUNDOS = 60
+TRAVA_REVALIDACAO_SEGUNDOS = 60
+
+_local = CacheLocalLRU()
+_revalidando = set()
+_trava = threading.Lock()
+_executor = None
+
+
+def _reiniciar_apos_fork():
+    global _trava, _executor
+    _trava = threading.Lock()
+    _executor = None
+    _revalidando.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reiniciar_apos_fork)
+
+
+class Entrada:
+    __slots__ = ('dados', 'fresco_ate', 'expira_em')
+
+    def __init__(self, dados, fresco_ate, expira_em):
+        self.dados = dados
+        self.fresco_ate = fresco_ate
+        self.expira_em = expira_em
+
+    @property
+    def encontrado(self):
+        return self.dados is not None
+
+    @property
+    def obsoleta(self):
+        return time.time() >= self.fresco_ate
+
+
+def _compartilhado():
+    return caches[getattr(settings, 'DATAJUD_CACHE_ALIAS', 'default')]
+
+
+def _prazos(encontrado):
+    if encontrado:
+        fresco = getattr(settings, 'DATAJUD_CACHE_SEGUNDOS', FRESCO_PADRAO_SEGUNDOS)
+        obsoleto = getattr(settings, 'DATAJUD_CACHE_OBSOLETO_SEGUNDOS', OBSOLETO_PADRAO_SEGUNDOS)
+    else:
+        fresco = getattr(settings, 'DATAJUD_CACHE_NEGATIVO_SEGUNDOS', NEGATIVO_PADRAO_SEGUNDOS)
+        obsoleto = 0
+    return fresco, fresco + obsoleto
+
+
+def _guardar_local(chave, entrada):
+    validade = getattr(settings, 'DATAJUD_CACHE_LOCAL_SEGUNDOS', LOCAL_PADRAO_SEGUNDOS)
+    limite = getattr(settings, 'DATAJUD_CACHE_LOCAL_ITENS', LOCAL_PADRAO_ITENS)
+    if validade > 0:
+        _local.guardar(chave, entrada, min(entrada.expira_em, time.time() + validade), limite)
+
+
+def _de_armazenado(valor):
+    if not isinstance(valor, dict) or 'fresco_ate' not in valor:
+        return None
+    return Entrada(valor.get('dados'), valor['fresco_ate'], valor['expira_em'])
+
+
+def obter_varios(chaves):
+    """{chave: Entrada} das chaves presentes em algum dos níveis."""
+    encontradas = {}
+    faltantes = []
+    for chave in chaves:
+        entrada = _local.obter(chave)
+        if entrada is None:
+            faltantes.append(chave)
+        else:
+            encontradas[chave] = entrada
+    if faltantes:
+        for chave, valor in _compartilhado().get_many(faltantes).items():
+            entrada = _de_armazenado(valor)
+            if entrada is not None:
+                encontradas[chave] = entrada
+                _guardar_local(chave, entrada)
+    return encontradas
+
+
+def obter(chave):
+    return obter_varios([chave]).get(chave)
+
+
+def gravar_varios(itens):
+    """Grava {chave: dados ou None} nos dois níveis; None é uma entrada negativa."""
+    agora = time.time()
+    por_prazo = {}
+    for chave, dados in itens.items():
+        fresco, total = _prazos(dados is not None)
+        entrada = Entrada(dados, agora + fresco, agora + total)
+        _guardar_local(chave, entrada)
+        por_prazo.setdefault(total, {})[chave] = {
+            'dados': dados,
+            'fresco_ate': entrada.fresco_ate,
+            'expira_em': entrada.expira_em,
+        }
+    for total, valores in por_prazo.items():
+        _compartilhado().set_many(valores, max(int(total), 1))
+
+
+def gravar(chave, dados):
+    gravar_varios({chave: dados})
+
+
+def _executor_revalidacao():
+    global _executor
+    with _trava:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'DATAJUD_CACHE_REVALIDACAO_THREADS', 2),
+                thread_name_prefix='datajud-revalidacao',
+            )
+        return _executor
+
+
+def revalidar(chave, buscar):
+    """
+    Agenda `buscar()` em segundo plano para renovar uma entrada obsoleta.
+    Uma revalidação por chave de cada vez: no processo, pelo conjunto em
+    andamento, e entre workers, por uma trava no cache compartilhado.
+    Retorna o Future agendado ou None se já havia uma revalidação.
+    """
+    with _trava:
+        if chave in _revalidando:
+            return None
+        _revalidando.add(chave)
+    trava = f'{chave}:revalidando'
+    if not _compartilhado().add(trava, 1, TRAVA_REVALIDACAO_SEGUNDOS):
+        with _trava:
+            _revalidando.discard(chave)
+        return None
+
+    def executar():
+        try:
+            buscar()
+        except Exception:
+            logger.warning('Falha ao revalidar %s no DataJud; mantida a entrada obsoleta.', chave, exc_info=True)
+        finally:
+            _compartilhado().delete(trava)
+            with _trava:
+                _revalidando.discard(chave)
+
+    return _executor_revalidacao().submit(executar)
+
+
+def limpar_local():
+    """Esvazia o nível em memória do processo (usado em testes)."""
+    _local.limpar()
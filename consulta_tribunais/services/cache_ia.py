@@ -0,0 +1,128 @@
+"""
+Cache das respostas do modelo de linguagem (Groq).
+
+A chave é o hash do modelo, das mensagens (com espaços normalizados), da
+temperatura e de max_tokens: a mesma chamada devolve o texto já gerado sem
+consumir cota da API. Há um LRU local limitado a IA_CACHE_LOCAL_ITENS na
+frente do cache compartilhado do Django (IA_CACHE_ALIAS), onde as respostas
+ficam por IA_CACHE_SEGUNDOS.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core.cache_local import CacheLocalLRU
+
+VALIDADE_PADRAO_SEGUNDOS = 7 * 86400
+LOCAL_PADRAO_ITENS = 256
+PREFIXO = 'ia:completion:'
+
+_local = CacheLocalLRU()
+_trava = threading.Lock()
+_contadores = {'acertos_local': 0, 'acertos_compartilhado': 0, 'falhas': 0, 'ignoradas': 0, 'gravacoes': 0}
+
+
+def _reiniciar_apos_fork():
+    global _trava
+    _trava = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reiniciar_apos_fork)
+
+
+def ativo():
+    return getattr(settings, 'IA_CACHE_ATIVO', True)
+
+
+def _compartilhado():
+    return caches[getattr(settings, 'IA_CACHE_ALIAS', 'default')]
+
+
+def _validade():
+    return getattr(settings, 'IA_CACHE_SEGUNDOS', VALIDADE_PADRAO_SEGUNDOS)
+
+
+def _contar(nome):
+    with _trava:
+        _contadores[nome] += 1
+
+
+def _normalizar(texto):
+    linhas = (re.sub(r'[ \t]+', ' ', linha).strip() for linha in str(texto or '').strip().splitlines())
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(linhas))
+
+
+def chave(modelo, mensagens, temperatura, max_tokens):
+    conteudo = json.dumps(
+        {
+            'modelo': modelo,
+            'mensagens': [[m.get('role'), _normalizar(m.get('content'))] for m in mensagens],
+            'temperatura': round(float(temperatura), 4),
+            'max_tokens': int(max_tokens),
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return PREFIXO + hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+
+def obter(chave_cache):
+    """Texto guardado para a chave ou None."""
+    if not ativo():
+        return None
+    texto = _local.obter(chave_cache)
+    if texto is not None:
+        _contar('acertos_local')
+        return texto
+    texto = _compartilhado().get(chave_cache)
+    if texto is None:
+        _contar('falhas')
+        return None
+    _contar('acertos_compartilhado')
+    _local.guardar(chave_cache, texto, time.time() + _validade(), getattr(settings, 'IA_CACHE_LOCAL_ITENS', LOCAL_PADRAO_ITENS))
+    return texto
+
+
+def usar_cache_na_requisicao(request):
+    """False quando o cliente pede `sem_cache` no corpo ou na query string."""
+    valor = request.data.get('sem_cache', request.query_params.get('sem_cache', ''))
+    return str(valor).strip().lower() not in {'1', 'true', 't', 'sim', 'yes'}
+
+
+def registrar_ignorada():
+    _contar('ignoradas')
+
+
+def gravar(chave_cache, texto):
+    if not ativo() or not texto:
+        return
+    validade = _validade()
+    _local.guardar(chave_cache, texto, time.time() + validade, getattr(settings, 'IA_CACHE_LOCAL_ITENS', LOCAL_PADRAO_ITENS))
+    _compartilhado().set(chave_cache, texto, validade)
+    _contar('gravacoes')
+
+
+def metricas_cache_ia():
+    """Contadores do processo atual, com a taxa de acerto em %."""
+    with _trava:
+        dados = dict(_contadores)
+    acertos = dados['acertos_local'] + dados['acertos_compartilhado']
+    consultas = acertos + dados['falhas']
+    dados['taxa_acerto'] = round(100.0 * acertos / consultas, 1) if consultas else 0.0
+    dados['itens_locais'] = len(_local)
+    return dados
+
+
+def limpar_local():
+    """Esvazia o nível em memória e zera os contadores (usado em testes)."""
+    _local.limpar()
+    with _trava:
+        for nome in _contadores:
+            _contadores[nome] = 0
@@ -0,0 +1,173 @@
+"""
+Contexto compacto de um processo consultado para as perguntas à IA.
+
+Em vez dos dados completos do DataJud, com todas as movimentações, o modelo
+recebe os campos principais, as movimentações mais recentes e um resumo dos
+códigos de movimento já ocorridos (quantas vezes e quando por último). O
+texto cabe em CONSULTA_IA_CONTEXTO_TOKENS: saem primeiro as movimentações
+mais antigas e depois os códigos menos frequentes. O resumo de cada consulta
+fica no cache do Django (IA_CACHE_ALIAS).
+"""
+import math
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .datajud_service import formatar_dados_processo
+
+CARACTERES_POR_TOKEN = 4
+CONTEXTO_PADRAO_TOKENS = 1500
+HISTORICO_PADRAO_TOKENS = 600
+MOVIMENTOS_RECENTES_PADRAO = 20
+VALIDADE_SEGUNDOS = 86400
+PREFIXO = 'ia:contexto:'
+
+
+def estimar_tokens(texto):
+    """Estimativa de tokens pelo tamanho do texto (~4 caracteres por token)."""
+    return math.ceil(len(texto or '') / CARACTERES_POR_TOKEN)
+
+
+def truncar(texto, tokens):
+    texto = texto or ''
+    limite = max(int(tokens), 0) * CARACTERES_POR_TOKEN
+    if len(texto) <= limite:
+        return texto
+    return texto[:max(limite - 1, 0)].rstrip() + '…'
+
+
+def _data(movimento):
+    return str(movimento.get('dataHora') or '')[:10] or 's/d'
+
+
+def _nome(movimento):
+    return (movimento.get('nome') or '').strip() or f"Movimento {movimento.get('codigo', '')}".strip()
+
+
+def _linha_movimento(movimento):
+    complementos = [
+        str(c.get('descricao') or c.get('nome'))
+        for c in movimento.get('complementosTabelados') or []
+        if c.get('descricao') or c.get('nome')
+    ]
+    linha = f"- {_data(movimento)} [{movimento.get('codigo', '-')}] {_nome(movimento)}"
+    if complementos:
+        linha += f" ({'; '.join(complementos)})"
+    return linha
+
+
+def _linhas_codigos(movimentos):
+    """Uma linha por código, do mais frequente ao menos; `movimentos` do mais recente ao mais antigo."""
+    totais = Counter()
+    ultimos = {}
+    for movimento in movimentos:
+        codigo = movimento.get('codigo', '-')
+        totais[codigo] += 1
+        ultimos.setdefault(codigo, movimento)
+    return [
+        f'- [{codigo}] {_nome(ultimos[codigo])}: {total}x, último em {_data(ultimos[codigo])}'
+        for codigo, total in totais.most_common()
+    ]
+
+
+def _cabecalho(dados, total_movimentos):
+    formatado = formatar_dados_processo(dados)
+    campos = [
+        ('Número', formatado['numero_processo']),
+        ('Tribunal', formatado['tribunal']),
+        ('Grau', formatado['grau']),
+        ('Classe', formatado['classe']),
+        ('Órgão julgador', formatado['orgao_julgador']),
+        ('Assuntos', '; '.join(a for a in formatado['assuntos'] if a)),
+        ('Ajuizamento', str(formatado['data_ajuizamento'] or '')[:10]),
+        ('Valor da causa', formatado['valor_causa']),
+        ('Sistema', formatado['sistema']),
+        ('Total de movimentações', total_movimentos),
+    ]
+    return '\n'.join(f'{rotulo}: {valor}' for rotulo, valor in campos if valor not in (None, '', 0))
+
+
+def _secao(titulo, linhas, disponivel, omitidas):
+    """Seção com as linhas que couberem em `disponivel` caracteres ('' se nenhuma couber)."""
+    # Espaço reservado para a nota de linhas omitidas, se houver.
+    reserva = len(f'(+{len(linhas)} {omitidas})') + 1
+    incluidas = []
+    tamanho = len(titulo) + 2
+    for indice, linha in enumerate(linhas):
+        necessario = len(linha) + 1 + (reserva if indice < len(linhas) - 1 else 0)
+        if tamanho + necessario > disponivel:
+            break
+        incluidas.append(linha)
+        tamanho += len(linha) + 1
+    if not incluidas:
+        return ''
+    restantes = len(linhas) - len(incluidas)
+    if restantes:
+        incluidas.append(f'(+{restantes} {omitidas})')
+    return '\n'.join([f'\n\n{titulo}', *incluidas])
+
+
+def montar_contexto(dados, orcamento_tokens=None):
+    """
+    Texto do processo para o prompt, dentro do orçamento de tokens. Depois
+    dos campos principais, o resumo de códigos usa até metade do espaço que
+    sobra e as movimentações recentes ficam com o restante.
+    """
+    orcamento = orcamento_tokens or getattr(settings, 'CONSULTA_IA_CONTEXTO_TOKENS', CONTEXTO_PADRAO_TOKENS)
+    limite = orcamento * CARACTERES_POR_TOKEN
+    recentes = getattr(settings, 'CONSULTA_IA_MOVIMENTOS_RECENTES', MOVIMENTOS_RECENTES_PADRAO)
+    movimentos = sorted(
+        dados.get('movimentos') or [],
+        key=lambda movimento: str(movimento.get('dataHora') or ''),
+        reverse=True,
+    )
+
+    cabecalho = truncar(_cabecalho(dados, len(movimentos)), orcamento)
+    codigos = _secao(
+        'Códigos de movimento (ocorrências, última data):',
+        _linhas_codigos(movimentos),
+        (limite - len(cabecalho)) // 2,
+        'códigos omitidos',
+    )
+    ultimos = _secao(
+        'Movimentações recentes:',
+        [_linha_movimento(movimento) for movimento in movimentos[:recentes]],
+        limite - len(cabecalho) - len(codigos),
+        'movimentações recentes omitidas',
+    )
+    return cabecalho + ultimos + codigos
+
+
+def contexto_da_consulta(consulta, orcamento_tokens=None):
+    """`montar_contexto` dos dados da consulta, guardado no cache."""
+    dados = consulta.dados_processo or {}
+    orcamento = orcamento_tokens or getattr(settings, 'CONSULTA_IA_CONTEXTO_TOKENS', CONTEXTO_PADRAO_TOKENS)
+    versao = f"{len(dados.get('movimentos') or [])}:{dados.get('dataHoraUltimaAtualizacao', '')}"
+    chave = f'{PREFIXO}{consulta.pk}:{orcamento}:{versao}'
+    cache = caches[getattr(settings, 'IA_CACHE_ALIAS', 'default')]
+    texto = cache.get(chave)
+    if texto is None:
+        texto = montar_contexto(dados, orcamento)
+        cache.set(chave, texto, VALIDADE_SEGUNDOS)
+    return texto
+
+
+def compactar_historico(historico, orcamento_tokens=None):
+    """
+    Perguntas e respostas anteriores (em ordem cronológica) truncadas para
+    caber, juntas, em CONSULTA_IA_HISTORICO_TOKENS; a pergunta fica com até
+    um quarto da parte de cada par.
+    """
+    if not historico:
+        return []
+    orcamento = orcamento_tokens or getattr(settings, 'CONSULTA_IA_HISTORICO_TOKENS', HISTORICO_PADRAO_TOKENS)
+    por_item = orcamento // len(historico)
+    compactado = []
+    for item in historico:
+        pergunta = truncar(item['pergunta'], max(por_item // 4, 1))
+        compactado.append({
+            'pergunta': pergunta,
+            'resposta': truncar(item['resposta'], max(por_item - estimar_tokens(pergunta), 1)),
+        })
+    return compactado
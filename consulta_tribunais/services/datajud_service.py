@@ -1,10 +1,137 @@
 """
 Serviço de integração com a API DataJud do CNJ
 """
+import logging
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+
 import requests
-import json
-from django.core.cache import cache
-from django.utils import timezone
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import cache_datajud
+
+logger = logging.getLogger(__name__)
+
+STATUS_RETENTATIVA = (429, 500, 502, 503, 504)
+LOTE_TERMOS_PADRAO = 500
+TAMANHO_PAGINA_PADRAO = 100
+BUSCA_MULTIPLA_TIMEOUT_PADRAO = 10
+BUSCA_MULTIPLA_THREADS_PADRAO = 8
+
+
+def _metrica_vazia():
+    return {'chamadas': 0, 'falhas': 0, 'por_status': defaultdict(int), 'latencia_total_ms': 0.0, 'latencia_max_ms': 0.0}
+
+
+_sessoes = {}
+_metricas = defaultdict(_metrica_vazia)
+_trava = threading.Lock()
+_executor_busca = None
+
+
+def _reiniciar_apos_fork():
+    # Conexões abertas pelo processo pai não podem ser reaproveitadas no filho.
+    global _trava, _executor_busca
+    _trava = threading.Lock()
+    _executor_busca = None
+    _sessoes.clear()
+    _metricas.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reiniciar_apos_fork)
+
+
+def _politica_retentativas():
+    opcoes = {
+        'total': getattr(settings, 'DATAJUD_MAX_TENTATIVAS', 3),
+        'backoff_factor': getattr(settings, 'DATAJUD_BACKOFF_SEGUNDOS', 0.5),
+        'status_forcelist': STATUS_RETENTATIVA,
+        # As buscas no DataJud são POSTs de leitura: podem ser repetidas.
+        'allowed_methods': frozenset({'GET', 'POST'}),
+        'respect_retry_after_header': True,
+        'raise_on_status': False,
+    }
+    try:
+        return Retry(backoff_jitter=getattr(settings, 'DATAJUD_BACKOFF_JITTER_SEGUNDOS', 0.25), **opcoes)
+    except TypeError:  # urllib3 < 2 não tem jitter
+        return Retry(**opcoes)
+
+
+def _origem(endpoint):
+    partes = urlsplit(endpoint)
+    return f'{partes.scheme}://{partes.netloc}/'
+
+
+def obter_sessao(endpoint, retentativas=True):
+    """
+    Sessão HTTP compartilhada (keep-alive) para a origem do endpoint, com
+    pool de DATAJUD_POOL_CONEXOES conexões e retentativas com backoff
+    exponencial em 429/5xx e falhas de conexão. Com `retentativas=False`
+    devolve uma sessão separada, que falha na primeira tentativa.
+    """
+    origem = _origem(endpoint)
+    with _trava:
+        sessao = _sessoes.get((origem, retentativas))
+        if sessao is None:
+            tamanho = getattr(settings, 'DATAJUD_POOL_CONEXOES', 10)
+            sessao = requests.Session()
+            sessao.mount(origem, HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=tamanho,
+                max_retries=_politica_retentativas() if retentativas else Retry(total=0, raise_on_status=False),
+            ))
+            sessao.headers.update({
+                'Content-Type': 'application/json',
+                'Accept-Encoding': 'gzip, deflate',
+            })
+            _sessoes[(origem, retentativas)] = sessao
+    return sessao
+
+
+def fechar_sessoes():
+    """Fecha as sessões abertas (após fork de worker ou em testes)."""
+    with _trava:
+        for sessao in _sessoes.values():
+            sessao.close()
+        _sessoes.clear()
+
+
+def _registrar_metrica(sigla, status_http, latencia_ms):
+    with _trava:
+        metrica = _metricas[sigla]
+        metrica['chamadas'] += 1
+        metrica['por_status'][status_http] += 1
+        if status_http == 'falha' or status_http >= 400:
+            metrica['falhas'] += 1
+        metrica['latencia_total_ms'] += latencia_ms
+        metrica['latencia_max_ms'] = max(metrica['latencia_max_ms'], latencia_ms)
+    logger.info(
+        'datajud tribunal=%s status=%s latencia_ms=%.1f', sigla, status_http, latencia_ms,
+        extra={'tribunal': sigla, 'status_http': status_http, 'latencia_ms': latencia_ms},
+    )
+
+
+def metricas_datajud():
+    """Chamadas, falhas, contagem por status e latência (média/máx.) por tribunal neste processo."""
+    with _trava:
+        return {
+            sigla: {
+                'chamadas': m['chamadas'],
+                'falhas': m['falhas'],
+                'por_status': dict(m['por_status']),
+                'latencia_media_ms': round(m['latencia_total_ms'] / m['chamadas'], 1) if m['chamadas'] else 0.0,
+                'latencia_max_ms': round(m['latencia_max_ms'], 1),
+            }
+            for sigla, m in _metricas.items()
+        }
 
 
 class DataJudService:
@@ -14,16 +141,50 @@ class DataJudService:
         self.tribunal = tribunal
         self.endpoint = tribunal.api_endpoint
         self.api_key = tribunal.api_key
+
+    def _post(self, query, timeout_leitura=None, retentativas=True):
+        """
+        Envia a busca ao endpoint do tribunal pela sessão compartilhada. Com
+        `timeout_leitura`, a conexão também não espera mais que ele.
+        """
+        inicio = time.monotonic()
+        status_http = 'falha'
+        timeout_conexao = getattr(settings, 'DATAJUD_TIMEOUT_CONEXAO', 5)
+        if timeout_leitura:
+            timeout_conexao = min(timeout_conexao, timeout_leitura)
+        try:
+            response = obter_sessao(self.endpoint, retentativas).post(
+                self.endpoint,
+                headers={'Authorization': f'APIKey {self.api_key}'},
+                json=query,
+                timeout=(
+                    timeout_conexao,
+                    timeout_leitura or getattr(settings, 'DATAJUD_TIMEOUT_LEITURA', 30),
+                ),
+            )
+            status_http = response.status_code
+            response.raise_for_status()
+            return response.json()
+        finally:
+            _registrar_metrica(self.tribunal.sigla, status_http, (time.monotonic() - inicio) * 1000)
     
     def consultar_processo(self, numero_processo):
-        """Consulta um processo específico no DataJud"""
-        # Verifica cache primeiro (válido por 24h)
-        cache_key = f'datajud_{self.tribunal.sigla}_{numero_processo}'
-        cached_data = cache.get(cache_key)
-        
-        if cached_data:
-            return cached_data
-        
+        """
+        Consulta um processo específico no DataJud.
+
+        Usa o cache em dois níveis (ver cache_datajud): entradas obsoletas são
+        devolvidas de imediato e renovadas em segundo plano, e "não
+        encontrado" também fica em cache por um prazo curto.
+        """
+        chave = self._chave_cache(numero_processo)
+        entrada = cache_datajud.obter(chave)
+        if entrada is not None:
+            if entrada.obsoleta:
+                cache_datajud.revalidar(chave, lambda: self._buscar_processo(numero_processo))
+            return entrada.dados
+        return self._buscar_processo(numero_processo)
+
+    def _buscar_processo(self, numero_processo):
         try:
             query = {
                 "query": {
@@ -32,33 +193,90 @@ class DataJudService:
                     }
                 }
             }
-            
-            headers = {
-                'Authorization': f'APIKey {self.api_key}',
-                'Content-Type': 'application/json'
-            }
-            
-            response = requests.post(
-                self.endpoint,
-                headers=headers,
-                json=query,
-                timeout=30
-            )
-            
-            response.raise_for_status()
-            data = response.json()
-            
-            if data.get('hits', {}).get('hits'):
-                processo_data = data['hits']['hits'][0]['_source']
-                cache.set(cache_key, processo_data, 86400)  # 24h
-                return processo_data
-            
-            return None
-            
+            data = self._post(query)
         except requests.RequestException as e:
             raise Exception(f"Erro ao consultar DataJud: {str(e)}")
-    
-    def buscar_processos_avancado(self, filtros, max_results=20):
+
+        hits = data.get('hits', {}).get('hits')
+        processo_data = hits[0]['_source'] if hits else None
+        cache_datajud.gravar(self._chave_cache(numero_processo), processo_data)
+        return processo_data
+
+    def _chave_cache(self, numero_processo):
+        return f'datajud:{self.tribunal.sigla}:{numero_processo}'
+
+    def consultar_processos(self, numeros, usar_cache=True, lote_termos=None, tamanho_pagina=None):
+        """
+        Consulta vários processos do tribunal em poucas buscas: os números
+        são agrupados em consultas `terms` de até `lote_termos` itens,
+        paginadas com `search_after`. Havendo mais de um documento para o
+        mesmo número, fica o mais recente. Cada resultado, inclusive "não
+        encontrado", é gravado no cache por número, como em
+        `consultar_processo`; entradas obsoletas são consultadas de novo.
+
+        Returns:
+            dict: {numero: dados do processo ou None se não encontrado}
+        """
+        lote_termos = lote_termos or getattr(settings, 'DATAJUD_LOTE_TERMOS', LOTE_TERMOS_PADRAO)
+        tamanho_pagina = tamanho_pagina or getattr(settings, 'DATAJUD_TAMANHO_PAGINA', TAMANHO_PAGINA_PADRAO)
+        numeros = list(dict.fromkeys(n for n in numeros if n))
+        resultado = dict.fromkeys(numeros)
+
+        faltantes = numeros
+        if usar_cache:
+            chaves = {self._chave_cache(n): n for n in numeros}
+            respondidos = set()
+            for chave, entrada in cache_datajud.obter_varios(list(chaves)).items():
+                if not entrada.obsoleta:
+                    resultado[chaves[chave]] = entrada.dados
+                    respondidos.add(chaves[chave])
+            faltantes = [n for n in numeros if n not in respondidos]
+
+        # O DataJud indexa o número só com dígitos; o retorno é mapeado de
+        # volta para o número como foi informado.
+        por_digitos = defaultdict(list)
+        for numero in faltantes:
+            por_digitos[re.sub(r'\D', '', numero)].append(numero)
+        digitos = list(por_digitos)
+
+        encontrados = {}
+        try:
+            for inicio in range(0, len(digitos), lote_termos):
+                lote = digitos[inicio:inicio + lote_termos]
+                search_after = None
+                while True:
+                    query = {
+                        'size': tamanho_pagina,
+                        'query': {'terms': {'numeroProcesso': lote}},
+                        # Do documento mais recente ao mais antigo, como o
+                        # primeiro resultado de `consultar_processo`; `_id`
+                        # desempata para o search_after não pular documentos.
+                        'sort': [{'@timestamp': {'order': 'desc'}}, {'_id': {'order': 'asc'}}],
+                    }
+                    if search_after is not None:
+                        query['search_after'] = search_after
+                    hits = self._post(query).get('hits', {}).get('hits', [])
+                    for hit in hits:
+                        fonte = hit.get('_source', {})
+                        chave = re.sub(r'\D', '', str(fonte.get('numeroProcesso', '')))
+                        if chave in por_digitos and chave not in encontrados:
+                            encontrados[chave] = fonte
+                    if len(hits) < tamanho_pagina or not hits[-1].get('sort'):
+                        break
+                    search_after = hits[-1]['sort']
+        except requests.RequestException as e:
+            raise Exception(f"Erro ao consultar DataJud em lote: {str(e)}")
+
+        para_cache = {}
+        for chave, numeros_informados in por_digitos.items():
+            for numero in numeros_informados:
+                resultado[numero] = encontrados.get(chave)
+                para_cache[self._chave_cache(numero)] = resultado[numero]
+        if para_cache:
+            cache_datajud.gravar_varios(para_cache)
+        return resultado
+
+    def buscar_processos_avancado(self, filtros, max_results=20, timeout_leitura=None, retentativas=True):
         """
         Busca avançada de processos.
         
@@ -73,6 +291,8 @@ class DataJudService:
                 - data_fim: Data final (formato: YYYYMMDD)
                 - assunto: Assunto (ex: "Horas Extras")
             max_results (int): Número máximo de resultados
+            timeout_leitura (float): Limite, em segundos, da conexão e da leitura
+            retentativas (bool): False para não repetir a busca em 429/5xx
         
         Returns:
             list: Lista de processos encontrados
@@ -122,20 +342,7 @@ class DataJudService:
             query["size"] = max_results
             query["sort"] = [{"dataAjuizamento": "desc"}]
             
-            headers = {
-                'Authorization': f'APIKey {self.api_key}',
-                'Content-Type': 'application/json'
-            }
-            
-            response = requests.post(
-                self.endpoint,
-                headers=headers,
-                json=query,
-                timeout=30
-            )
-            
-            response.raise_for_status()
-            data = response.json()
+            data = self._post(query, timeout_leitura=timeout_leitura, retentativas=retentativas)
             
             processos = []
             for hit in data.get('hits', {}).get('hits', []):
@@ -147,6 +354,82 @@ class DataJudService:
             raise Exception(f"Erro ao buscar processos: {str(e)}")
 
 
+def _executor_busca_multipla():
+    global _executor_busca
+    with _trava:
+        if _executor_busca is None:
+            _executor_busca = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'DATAJUD_BUSCA_MULTIPLA_THREADS', BUSCA_MULTIPLA_THREADS_PADRAO),
+                thread_name_prefix='datajud-busca',
+            )
+        return _executor_busca
+
+
+def _ordem_ajuizamento(processo):
+    # Os tribunais devolvem dataAjuizamento em formatos diferentes
+    # ("20240131000000", "2024-01-31T00:00:00.000Z"); compara só os dígitos.
+    return re.sub(r'\D', '', str(processo.get('dataAjuizamento') or ''))[:14].ljust(14, '0')
+
+
+def _buscar_no_prazo(tribunal, filtros, max_results, prazo):
+    """Busca avançada sem retentativas, com o tempo que sobrou até `prazo`."""
+    restante = prazo - time.monotonic()
+    if restante <= 0:
+        raise TimeoutError(f'Prazo esgotado na fila antes de consultar {tribunal.sigla}.')
+    return DataJudService(tribunal).buscar_processos_avancado(
+        filtros, max_results, timeout_leitura=restante, retentativas=False,
+    )
+
+
+def buscar_em_tribunais(tribunais, filtros, max_results=20, timeout=None):
+    """
+    Executa a busca avançada em vários tribunais ao mesmo tempo, num pool de
+    threads limitado. Tribunais que não respondem em `timeout` segundos,
+    contados da chamada (o tempo na fila do pool também conta), ficam de
+    fora; os demais resultados são devolvidos mesmo assim. Não há
+    retentativas: um tribunal com erro fica como 'erro'.
+
+    Returns:
+        tuple: (processos sem repetição de numeroProcesso, do ajuizamento mais
+        recente para o mais antigo, limitados a `max_results`; situação de
+        cada tribunal com status 'ok', 'erro' ou 'tempo_esgotado')
+    """
+    timeout = timeout or getattr(settings, 'DATAJUD_BUSCA_MULTIPLA_TIMEOUT_SEGUNDOS', BUSCA_MULTIPLA_TIMEOUT_PADRAO)
+    executor = _executor_busca_multipla()
+    prazo = time.monotonic() + timeout
+    futuros = {
+        executor.submit(_buscar_no_prazo, tribunal, filtros, max_results, prazo): tribunal
+        for tribunal in tribunais
+    }
+    concluidos, _ = wait(futuros, timeout=max(prazo - time.monotonic(), 0))
+
+    processos, situacao = [], []
+    for futuro, tribunal in futuros.items():
+        item = {'id': tribunal.id, 'sigla': tribunal.sigla, 'status': 'ok', 'total': 0}
+        if futuro not in concluidos:
+            futuro.cancel()
+            item['status'] = 'tempo_esgotado'
+        elif futuro.exception() is not None:
+            logger.warning('Falha na busca avançada do tribunal %s: %s', tribunal.sigla, futuro.exception())
+            item['status'] = 'erro'
+        else:
+            encontrados = futuro.result()
+            item['total'] = len(encontrados)
+            processos.extend(encontrados)
+        situacao.append(item)
+
+    processos.sort(key=_ordem_ajuizamento, reverse=True)
+    unicos, vistos = [], set()
+    for processo in processos:
+        numero = processo.get('numeroProcesso')
+        if numero:
+            if numero in vistos:
+                continue
+            vistos.add(numero)
+        unicos.append(processo)
+    return unicos[:max_results], situacao
+
+
 def formatar_dados_processo(dados_raw):
     """Formata os dados brutos do processo"""
     if not dados_raw:
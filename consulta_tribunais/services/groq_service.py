@@ -1,13 +1,22 @@
 """
 Serviço de integração com Groq AI para análise de processos
 """
+import contextlib
 import os
 import json
-from groq import Groq
+import queue
+import threading
+from groq import Groq, RateLimitError
+
+from . import cache_ia, limite_groq
+
+_FIM_FLUXO = object()
 
 
 class GroqService:
     """Serviço para análise de processos usando Groq AI"""
+
+    model = "llama-3.3-70b-versatile"  # Modelo mais rápido e eficiente
     
     def __init__(self, api_key=None):
         self.api_key = api_key or os.getenv('GROQ_API_KEY')
@@ -15,9 +24,97 @@ class GroqService:
             raise ValueError("GROQ_API_KEY não configurada")
         
         self.client = Groq(api_key=self.api_key)
-        self.model = "llama-3.3-70b-versatile"  # Modelo mais rápido e eficiente
-    
-    def analisar_processo(self, dados_processo):
+
+    def completar(self, messages, temperature=0.2, max_tokens=1200, usar_cache=True):
+        """
+        Gera a resposta do modelo para as mensagens, reaproveitando o cache
+        de respostas (ver cache_ia). Com `usar_cache=False` a API é chamada
+        de qualquer forma e o cache recebe a resposta nova. A chamada à API
+        respeita os limites de limite_groq.
+        """
+        chave = cache_ia.chave(self.model, messages, temperature, max_tokens)
+        if usar_cache:
+            texto = cache_ia.obter(chave)
+            if texto is not None:
+                return texto
+        else:
+            cache_ia.registrar_ignorada()
+
+        with limite_groq.reservar():
+            try:
+                chat_completion = self.client.chat.completions.create(
+                    messages=messages,
+                    model=self.model,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                )
+            except RateLimitError:
+                limite_groq.registrar_429()
+                raise
+        texto = chat_completion.choices[0].message.content or ''
+        cache_ia.gravar(chave, texto)
+        return texto
+
+    def completar_em_fluxo(self, messages, temperature=0.2, max_tokens=1200, usar_cache=True):
+        """
+        Como `completar`, mas gera os trechos do texto à medida que o modelo
+        os devolve (`stream=True`). O texto completo vai para o cache ao
+        final; uma resposta já em cache sai inteira num único trecho.
+        """
+        chave = cache_ia.chave(self.model, messages, temperature, max_tokens)
+        if usar_cache:
+            texto = cache_ia.obter(chave)
+            if texto is not None:
+                yield texto
+                return
+        else:
+            cache_ia.registrar_ignorada()
+
+        with contextlib.ExitStack() as pilha:
+            pilha.enter_context(limite_groq.reservar())
+            try:
+                resposta = self.client.chat.completions.create(
+                    messages=messages,
+                    model=self.model,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True,
+                )
+            except RateLimitError:
+                limite_groq.registrar_429()
+                raise
+            vaga = pilha.pop_all()
+
+        # O fluxo do Groq é lido numa thread própria, que devolve a vaga
+        # assim que o modelo termina; um cliente lento só atrasa a leitura
+        # da fila, cujo tamanho já é limitado por max_tokens.
+        fila = queue.Queue()
+        threading.Thread(target=self._ler_fluxo, args=(resposta, vaga, fila), daemon=True).start()
+        partes = []
+        while True:
+            trecho = fila.get()
+            if trecho is _FIM_FLUXO:
+                break
+            if isinstance(trecho, Exception):
+                raise trecho
+            partes.append(trecho)
+            yield trecho
+        cache_ia.gravar(chave, ''.join(partes))
+
+    @staticmethod
+    def _ler_fluxo(resposta, vaga, fila):
+        try:
+            with vaga:
+                for pedaco in resposta:
+                    trecho = pedaco.choices[0].delta.content if pedaco.choices else None
+                    if trecho:
+                        fila.put(trecho)
+        except Exception as exc:
+            fila.put(exc)
+        else:
+            fila.put(_FIM_FLUXO)
+
+    def analisar_processo(self, dados_processo, usar_cache=True):
         """
         Analisa um processo e gera um resumo inteligente
         
@@ -30,8 +127,8 @@ class GroqService:
         prompt = self._criar_prompt_analise(dados_processo)
         
         try:
-            chat_completion = self.client.chat.completions.create(
-                messages=[
+            return self.completar(
+                [
                     {
                         "role": "system",
                         "content": (
@@ -46,24 +143,22 @@ class GroqService:
                         "content": prompt
                     }
                 ],
-                model=self.model,
                 temperature=0.3,
                 max_tokens=1500,
+                usar_cache=usar_cache,
             )
             
-            return chat_completion.choices[0].message.content
-            
         except Exception as e:
             raise Exception(f"Erro ao analisar processo com Groq: {str(e)}")
     
-    def responder_pergunta(self, dados_processo, pergunta, historico_perguntas=None):
+    def responder_pergunta(self, contexto, pergunta, historico_perguntas=None, usar_cache=True):
         """
         Responde uma pergunta específica sobre o processo
         
         Args:
-            dados_processo: Dict com dados do processo
+            contexto: Texto com os dados do processo (ver contexto_ia.contexto_da_consulta)
             pergunta: Pergunta do usuário
-            historico_perguntas: Lista de perguntas/respostas anteriores
+            historico_perguntas: Lista de perguntas/respostas anteriores, em ordem cronológica
         
         Returns:
             str: Resposta da IA
@@ -80,10 +175,9 @@ class GroqService:
         ]
         
         # Adiciona contexto do processo
-        contexto = f"DADOS DO PROCESSO:\n{json.dumps(dados_processo, indent=2, ensure_ascii=False)}"
         mensagens.append({
             "role": "user",
-            "content": contexto
+            "content": f"DADOS DO PROCESSO:\n{contexto}"
         })
         
         # Adiciona histórico se existir
@@ -105,14 +199,7 @@ class GroqService:
         })
         
         try:
-            chat_completion = self.client.chat.completions.create(
-                messages=mensagens,
-                model=self.model,
-                temperature=0.2,
-                max_tokens=1000,
-            )
-            
-            return chat_completion.choices[0].message.content
+            return self.completar(mensagens, temperature=0.2, max_tokens=1000, usar_cache=usar_cache)
             
         except Exception as e:
             raise Exception(f"Erro ao responder pergunta: {str(e)}")
@@ -0,0 +1,241 @@
+"""
+Limite de chamadas ao Groq.
+
+Toda chamada ao modelo (GroqService.completar e completar_em_fluxo) passa
+por `reservar()`, que aplica três limites:
+
+- no máximo GROQ_MAX_SIMULTANEAS chamadas em andamento no processo;
+- um balde de fichas local, reabastecido a GROQ_REQUISICOES_POR_MINUTO e
+  com capacidade para rajadas de GROQ_RAJADA chamadas;
+- uma janela por minuto no cache compartilhado (GROQ_LIMITE_CACHE_ALIAS,
+  Redis em produção), que vale para todos os workers juntos.
+
+Quem espera entra numa fila com prioridade: chamadas interativas (feitas
+na requisição HTTP) passam à frente das chamadas em lote (ver `em_lote`).
+Sem vaga em GROQ_ESPERA_MAXIMA_SEGUNDOS (ou GROQ_ESPERA_LOTE_SEGUNDOS, em
+lote), a chamada falha com LimiteGroqExcedido. Uma resposta 429 do Groq
+esvazia o balde local.
+"""
+import contextlib
+import contextvars
+import heapq
+import itertools
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+INTERATIVA = 0
+LOTE = 1
+
+REQUISICOES_POR_MINUTO_PADRAO = 30
+RAJADA_PADRAO = 5
+MAX_SIMULTANEAS_PADRAO = 4
+ESPERA_MAXIMA_PADRAO_SEGUNDOS = 30
+ESPERA_LOTE_PADRAO_SEGUNDOS = 300
+PREFIXO = 'groq:limite:'
+
+_CONTADORES = (
+    'chamadas', 'interativas', 'em_lote', 'esperas', 'recusadas',
+    'limitadas_compartilhado', 'respostas_429',
+)
+
+_prioridade = contextvars.ContextVar('prioridade_groq', default=INTERATIVA)
+
+
+class LimiteGroqExcedido(Exception):
+    """Não houve vaga para chamar o Groq dentro do tempo de espera."""
+
+
+class _Estado:
+    def __init__(self):
+        self.condicao = threading.Condition()
+        self.fila = []
+        self.sequencia = itertools.count()
+        self.em_andamento = 0
+        self.fichas = None  # None: balde cheio
+        self.reabastecido_em = time.monotonic()
+        self.contadores = dict.fromkeys(_CONTADORES, 0)
+        self.espera_total = 0.0
+        self.espera_maxima = 0.0
+
+
+_estado = _Estado()
+
+
+def _reiniciar_apos_fork():
+    global _estado
+    _estado = _Estado()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reiniciar_apos_fork)
+
+
+@contextlib.contextmanager
+def em_lote():
+    """Chamadas feitas dentro do bloco esperam atrás das interativas."""
+    token = _prioridade.set(LOTE)
+    try:
+        yield
+    finally:
+        _prioridade.reset(token)
+
+
+def _configuracao():
+    return (
+        getattr(settings, 'GROQ_REQUISICOES_POR_MINUTO', REQUISICOES_POR_MINUTO_PADRAO),
+        max(getattr(settings, 'GROQ_RAJADA', RAJADA_PADRAO), 1),
+        getattr(settings, 'GROQ_MAX_SIMULTANEAS', MAX_SIMULTANEAS_PADRAO),
+    )
+
+
+def _espera_local(estado, entrada, por_minuto, rajada, maximo):
+    """0 se a entrada pode seguir, segundos até a próxima ficha, ou None para aguardar aviso."""
+    if estado.fila[0] != entrada:
+        return None
+    if maximo > 0 and estado.em_andamento >= maximo:
+        return None
+    if por_minuto <= 0:
+        return 0
+    agora = time.monotonic()
+    taxa = por_minuto / 60.0
+    fichas = rajada if estado.fichas is None else estado.fichas
+    estado.fichas = min(rajada, fichas + (agora - estado.reabastecido_em) * taxa)
+    estado.reabastecido_em = agora
+    if estado.fichas >= 1:
+        return 0
+    return (1 - estado.fichas) / taxa
+
+
+def _reservar_janela_compartilhada(por_minuto):
+    """0 se ocupou uma vaga na janela do minuto atual, ou segundos até a próxima janela."""
+    if por_minuto <= 0:
+        return 0
+    cache = caches[getattr(settings, 'GROQ_LIMITE_CACHE_ALIAS', 'default')]
+    while True:
+        agora = time.time()
+        janela = int(agora // 60)
+        chave = f'{PREFIXO}{janela}'
+        cache.add(chave, 0, 120)
+        try:
+            usadas = cache.incr(chave)
+        except ValueError:  # a chave expirou entre o add e o incr
+            continue
+        if usadas <= por_minuto:
+            return 0
+        # Tentativa recusada não conta na janela.
+        try:
+            cache.decr(chave)
+        except ValueError:
+            pass
+        return (janela + 1) * 60 - agora
+
+
+def _ocupar_vaga_local(estado, prioridade, prazo, por_minuto, rajada, maximo):
+    with estado.condicao:
+        entrada = (prioridade, next(estado.sequencia))
+        heapq.heappush(estado.fila, entrada)
+        try:
+            while True:
+                espera = _espera_local(estado, entrada, por_minuto, rajada, maximo)
+                if espera == 0:
+                    break
+                restante = prazo - time.monotonic()
+                if restante <= 0:
+                    estado.contadores['recusadas'] += 1
+                    raise LimiteGroqExcedido('Sem vaga para chamar o Groq dentro do tempo de espera.')
+                estado.condicao.wait(restante if espera is None else min(espera, restante))
+            if por_minuto > 0:
+                estado.fichas -= 1
+            estado.em_andamento += 1
+        finally:
+            estado.fila.remove(entrada)
+            heapq.heapify(estado.fila)
+            estado.condicao.notify_all()
+
+
+def _adquirir(prioridade):
+    lote = prioridade == LOTE
+    espera_maxima = (
+        getattr(settings, 'GROQ_ESPERA_LOTE_SEGUNDOS', ESPERA_LOTE_PADRAO_SEGUNDOS)
+        if lote
+        else getattr(settings, 'GROQ_ESPERA_MAXIMA_SEGUNDOS', ESPERA_MAXIMA_PADRAO_SEGUNDOS)
+    )
+    por_minuto, rajada, maximo = _configuracao()
+    inicio = time.monotonic()
+    prazo = inicio + espera_maxima
+    estado = _estado
+    while True:
+        _ocupar_vaga_local(estado, prioridade, prazo, por_minuto, rajada, maximo)
+        proxima = _reservar_janela_compartilhada(por_minuto)
+        if not proxima:
+            break
+        # Janela cheia entre os workers: devolve a vaga e a ficha locais
+        # antes de esperar, para não travar quem está na fila.
+        with estado.condicao:
+            estado.em_andamento -= 1
+            estado.fichas = min(rajada, estado.fichas + 1)
+            estado.contadores['limitadas_compartilhado'] += 1
+            estado.condicao.notify_all()
+            if time.monotonic() + proxima > prazo:
+                estado.contadores['recusadas'] += 1
+                raise LimiteGroqExcedido('Limite de chamadas ao Groq atingido entre os workers.')
+        time.sleep(proxima)
+
+    esperou = time.monotonic() - inicio
+    with estado.condicao:
+        estado.contadores['chamadas'] += 1
+        estado.contadores['em_lote' if lote else 'interativas'] += 1
+        if esperou >= 0.001:
+            estado.contadores['esperas'] += 1
+        estado.espera_total += esperou
+        estado.espera_maxima = max(estado.espera_maxima, esperou)
+    return estado
+
+
+def _liberar(estado):
+    with estado.condicao:
+        estado.em_andamento -= 1
+        estado.condicao.notify_all()
+
+
+@contextlib.contextmanager
+def reservar(prioridade=None):
+    """
+    Ocupa uma vaga de chamada ao Groq durante o bloco. A prioridade padrão
+    é a do contexto: interativa, ou em lote dentro de `em_lote()`.
+    """
+    estado = _adquirir(_prioridade.get() if prioridade is None else prioridade)
+    try:
+        yield
+    finally:
+        _liberar(estado)
+
+
+def registrar_429():
+    """O Groq recusou por limite: esvazia o balde para as próximas chamadas esperarem."""
+    estado = _estado
+    with estado.condicao:
+        estado.contadores['respostas_429'] += 1
+        estado.fichas = 0.0
+        estado.reabastecido_em = time.monotonic()
+
+
+def metricas_limite_groq():
+    """Contadores do processo atual e o estado da fila."""
+    estado = _estado
+    with estado.condicao:
+        dados = dict(estado.contadores)
+        dados['em_andamento'] = estado.em_andamento
+        dados['na_fila'] = len(estado.fila)
+        dados['espera_media_ms'] = round(1000 * estado.espera_total / dados['chamadas'], 1) if dados['chamadas'] else 0.0
+        dados['espera_maxima_ms'] = round(1000 * estado.espera_maxima, 1)
+    return dados
+
+
+def limpar():
+    """Reinicia o estado do processo (usado em testes)."""
+    _reiniciar_apos_fork()
@@ -0,0 +1,91 @@
+import logging
+import os
+
+from django.conf import settings
+
+from core.tasks import shared_task
+
+logger = logging.getLogger(__name__)
+
+STATUS_FINAIS = {'sucesso', 'erro'}
+ERRO_NAO_ENCONTRADO = 'Processo não encontrado no tribunal'
+
+
+def enfileirar(tarefa, *args, **kwargs):
+    """
+    Envia a task ao Celery quando CONSULTA_TRIBUNAIS_USE_CELERY está ativo.
+    Sem Celery, ou se o broker recusar a mensagem, executa no próprio processo.
+    """
+    if getattr(settings, 'CONSULTA_TRIBUNAIS_USE_CELERY', False):
+        try:
+            tarefa.delay(*args, **kwargs)
+            return
+        except Exception:
+            logger.exception('Falha ao enfileirar %s; executando de forma síncrona.', tarefa.name)
+    tarefa.run(*args, **kwargs)
+
+
+@shared_task(name='consulta_tribunais.processar_consulta')
+def processar_consulta(consulta_id, analisar_com_ia=True):
+    """Consulta o DataJud e, se pedido, encadeia a análise por IA."""
+    from .models import ConsultaProcesso
+    from .services.datajud_service import DataJudService
+
+    consulta = ConsultaProcesso.objects.select_related('tribunal').filter(pk=consulta_id).first()
+    if consulta is None or consulta.status in STATUS_FINAIS:
+        return
+    consulta.status = 'processando'
+    consulta.save(update_fields=['status'])
+
+    try:
+        dados = DataJudService(consulta.tribunal).consultar_processo(consulta.numero_processo)
+    except Exception:
+        logger.exception('Falha ao consultar processo no DataJud (consulta %s)', consulta_id)
+        consulta.status = 'erro'
+        consulta.erro_mensagem = 'Falha interna ao consultar tribunal.'
+        consulta.save(update_fields=['status', 'erro_mensagem'])
+        return
+
+    if not dados:
+        consulta.status = 'erro'
+        consulta.erro_mensagem = ERRO_NAO_ENCONTRADO
+        consulta.save(update_fields=['status', 'erro_mensagem'])
+        return
+
+    consulta.dados_processo = dados
+    if analisar_com_ia and os.getenv('GROQ_API_KEY'):
+        consulta.save(update_fields=['dados_processo'])
+        enfileirar(analisar_consulta, consulta_id)
+        return
+    consulta.status = 'sucesso'
+    consulta.save(update_fields=['dados_processo', 'status'])
+
+
+@shared_task(name='consulta_tribunais.analisar_consulta')
+def analisar_consulta(consulta_id):
+    """Gera (ou reaproveita) a análise por IA de uma consulta já preenchida e a conclui."""
+    from .analise import gerar_analise
+    from .models import ConsultaProcesso
+
+    consulta = ConsultaProcesso.objects.filter(pk=consulta_id).first()
+    if consulta is None or not consulta.dados_processo:
+        return
+    try:
+        gerar_analise(consulta)
+    except Exception:
+        logger.exception('Falha ao gerar análise IA na consulta %s', consulta_id)
+        # Falha na IA não impede a consulta
+        consulta.erro_mensagem = 'Aviso: Falha ao gerar análise IA.'
+        consulta.status = 'sucesso'
+        consulta.save(update_fields=['status', 'erro_mensagem'])
+        return
+    consulta.status = 'sucesso'
+    consulta.save(update_fields=['status'])
+
+
+@shared_task(name='consulta_tribunais.monitorar_processos')
+def monitorar_processos():
+    """Tarefa periódica: reconsulta os processos vinculados e importa movimentos novos."""
+    from .monitoramento import monitorar_processos as executar
+
+    return executar()
@@ -1,3 +1,564 @@
-from django.test import TestCase
+import threading
+import time
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from accounts.models import Usuario
+from core.testing import StubHttp, completion_groq, completion_groq_em_fluxo, groq_local
+from processos.models import Cliente, Movimentacao, Processo, TipoProcesso
+
+from .models import ConsultaProcesso, MonitoramentoProcesso, Tribunal
+from .monitoramento import atualizar_processos_vinculados, importar_movimentos
+from .tasks import analisar_consulta, processar_consulta
+from .services import cache_datajud, cache_ia, contexto_ia, limite_groq
+from .services.datajud_service import DataJudService, fechar_sessoes, metricas_datajud
+from .services.groq_service import GroqService
+
+
+@override_settings(DATAJUD_BACKOFF_SEGUNDOS=0, DATAJUD_BACKOFF_JITTER_SEGUNDOS=0)
+class DataJudClienteHttpTest(TestCase):
+    def setUp(self):
+        fechar_sessoes()
+        cache.clear()
+        cache_datajud.limpar_local()
+        self.stub = StubHttp([
+            (503, {'erro': 'indisponível'}),
+            (200, {'hits': {'hits': [{'_source': {'numeroProcesso': '1'}}]}}),
+            (200, {'hits': {'hits': [{'_source': {'numeroProcesso': '2'}}]}}),
+        ])
+        self.tribunal = Tribunal.objects.create(
+            nome='Tribunal Stub', sigla='STUB', tipo='trabalho', api_endpoint=self.stub.endpoint,
+        )
+
+    def tearDown(self):
+        fechar_sessoes()
+        self.stub.encerrar()
+
+    def test_retentativa_conexao_reaproveitada_e_metricas(self):
+        servico = DataJudService(self.tribunal)
+        self.assertEqual(servico.consultar_processo('1'), {'numeroProcesso': '1'})
+        self.assertEqual(servico.consultar_processo('2'), {'numeroProcesso': '2'})
+
+        self.assertEqual(len(self.stub.requisicoes), 3)
+        self.assertEqual(len({r['porta_cliente'] for r in self.stub.requisicoes}), 1)
+        self.assertIn('gzip', self.stub.requisicoes[0]['headers']['Accept-Encoding'])
+        metricas = metricas_datajud()['STUB']
+        self.assertEqual(metricas['chamadas'], 2)
+        self.assertEqual(metricas['por_status'], {200: 2})
+
+
+@override_settings(DATAJUD_BACKOFF_SEGUNDOS=0, DATAJUD_BACKOFF_JITTER_SEGUNDOS=0)
+class CacheDataJudTest(TestCase):
+    def setUp(self):
+        fechar_sessoes()
+        cache.clear()
+        cache_datajud.limpar_local()
+        self.stub = StubHttp([
+            (200, {'hits': {'hits': []}}),
+            (200, {'hits': {'hits': [{'_source': {'numeroProcesso': '1', 'versao': 1}}]}}),
+            (200, {'hits': {'hits': [{'_source': {'numeroProcesso': '1', 'versao': 2}}]}}),
+        ])
+        self.tribunal = Tribunal.objects.create(
+            nome='Tribunal Cache', sigla='STUBCACHE', tipo='trabalho', api_endpoint=self.stub.endpoint,
+        )
+
+    def tearDown(self):
+        fechar_sessoes()
+        self.stub.encerrar()
+
+    def test_nao_encontrado_fica_em_cache(self):
+        servico = DataJudService(self.tribunal)
+        self.assertIsNone(servico.consultar_processo('0'))
+        self.assertIsNone(servico.consultar_processo('0'))
+        self.assertEqual(len(self.stub.requisicoes), 1)
+
+    def test_nivel_compartilhado_atende_outro_worker(self):
+        servico = DataJudService(self.tribunal)
+        servico.consultar_processo('0')
+        cache_datajud.limpar_local()
+        self.assertIsNone(servico.consultar_processo('0'))
+        self.assertEqual(len(self.stub.requisicoes), 1)
+
+    @override_settings(DATAJUD_CACHE_SEGUNDOS=0)
+    def test_entrada_obsoleta_servida_enquanto_revalida(self):
+        self.stub.respostas.pop(0)
+        servico = DataJudService(self.tribunal)
+        self.assertEqual(servico.consultar_processo('1')['versao'], 1)
+
+        self.assertEqual(servico.consultar_processo('1')['versao'], 1)
+        for _ in range(50):
+            entrada = cache_datajud.obter('datajud:STUBCACHE:1')
+            if entrada.dados['versao'] == 2:
+                break
+            time.sleep(0.05)
+        self.assertEqual(entrada.dados['versao'], 2)
+        self.assertEqual(len(self.stub.requisicoes), 2)
+
+
+@override_settings(DATAJUD_BACKOFF_SEGUNDOS=0, DATAJUD_BACKOFF_JITTER_SEGUNDOS=0)
+class ConsultaEmLoteTest(TestCase):
+    def setUp(self):
+        fechar_sessoes()
+        cache.clear()
+        cache_datajud.limpar_local()
+        self.stub = StubHttp([
+            (200, {'hits': {'hits': [
+                {'_source': {'numeroProcesso': '00000010020265020001', 'classe': 'nova'}, 'sort': [1]},
+                {'_source': {'numeroProcesso': '00000020020265020001', 'classe': 'igual'}, 'sort': [2]},
+            ]}}),
+            (200, {'hits': {'hits': []}}),
+        ])
+        self.tribunal = Tribunal.objects.create(
+            nome='Tribunal Stub', sigla='STUBLOTE', tipo='trabalho', api_endpoint=self.stub.endpoint,
+        )
+        adv = Usuario.objects.create_user(username='lote_adv', password='pass', papel='advogado')
+        cliente = Cliente.objects.create(nome='Cliente Lote', tipo='pf', responsavel=adv)
+        tipo = TipoProcesso.objects.create(nome='Trabalhista')
+        self.consultas = []
+        for indice, dados in enumerate([{'classe': 'antiga'}, {'classe': 'igual'}, None], start=1):
+            numero = f'000000{indice}-00.2026.5.02.0001'
+            processo = Processo.objects.create(
+                numero=numero, cliente=cliente, advogado=adv, tipo=tipo, status='em_andamento', objeto='Lote',
+            )
+            if dados is not None:
+                dados = {'numeroProcesso': numero.replace('-', '').replace('.', ''), **dados}
+            self.consultas.append(ConsultaProcesso.objects.create(
+                tribunal=self.tribunal, numero_processo=numero, usuario=adv, processo_vinculado=processo,
+                status='sucesso' if dados else 'erro', dados_processo=dados,
+            ))
+
+    def tearDown(self):
+        fechar_sessoes()
+        self.stub.encerrar()
+
+    def test_terms_paginado_e_novas_consultas_so_quando_muda(self):
+        resumo = atualizar_processos_vinculados(lote_termos=10)
+
+        corpos = [r['corpo'] for r in self.stub.requisicoes]
+        self.assertEqual(len(corpos), 1)
+        self.assertEqual(sorted(corpos[0]['query']['terms']['numeroProcesso']), [
+            '00000010020265020001', '00000020020265020001', '00000030020265020001',
+        ])
+        self.assertEqual(resumo['atualizadas'], 1)
+        self.assertEqual(resumo['sem_alteracao'], 2)
+        self.assertEqual(resumo['nao_encontradas'], 1)
+        nova = ConsultaProcesso.objects.order_by('-id').first()
+        self.assertEqual(nova.processo_vinculado_id, self.consultas[0].processo_vinculado_id)
+        self.assertEqual(nova.dados_processo['classe'], 'nova')
+        self.assertEqual(
+            cache_datajud.obter(f'datajud:STUBLOTE:{self.consultas[0].numero_processo}').dados['classe'], 'nova',
+        )
+        self.assertIsNone(cache_datajud.obter(f'datajud:STUBLOTE:{self.consultas[2].numero_processo}').dados)
+
+    def test_search_after_segue_paginas_cheias(self):
+        resultado = DataJudService(self.tribunal).consultar_processos(
+            [c.numero_processo for c in self.consultas], usar_cache=False, tamanho_pagina=2,
+        )
+
+        corpos = [r['corpo'] for r in self.stub.requisicoes]
+        self.assertEqual(len(corpos), 2)
+        self.assertNotIn('search_after', corpos[0])
+        self.assertEqual(corpos[0]['sort'], [{'@timestamp': {'order': 'desc'}}, {'_id': {'order': 'asc'}}])
+        self.assertEqual(corpos[1]['search_after'], [2])
+        self.assertIsNone(resultado[self.consultas[2].numero_processo])
+
+    def test_documento_mais_recente_de_cada_numero(self):
+        self.stub.respostas = [(200, {'hits': {'hits': [
+            {'_source': {'numeroProcesso': '00000010020265020001', 'classe': 'recente'}, 'sort': [20, 'b']},
+            {'_source': {'numeroProcesso': '00000010020265020001', 'classe': 'antiga'}, 'sort': [10, 'a']},
+        ]}})]
+        resultado = DataJudService(self.tribunal).consultar_processos([self.consultas[0].numero_processo], usar_cache=False)
+        self.assertEqual(resultado[self.consultas[0].numero_processo]['classe'], 'recente')
+
+
+class ImportacaoMovimentosTest(TestCase):
+    def setUp(self):
+        adv = Usuario.objects.create_user(username='movimentos_adv', password='pass', papel='advogado')
+        cliente = Cliente.objects.create(nome='Cliente Movimentos', tipo='pf', responsavel=adv)
+        self.processo = Processo.objects.create(
+            numero='0000009-00.2026.5.02.0001', cliente=cliente, advogado=adv,
+            tipo=TipoProcesso.objects.create(nome='Trabalhista'), status='em_andamento', objeto='Movimentos',
+        )
+        self.tribunal = Tribunal.objects.create(
+            nome='Tribunal Movimentos', sigla='TMOV', tipo='trabalho', api_endpoint='http://127.0.0.1:9/_search',
+        )
+
+    def consultar(self, movimentos):
+        return ConsultaProcesso.objects.create(
+            tribunal=self.tribunal, numero_processo=self.processo.numero, processo_vinculado=self.processo,
+            status='sucesso', dados_processo={'numeroProcesso': '00000090020265020001', 'movimentos': movimentos},
+        )
+
+    def test_importa_apenas_movimentos_apos_marca_dagua(self):
+        movimentos = [
+            {'codigo': 26, 'nome': 'Distribuído por sorteio', 'dataHora': '2026-01-10T10:00:00.000Z'},
+            {'codigo': 51, 'nome': 'Conclusos para despacho', 'dataHora': '2026-02-01T09:00:00.000Z'},
+        ]
+        self.consultar(movimentos)
+        # Processo visto pela primeira vez: só posiciona a marca d'água.
+        self.assertEqual(importar_movimentos()['movimentacoes'], 0)
+        self.assertEqual(importar_movimentos()['movimentacoes'], 0)
+
+        self.consultar(movimentos + [
+            {'codigo': 60, 'nome': 'Expedição de documento', 'dataHora': '2026-02-01T09:00:00.000Z'},
+            {
+                'codigo': 219,
+                'nome': 'Julgado procedente o pedido',
+                'dataHora': '2026-03-05T15:30:00.000Z',
+                'complementosTabelados': [{'nome': 'tipo', 'descricao': 'sentença'}],
+            },
+        ])
+        resumo = importar_movimentos()
+
+        self.assertEqual(resumo['movimentacoes'], 2)
+        self.assertEqual(Movimentacao.objects.filter(processo=self.processo).count(), 2)
+        sentenca = Movimentacao.objects.get(titulo='Julgado procedente o pedido')
+        self.assertEqual(sentenca.resultado, 'favoravel')
+        self.assertIn('tipo: sentença', sentenca.descricao)
+        self.processo.refresh_from_db()
+        self.assertEqual(self.processo.resultado, 'favoravel')
+        marca = MonitoramentoProcesso.objects.get(processo=self.processo)
+        self.assertEqual(marca.codigos_ultimo_movimento, [219])
+        self.assertEqual(marca.movimentos_importados, 2)
+
+    def test_historico_importado_quando_pedido(self):
+        self.consultar([
+            {'codigo': 26, 'nome': 'Distribuído por sorteio', 'dataHora': '2026-01-10T10:00:00.000Z'},
+            {'codigo': 51, 'nome': 'Conclusos para despacho', 'dataHora': '2026-02-01T09:00:00.000Z'},
+        ])
+        self.assertEqual(importar_movimentos(importar_historico=True)['movimentacoes'], 2)
+        self.assertEqual(importar_movimentos(importar_historico=True)['movimentacoes'], 0)
+
+
+@override_settings(
+    DATAJUD_BACKOFF_SEGUNDOS=0,
+    DATAJUD_BACKOFF_JITTER_SEGUNDOS=0,
+    DATAJUD_MAX_TENTATIVAS=0,
+    DATAJUD_BUSCA_MULTIPLA_TIMEOUT_SEGUNDOS=1,
+)
+class BuscaMultiplaTribunaisApiTest(APITestCase):
+    def setUp(self):
+        fechar_sessoes()
+        adv = Usuario.objects.create_user(username='busca_adv', password='pass', papel='advogado')
+        self.client.force_authenticate(user=adv)
+        self.stubs = [
+            StubHttp([(200, {'hits': {'hits': [
+                {'_source': {'numeroProcesso': '1', 'dataAjuizamento': '20240105000000'}},
+                {'_source': {'numeroProcesso': '2', 'dataAjuizamento': '20230101000000'}},
+            ]}})]),
+            StubHttp([(200, {'hits': {'hits': [
+                {'_source': {'numeroProcesso': '2', 'dataAjuizamento': '2023-01-01T00:00:00.000Z'}},
+                {'_source': {'numeroProcesso': '3', 'dataAjuizamento': '2024-06-30T00:00:00.000Z'}},
+            ]}})]),
+            StubHttp([], atraso=3),
+        ]
+        self.tribunais = [
+            Tribunal.objects.create(nome=f'Tribunal {i}', sigla=f'BUSCA{i}', tipo='trabalho', api_endpoint=stub.endpoint)
+            for i, stub in enumerate(self.stubs)
+        ]
+
+    def tearDown(self):
+        fechar_sessoes()
+        for stub in self.stubs:
+            stub.encerrar()
+
+    def test_busca_concorrente_une_ordena_e_devolve_parcial(self):
+        inicio = time.monotonic()
+        response = self.client.post(
+            reverse('consulta-processo-buscar-avancado'),
+            {'tribunal_ids': [t.id for t in self.tribunais], 'classe': 'Reclamação Trabalhista'},
+            format='json',
+        )
+        self.assertLess(time.monotonic() - inicio, 2.5)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([p['numeroProcesso'] for p in response.data['processos']], ['3', '1', '2'])
+        self.assertTrue(response.data['parcial'])
+        self.assertEqual(
+            {t['sigla']: t['status'] for t in response.data['tribunais']},
+            {'BUSCA0': 'ok', 'BUSCA1': 'ok', 'BUSCA2': 'tempo_esgotado'},
+        )
+
+    @override_settings(DATAJUD_MAX_TENTATIVAS=3)
+    def test_busca_multipla_nao_repete_tribunal_com_erro(self):
+        self.stubs[0].respostas = [(503, {'error': 'indisponível'}), (200, {'hits': {'hits': []}})]
+        response = self.client.post(
+            reverse('consulta-processo-buscar-avancado'),
+            {'tribunal_ids': [t.id for t in self.tribunais[:2]], 'classe': 'Reclamação Trabalhista'},
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {t['sigla']: t['status'] for t in response.data['tribunais']},
+            {'BUSCA0': 'erro', 'BUSCA1': 'ok'},
+        )
+        self.assertEqual(len(self.stubs[0].requisicoes), 1)
+
+    def test_tribunal_ids_invalido(self):
+        response = self.client.post(
+            reverse('consulta-processo-buscar-avancado'), {'tribunal_ids': 'todos'}, format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+
+class CacheRespostasIATest(TestCase):
+    def setUp(self):
+        cache.clear()
+        cache_ia.limpar_local()
+        self.stub = StubHttp([(200, completion_groq(t)) for t in ('primeira', 'segunda', 'curta')])
+        groq = groq_local(self.stub)
+        groq.__enter__()
+        self.addCleanup(groq.__exit__, None, None, None)
+        self.addCleanup(self.stub.encerrar)
+
+    def test_prompt_repetido_usa_cache_e_sem_cache_renova(self):
+        mensagens = [{'role': 'user', 'content': 'Revise o texto:\n  Pede  deferimento. '}]
+        parecidas = [{'role': 'user', 'content': 'Revise o texto:\nPede deferimento.'}]
+
+        self.assertEqual(GroqService('chave-teste').completar(mensagens), 'primeira')
+        self.assertEqual(GroqService('chave-teste').completar(parecidas), 'primeira')
+        cache_ia.limpar_local()
+        self.assertEqual(GroqService('chave-teste').completar(mensagens), 'primeira')
+        self.assertEqual(len(self.stub.requisicoes), 1)
+
+        self.assertEqual(GroqService('chave-teste').completar(mensagens, usar_cache=False), 'segunda')
+        self.assertEqual(GroqService('chave-teste').completar(mensagens), 'segunda')
+        self.assertEqual(GroqService('chave-teste').completar(mensagens, max_tokens=50), 'curta')
+        self.assertEqual(len(self.stub.requisicoes), 3)
+
+        metricas = cache_ia.metricas_cache_ia()
+        self.assertEqual(metricas['acertos_compartilhado'], 1)
+        self.assertEqual(metricas['acertos_local'], 1)
+        self.assertEqual(metricas['ignoradas'], 1)
+
+
+@override_settings(CONSULTA_IA_CONTEXTO_TOKENS=300, CONSULTA_IA_HISTORICO_TOKENS=60, CONSULTA_IA_MOVIMENTOS_RECENTES=50)
+class ContextoPerguntaIATest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        cache_ia.limpar_local()
+        self.adv = Usuario.objects.create_user(username='contexto_adv', password='pass', papel='advogado')
+        tribunal = Tribunal.objects.create(
+            nome='Tribunal Contexto', sigla='STUBCTX', tipo='estadual', api_endpoint='http://127.0.0.1:9/_search',
+        )
+        movimentos = [
+            {'codigo': 85 if dia % 2 else 60, 'nome': 'Petição' if dia % 2 else 'Expedição de documento',
+             'dataHora': f'2025-{1 + dia // 28:02d}-{1 + dia % 28:02d}T10:00:00.000Z'}
+            for dia in range(300)
+        ]
+        movimentos.append({'codigo': 193, 'nome': 'Julgamento', 'dataHora': '2026-03-05T15:30:00.000Z',
+                           'complementosTabelados': [{'nome': 'tipo', 'descricao': 'procedência'}]})
+        self.consulta = ConsultaProcesso.objects.create(
+            tribunal=tribunal, numero_processo='00000010020265020001', usuario=self.adv, status='sucesso',
+            dados_processo={'numeroProcesso': '00000010020265020001', 'classe': {'nome': 'Procedimento Comum'},
+                            'assuntos': [{'nome': 'Indenização'}], 'movimentos': movimentos},
+        )
+        self.stub = StubHttp([(200, completion_groq('Resposta longa ' * 40)), (200, completion_groq('Sim.'))])
+        groq = groq_local(self.stub)
+        groq.__enter__()
+        self.addCleanup(groq.__exit__, None, None, None)
+        self.addCleanup(self.stub.encerrar)
+        self.client.force_authenticate(user=self.adv)
+
+    def test_pergunta_usa_resumo_dentro_do_orcamento(self):
+        url = reverse('consulta-processo-fazer-pergunta', args=[self.consulta.id])
+        self.assertEqual(self.client.post(url, {'pergunta': 'Houve sentença?'}, format='json').status_code, 201)
+        self.assertEqual(self.client.post(url, {'pergunta': 'Cabe recurso?'}, format='json').status_code, 201)
+
+        primeira, segunda = (r['corpo']['messages'] for r in self.stub.requisicoes)
+        contexto = primeira[1]['content']
+        self.assertLessEqual(contexto_ia.estimar_tokens(contexto), 300 + 10)  # + 'DADOS DO PROCESSO:'
+        self.assertIn('2026-03-05 [193] Julgamento (procedência)', contexto)
+        self.assertIn('Total de movimentações: 301', contexto)
+        self.assertIn('[85] Petição: 150x', contexto)
+        self.assertNotIn('2025-01-01', contexto)
+        self.assertIn('movimentações recentes omitidas', contexto)
+
+        self.assertEqual(segunda[1]['content'], contexto)
+        self.assertEqual(segunda[2]['content'], 'Houve sentença?')
+        self.assertLessEqual(contexto_ia.estimar_tokens(segunda[3]['content']), 60)
+        self.assertEqual(segunda[-1]['content'], 'Cabe recurso?')
+
+
+class LimiteGroqTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        limite_groq.limpar()
+
+    def aguardar_fila(self, tamanho):
+        prazo = time.monotonic() + 5
+        while limite_groq.metricas_limite_groq()['na_fila'] < tamanho and time.monotonic() < prazo:
+            time.sleep(0.01)
+
+    @override_settings(GROQ_REQUISICOES_POR_MINUTO=0, GROQ_MAX_SIMULTANEAS=1, GROQ_ESPERA_MAXIMA_SEGUNDOS=0.1)
+    def test_interativa_passa_a_frente_do_lote_e_espera_tem_limite(self):
+        ordem = []
+
+        def chamar(prioridade):
+            with limite_groq.reservar(prioridade):
+                ordem.append(prioridade)
+
+        with limite_groq.reservar():
+            with self.assertRaises(limite_groq.LimiteGroqExcedido):
+                with limite_groq.reservar():
+                    pass
+            with override_settings(GROQ_ESPERA_MAXIMA_SEGUNDOS=5):
+                lote = threading.Thread(target=chamar, args=(limite_groq.LOTE,))
+                lote.start()
+                self.aguardar_fila(1)
+                interativa = threading.Thread(target=chamar, args=(limite_groq.INTERATIVA,))
+                interativa.start()
+                self.aguardar_fila(2)
+        lote.join(5)
+        interativa.join(5)
+
+        self.assertEqual(ordem, [limite_groq.INTERATIVA, limite_groq.LOTE])
+        metricas = limite_groq.metricas_limite_groq()
+        self.assertEqual(metricas['recusadas'], 1)
+        self.assertEqual(metricas['chamadas'], 3)
+        self.assertEqual(metricas['em_lote'], 1)
+        self.assertEqual(metricas['em_andamento'], 0)
+
+    @override_settings(GROQ_REQUISICOES_POR_MINUTO=600, GROQ_RAJADA=1, GROQ_ESPERA_MAXIMA_SEGUNDOS=0.5)
+    def test_balde_local_e_janela_compartilhada(self):
+        for _ in range(2):
+            with limite_groq.reservar():
+                pass
+        # Uma ficha a cada 0,1 s: a segunda chamada esperou a reposição.
+        self.assertGreaterEqual(limite_groq.metricas_limite_groq()['espera_maxima_ms'], 50)
+
+        # Outros workers já gastaram a janela deste minuto (e a do próximo).
+        janela = int(time.time() // 60)
+        cache.set_many({f'{limite_groq.PREFIXO}{janela}': 600, f'{limite_groq.PREFIXO}{janela + 1}': 600})
+        with self.assertRaises(limite_groq.LimiteGroqExcedido):
+            with limite_groq.reservar():
+                pass
+        metricas = limite_groq.metricas_limite_groq()
+        self.assertGreaterEqual(metricas['limitadas_compartilhado'], 1)
+        self.assertEqual(metricas['em_andamento'], 0)
+        # A tentativa recusada não gastou a janela dos outros workers.
+        self.assertEqual(cache.get(f'{limite_groq.PREFIXO}{janela}'), 600)
+
+    @override_settings(GROQ_REQUISICOES_POR_MINUTO=0, GROQ_MAX_SIMULTANEAS=1)
+    def test_fluxo_devolve_a_vaga_sem_esperar_o_cliente(self):
+        stub = StubHttp([(200, completion_groq_em_fluxo('Primeiro ', 'segundo ', 'terceiro'))])
+        self.addCleanup(stub.encerrar)
+        with groq_local(stub):
+            trechos = GroqService().completar_em_fluxo([{'role': 'user', 'content': 'Oi'}], usar_cache=False)
+            self.assertEqual(next(trechos), 'Primeiro ')
+            prazo = time.monotonic() + 5
+            while limite_groq.metricas_limite_groq()['em_andamento'] and time.monotonic() < prazo:
+                time.sleep(0.01)
+            # O cliente ainda não leu o resto, mas a vaga já está livre.
+            self.assertEqual(limite_groq.metricas_limite_groq()['em_andamento'], 0)
+            with limite_groq.reservar():
+                pass
+            self.assertEqual(list(trechos), ['segundo ', 'terceiro'])
+
+
+class AnaliseMemorizadaTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        cache_ia.limpar_local()
+        self.adv = Usuario.objects.create_user(username='analise_adv', password='pass', papel='advogado')
+        self.tribunal = Tribunal.objects.create(
+            nome='Tribunal Análise', sigla='STUBANL', tipo='estadual', api_endpoint='http://127.0.0.1:9/_search',
+        )
+        self.movimentos = [
+            {'codigo': 26, 'nome': 'Distribuído por sorteio', 'dataHora': '2026-01-10T10:00:00.000Z'},
+            {'codigo': 51, 'nome': 'Conclusos para despacho', 'dataHora': '2026-02-01T09:00:00.000Z'},
+        ]
+        self.stub = StubHttp([(200, completion_groq(t)) for t in ('análise 1', 'análise 2', 'análise 3')])
+        groq = groq_local(self.stub)
+        groq.__enter__()
+        self.addCleanup(groq.__exit__, None, None, None)
+        self.addCleanup(self.stub.encerrar)
+        self.client.force_authenticate(user=self.adv)
+
+    def consulta(self, movimentos, timestamp):
+        return ConsultaProcesso.objects.create(
+            tribunal=self.tribunal, numero_processo='00000020020265020001', usuario=self.adv, status='processando',
+            dados_processo={'numeroProcesso': '00000020020265020001', '@timestamp': timestamp, 'movimentos': movimentos},
+        )
+
+    def test_analise_reaproveitada_enquanto_os_dados_nao_mudam(self):
+        primeira = self.consulta(self.movimentos, '2026-02-02T00:00:00Z')
+        url = reverse('consulta-processo-reanalisar', args=[primeira.id])
+        self.assertEqual(self.client.post(url).data['analise_ia'], 'análise 1')
+        self.assertEqual(self.client.post(url).data['analise_ia'], 'análise 1')
+        self.assertEqual(len(self.stub.requisicoes), 1)
+
+        # Outra consulta do mesmo número, reindexada e com movimentos em outra ordem.
+        segunda = self.consulta(self.movimentos[::-1], '2026-03-01T00:00:00Z')
+        analisar_consulta.run(segunda.id)
+        segunda.refresh_from_db()
+        self.assertEqual(segunda.status, 'sucesso')
+        self.assertEqual(segunda.analise_ia, 'análise 1')
+        self.assertEqual(segunda.analise_hash, ConsultaProcesso.objects.get(pk=primeira.id).analise_hash)
+        self.assertEqual(len(self.stub.requisicoes), 1)
+
+        forcada = self.client.post(reverse('consulta-processo-reanalisar', args=[segunda.id]), {'sem_cache': True})
+        self.assertEqual(forcada.data['analise_ia'], 'análise 2')
+
+        novo_movimento = {'codigo': 193, 'nome': 'Julgamento', 'dataHora': '2026-03-05T15:30:00.000Z'}
+        terceira = self.consulta(self.movimentos + [novo_movimento], '2026-03-06T00:00:00Z')
+        analisar_consulta.run(terceira.id)
+        terceira.refresh_from_db()
+        self.assertEqual(terceira.analise_ia, 'análise 3')
+        self.assertEqual(len(self.stub.requisicoes), 3)
+
+
+@override_settings(DATAJUD_BACKOFF_SEGUNDOS=0, DATAJUD_BACKOFF_JITTER_SEGUNDOS=0)
+class ConsultaAssincronaApiTest(APITestCase):
+    def setUp(self):
+        fechar_sessoes()
+        cache.clear()
+        cache_datajud.limpar_local()
+        self.adv = Usuario.objects.create_user(username='consulta_adv', password='pass', papel='advogado')
+        # Porta fechada: a chamada ao DataJud falha de imediato.
+        self.tribunal = Tribunal.objects.create(
+            nome='Tribunal de Teste',
+            sigla='TST1',
+            tipo='trabalho',
+            api_endpoint='http://127.0.0.1:9/api_publica_teste/_search',
+        )
+        self.client.force_authenticate(user=self.adv)
+
+    @override_settings(CONSULTA_TRIBUNAIS_USE_CELERY=True)
+    def test_consultar_responde_202_e_situacao_informa_resultado(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.client.post(
+                reverse('consulta-processo-consultar'),
+                {'tribunal_id': self.tribunal.id, 'numero_processo': '00000000020265020001'},
+                format='json',
+            )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], 'pendente')
+        self.assertFalse(response.data['concluida'])
+        self.assertEqual(len(callbacks), 1)
+        consulta_id = response.data['id']
+
+        # O que o worker do Celery faria ao receber a task.
+        processar_consulta.run(consulta_id, analisar_com_ia=True)
+        consulta = ConsultaProcesso.objects.get(pk=consulta_id)
+        self.assertEqual(consulta.status, 'erro')
+
+        response = self.client.get(reverse('consulta-processo-situacao', args=[consulta_id]), {'aguardar': 5})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['concluida'])
+        self.assertEqual(response.data['consulta']['erro_mensagem'], 'Falha interna ao consultar tribunal.')
+
+    @override_settings(CONSULTA_TRIBUNAIS_USE_CELERY=False)
+    def test_consultar_sem_celery_roda_na_requisicao(self):
+        response = self.client.post(
+            reverse('consulta-processo-consultar'),
+            {'tribunal_id': self.tribunal.id, 'numero_processo': '00000000020265020001'},
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertEqual(ConsultaProcesso.objects.get().status, 'erro')
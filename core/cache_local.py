@@ -0,0 +1,61 @@
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+_instancias = weakref.WeakSet()
+
+
+class CacheLocalLRU:
+    """
+    Cache em memória do processo, limitado em itens (descarta o usado há
+    mais tempo) e com validade por item. Serve de nível local na frente do
+    cache compartilhado do Django.
+    """
+
+    def __init__(self):
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+        _instancias.add(self)
+
+    def obter(self, chave):
+        with self._trava:
+            item = self._itens.get(chave)
+            if item is None:
+                return None
+            valor, expira_em = item
+            if time.time() >= expira_em:
+                del self._itens[chave]
+                return None
+            self._itens.move_to_end(chave)
+            return valor
+
+    def guardar(self, chave, valor, expira_em, limite):
+        if limite <= 0 or expira_em <= time.time():
+            return
+        with self._trava:
+            self._itens[chave] = (valor, expira_em)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > limite:
+                self._itens.popitem(last=False)
+
+    def limpar(self):
+        with self._trava:
+            self._itens.clear()
+
+    def __len__(self):
+        return len(self._itens)
+
+    def _reiniciar(self):
+        self._trava = threading.Lock()
+        self._itens.clear()
+
+
+def _reiniciar_apos_fork():
+    for cache in list(_instancias):
+        cache._reiniciar()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reiniciar_apos_fork)
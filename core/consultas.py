@@ -0,0 +1,27 @@
+class PlanoConsultaMixin:
+    """
+    Plano de consulta declarativo por action de um viewset.
+
+    `planos_consulta` mapeia o nome da action para um dict com as chaves
+    opcionais `select_related`, `prefetch_related` e `only`. A chave `'*'`
+    vale para as actions sem plano próprio.
+    """
+
+    planos_consulta = {}
+
+    def plano_consulta(self):
+        planos = self.planos_consulta
+        return planos.get(self.action, planos.get('*', {}))
+
+    def aplicar_plano_consulta(self, queryset):
+        plano = self.plano_consulta()
+        if plano.get('select_related'):
+            queryset = queryset.select_related(*plano['select_related'])
+        if plano.get('prefetch_related'):
+            queryset = queryset.prefetch_related(*plano['prefetch_related'])
+        if plano.get('only'):
+            queryset = queryset.only(*plano['only'])
+        return queryset
+
+    def get_queryset(self):
+        return self.aplicar_plano_consulta(super().get_queryset())
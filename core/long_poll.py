@@ -0,0 +1,36 @@
+"""
+Espera curta (long-poll) pela conclusão de um registro processado em task.
+
+Cada espera ocupa um worker web, por isso só acontece com `?aguardar=<segundos>`
+e fica limitada a LONG_POLL_MAXIMO_SEGUNDOS; sem o parâmetro a resposta é imediata.
+"""
+import time
+
+from django.conf import settings
+
+INTERVALO_SEGUNDOS = 0.5
+MAXIMO_PADRAO_SEGUNDOS = 5
+
+
+def segundos_aguardar(request):
+    """`?aguardar=` limitado a [0, LONG_POLL_MAXIMO_SEGUNDOS]."""
+    try:
+        aguardar = float(request.query_params.get('aguardar', 0))
+    except (TypeError, ValueError):
+        return 0
+    return max(0, min(aguardar, getattr(settings, 'LONG_POLL_MAXIMO_SEGUNDOS', MAXIMO_PADRAO_SEGUNDOS)))
+
+
+def aguardar_conclusao(instancia, concluida, segundos, campos=('status',)):
+    """
+    Relê `campos` da instância até `concluida(instancia)` ou o prazo acabar.
+    Retorna se concluiu; nesse caso a instância é relida por inteiro.
+    """
+    prazo = time.monotonic() + segundos
+    while not concluida(instancia) and time.monotonic() < prazo:
+        time.sleep(INTERVALO_SEGUNDOS)
+        instancia.refresh_from_db(fields=list(campos))
+    if not concluida(instancia):
+        return False
+    instancia.refresh_from_db()
+    return True
@@ -0,0 +1,165 @@
+import binascii
+import json
+from base64 import b64decode, b64encode
+from datetime import date, time
+from decimal import Decimal
+from uuid import UUID
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def cursor_solicitado(request):
+    """Indica se o cliente pediu paginação por cursor (`?paginacao=cursor` ou `?cursor=`)."""
+    return (
+        request.query_params.get(PaginacaoPadrao.modo_query_param) == 'cursor'
+        or CursorPagination.cursor_query_param in request.query_params
+    )
+
+
+def _valor_cursor(valor):
+    # isoformat completo: o DjangoJSONEncoder corta os microssegundos, e a
+    # chave do cursor precisa ser exata.
+    if isinstance(valor, (date, time)):
+        return valor.isoformat()
+    if isinstance(valor, (Decimal, UUID)):
+        return str(valor)
+    return valor
+
+
+def _filtro_apos(campos, posicao):
+    """
+    Q das linhas posteriores a `posicao` na ordenação `campos` ([(campo,
+    decrescente)]): (a > x) OU (a = x E b > y) OU ...
+    """
+    filtro = Q()
+    iguais = {}
+    for (campo, decrescente), valor in zip(campos, posicao):
+        filtro |= Q(**iguais, **{f"{campo}__{'lt' if decrescente else 'gt'}": valor})
+        iguais[campo] = valor
+    return filtro
+
+
+class CursorPorOrdenacao(CursorPagination):
+    """
+    Paginação por chave (keyset) na ordenação informada, sem COUNT nem
+    OFFSET. O cursor guarda o valor de todos os campos da ordenação na borda
+    da página, e a página seguinte é filtrada pela chave composta; por isso a
+    ordenação deve terminar num campo único (normalmente `id`).
+    """
+
+    def __init__(self, ordenacao):
+        self.ordering = tuple(ordenacao)
+        self.campos = [(campo.lstrip('-'), campo.startswith('-')) for campo in self.ordering]
+
+    def get_ordering(self, request, queryset, view):
+        # A ordenação do cursor é fixa: `?ordering=` mudaria o significado
+        # dos cursores já emitidos.
+        return self.ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        posicao, self.reverso = self._ler_cursor(request)
+
+        campos = [(campo, not decrescente) for campo, decrescente in self.campos] if self.reverso else self.campos
+        queryset = queryset.order_by(*[('-' if decrescente else '') + campo for campo, decrescente in campos])
+        if posicao is not None:
+            queryset = queryset.filter(_filtro_apos(campos, posicao))
+
+        itens = list(queryset[:self.page_size + 1])
+        mais = len(itens) > self.page_size
+        self.page = itens[:self.page_size]
+        if self.reverso:
+            self.page.reverse()
+            self.has_next, self.has_previous = posicao is not None, mais
+        else:
+            self.has_next, self.has_previous = mais, posicao is not None
+        return self.page
+
+    def _ler_cursor(self, request):
+        valor = request.query_params.get(self.cursor_query_param)
+        if not valor:
+            return None, False
+        try:
+            dados = json.loads(b64decode(valor.encode('ascii'), altchars=b'-_').decode('utf-8'))
+            posicao = dados['p']
+            if not isinstance(posicao, list) or len(posicao) != len(self.campos):
+                raise ValueError
+            return posicao, bool(dados.get('r'))
+        except (TypeError, ValueError, KeyError, binascii.Error, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _link(self, item, reverso):
+        posicao = [_valor_cursor(getattr(item, campo)) for campo, _ in self.campos]
+        dados = json.dumps({'p': posicao, 'r': int(reverso)}, separators=(',', ':'))
+        cursor = b64encode(dados.encode('utf-8'), altchars=b'-_').decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.page[-1], reverso=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self._link(self.page[0], reverso=True)
+
+
+class PaginacaoPadrao(PageNumberPagination):
+    """
+    Paginação por número de página, com dois modos opcionais.
+
+    - `?paginacao=cursor` (ou um `?cursor=` já emitido), nas views que
+      declaram `ordenacao_cursor`: páginas buscadas por chave, estáveis
+      mesmo com inserções concorrentes e sem contagem total.
+    - `?total=0`: mantém a paginação por número, mas omite o `count`.
+    """
+
+    modo_query_param = 'paginacao'
+    total_query_param = 'total'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor = None
+        self.sem_total = None
+        if getattr(view, 'ordenacao_cursor', None) and cursor_solicitado(request):
+            self.cursor = CursorPorOrdenacao(view.ordenacao_cursor)
+            return self.cursor.paginate_queryset(queryset, request, view)
+        if request.query_params.get(self.total_query_param) in {'0', 'false'}:
+            return self._paginar_sem_total(queryset, request)
+        return super().paginate_queryset(queryset, request, view)
+
+    def _paginar_sem_total(self, queryset, request):
+        self.request = request
+        try:
+            numero = int(request.query_params.get(self.page_query_param, 1))
+        except (TypeError, ValueError):
+            numero = 0
+        if numero < 1:
+            raise NotFound(self.invalid_page_message)
+        tamanho = self.get_page_size(request)
+        inicio = (numero - 1) * tamanho
+        itens = list(queryset[inicio:inicio + tamanho + 1])
+        self.sem_total = (numero, len(itens) > tamanho)
+        return itens[:tamanho]
+
+    def get_paginated_response(self, data):
+        if self.cursor is not None:
+            return self.cursor.get_paginated_response(data)
+        if self.sem_total is not None:
+            numero, tem_proxima = self.sem_total
+            url = self.request.build_absolute_uri()
+            proxima = replace_query_param(url, self.page_query_param, numero + 1) if tem_proxima else None
+            if numero <= 1:
+                anterior = None
+            elif numero == 2:
+                anterior = remove_query_param(url, self.page_query_param)
+            else:
+                anterior = replace_query_param(url, self.page_query_param, numero - 1)
+            return Response({'next': proxima, 'previous': anterior, 'results': data})
+        return super().get_paginated_response(data)
@@ -0,0 +1,30 @@
+"""
+`shared_task` do Celery, com alternativa síncrona quando o Celery não está
+instalado: `delay`/`apply_async` executam a função na hora e devolvem um
+resultado com `get()`.
+"""
+
+
+class _SyncResult:
+    def __init__(self, value):
+        self.value = value
+
+    def get(self, timeout=None):
+        return self.value
+
+
+try:
+    from celery import shared_task
+except Exception:  # pragma: no cover - fallback quando Celery não está instalado
+    def shared_task(*task_args, **task_kwargs):  # type: ignore
+        def _decorate(func):
+            func.delay = lambda *args, **kwargs: _SyncResult(func(*args, **kwargs))
+            func.apply_async = lambda args=None, kwargs=None, **opts: _SyncResult(
+                func(*(args or ()), **(kwargs or {}))
+            )
+            func.run = func
+            return func
+
+        if task_args and callable(task_args[0]) and len(task_args) == 1 and not task_kwargs:
+            return _decorate(task_args[0])
+        return _decorate
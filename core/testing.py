@@ -0,0 +1,155 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.db import connection
+from django.db.models.signals import post_init
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+
+class MidiaTemporariaTestMixin:
+    """Grava os uploads da classe num MEDIA_ROOT temporário, apagado ao final."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._midia_temporaria = tempfile.mkdtemp(prefix='crm-midia-testes-')
+        cls._midia_settings = override_settings(MEDIA_ROOT=cls._midia_temporaria)
+        cls._midia_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        try:
+            super().tearDownClass()
+        finally:
+            cls._midia_settings.disable()
+            shutil.rmtree(cls._midia_temporaria, ignore_errors=True)
+
+
+class PlanoConsultaTestMixin:
+    """Asserções de quantidade de consultas e de linhas carregadas por action."""
+
+    @contextmanager
+    def assertConsultas(self, consultas, linhas=None):
+        """
+        Falha se o bloco não executar exatamente `consultas` consultas ou, com
+        `linhas={Model: quantidade}`, se instanciar outra quantidade de
+        objetos desses modelos. Devolve o Counter de instâncias por modelo.
+        """
+        instancias = Counter()
+
+        def contar(sender, **kwargs):
+            instancias[sender] += 1
+
+        post_init.connect(contar, weak=False)
+        try:
+            with CaptureQueriesContext(connection) as contexto:
+                yield instancias
+        finally:
+            post_init.disconnect(contar)
+
+        self.assertEqual(
+            len(contexto),
+            consultas,
+            '%d consultas executadas, esperadas %d:\n%s' % (
+                len(contexto),
+                consultas,
+                '\n'.join(q['sql'] for q in contexto.captured_queries),
+            ),
+        )
+        for modelo, quantidade in (linhas or {}).items():
+            self.assertEqual(
+                instancias[modelo],
+                quantidade,
+                f'{instancias[modelo]} linhas de {modelo.__name__} carregadas, esperadas {quantidade}.',
+            )
+
+
+class StubHttp:
+    """
+    Servidor HTTP local para as integrações externas (DataJud, Groq). Cada
+    POST recebe a próxima resposta `(status, dados)` da fila; `dados` em
+    texto é enviado como text/event-stream.
+    """
+
+    def __init__(self, respostas, atraso=0):
+        self.respostas = list(respostas)
+        self.requisicoes = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                corpo = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                time.sleep(atraso)
+                stub.requisicoes.append({'porta_cliente': self.client_address[1], 'corpo': corpo, 'headers': dict(self.headers)})
+                codigo, dados = stub.respostas.pop(0) if stub.respostas else (200, {})
+                if isinstance(dados, str):
+                    tipo, conteudo = 'text/event-stream', dados.encode()
+                else:
+                    tipo, conteudo = 'application/json', json.dumps(dados).encode()
+                self.send_response(codigo)
+                self.send_header('Content-Type', tipo)
+                self.send_header('Content-Length', str(len(conteudo)))
+                self.end_headers()
+                self.wfile.write(conteudo)
+
+            def log_message(self, *args):
+                pass
+
+        self.servidor = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.servidor.server_address[1]}'
+        self.endpoint = f'{self.url}/api_publica_teste/_search'
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+
+    def encerrar(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+
+@contextmanager
+def groq_local(stub):
+    """Aponta o cliente Groq para o stub durante o bloco."""
+    anteriores = {nome: os.environ.get(nome) for nome in ('GROQ_API_KEY', 'GROQ_BASE_URL')}
+    os.environ.update({'GROQ_API_KEY': 'chave-teste', 'GROQ_BASE_URL': stub.url})
+    try:
+        yield stub
+    finally:
+        for nome, valor in anteriores.items():
+            if valor is None:
+                os.environ.pop(nome, None)
+            else:
+                os.environ[nome] = valor
+
+
+def completion_groq(texto):
+    return {
+        'id': 'cmpl-teste',
+        'object': 'chat.completion',
+        'created': 0,
+        'model': 'llama-3.3-70b-versatile',
+        'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': texto}, 'finish_reason': 'stop'}],
+    }
+
+
+def completion_groq_em_fluxo(*partes):
+    """Corpo SSE de uma completion com `stream=True`, uma parte por evento."""
+    eventos = [
+        {
+            'id': 'cmpl-teste',
+            'object': 'chat.completion.chunk',
+            'created': 0,
+            'model': 'llama-3.3-70b-versatile',
+            'choices': [{'index': 0, 'delta': {'content': parte}, 'finish_reason': None}],
+        }
+        for parte in partes
+    ]
+    return ''.join(f'data: {json.dumps(evento)}\n\n' for evento in eventos) + 'data: [DONE]\n\n'
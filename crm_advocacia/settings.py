@@ -184,6 +184,24 @@ else:
         }
     }
 
+# Cache compartilhado entre workers (Redis); sem CACHE_REDIS_URL cada processo
+# usa o próprio LocMem.
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', '').strip()
+if CACHE_REDIS_URL and not TESTING:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+            'KEY_PREFIX': os.environ.get('CACHE_KEY_PREFIX', 'crm'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -226,7 +244,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'core.paginacao.PaginacaoPadrao',
     'PAGE_SIZE': 20,
     'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
@@ -284,14 +302,61 @@ ALLOWED_UPLOAD_MIME_TYPES = [
     if mime.strip()
 ]
 
+# auto: tsvector/GIN no PostgreSQL e BM25 sobre índice invertido nos demais bancos.
+JURISPRUDENCIA_BUSCA_BACKEND = os.environ.get('JURISPRUDENCIA_BUSCA_BACKEND', 'auto')
+
 IA_USE_CELERY = _env_bool('IA_USE_CELERY', False)
-IA_CELERY_RESULT_TIMEOUT = int(os.environ.get('IA_CELERY_RESULT_TIMEOUT', '20'))
+IA_TAREFAS_VALIDADE_SEGUNDOS = int(os.environ.get('IA_TAREFAS_VALIDADE_SEGUNDOS', '600'))
+IA_CACHE_ATIVO = _env_bool('IA_CACHE_ATIVO', True)
+IA_CACHE_ALIAS = os.environ.get('IA_CACHE_ALIAS', 'default')
+IA_CACHE_SEGUNDOS = int(os.environ.get('IA_CACHE_SEGUNDOS', str(7 * 24 * 60 * 60)))
+IA_CACHE_LOCAL_ITENS = int(os.environ.get('IA_CACHE_LOCAL_ITENS', '256'))
+# Limite de chamadas ao Groq (ver consulta_tribunais/services/limite_groq.py); 0 desliga o limite por minuto.
+GROQ_REQUISICOES_POR_MINUTO = int(os.environ.get('GROQ_REQUISICOES_POR_MINUTO', '0' if TESTING else '30'))
+GROQ_RAJADA = int(os.environ.get('GROQ_RAJADA', '5'))
+GROQ_MAX_SIMULTANEAS = int(os.environ.get('GROQ_MAX_SIMULTANEAS', '4'))
+GROQ_ESPERA_MAXIMA_SEGUNDOS = float(os.environ.get('GROQ_ESPERA_MAXIMA_SEGUNDOS', '30'))
+GROQ_ESPERA_LOTE_SEGUNDOS = float(os.environ.get('GROQ_ESPERA_LOTE_SEGUNDOS', '300'))
+GROQ_LIMITE_CACHE_ALIAS = os.environ.get('GROQ_LIMITE_CACHE_ALIAS', 'default')
+CONSULTA_IA_CONTEXTO_TOKENS = int(os.environ.get('CONSULTA_IA_CONTEXTO_TOKENS', '1500'))
+CONSULTA_IA_HISTORICO_TOKENS = int(os.environ.get('CONSULTA_IA_HISTORICO_TOKENS', '600'))
+CONSULTA_IA_MOVIMENTOS_RECENTES = int(os.environ.get('CONSULTA_IA_MOVIMENTOS_RECENTES', '20'))
+CONSULTA_TRIBUNAIS_USE_CELERY = _env_bool('CONSULTA_TRIBUNAIS_USE_CELERY', IA_USE_CELERY)
+CONSULTA_TRIBUNAIS_IMPORTAR_HISTORICO = _env_bool('CONSULTA_TRIBUNAIS_IMPORTAR_HISTORICO', False)
+# Espera máxima de `?aguardar=` nos endpoints de situação (core/long_poll.py); cada espera ocupa um worker web.
+LONG_POLL_MAXIMO_SEGUNDOS = float(os.environ.get('LONG_POLL_MAXIMO_SEGUNDOS', '5'))
+DATAJUD_POOL_CONEXOES = int(os.environ.get('DATAJUD_POOL_CONEXOES', '10'))
+DATAJUD_MAX_TENTATIVAS = int(os.environ.get('DATAJUD_MAX_TENTATIVAS', '3'))
+DATAJUD_BACKOFF_SEGUNDOS = float(os.environ.get('DATAJUD_BACKOFF_SEGUNDOS', '0.5'))
+DATAJUD_BACKOFF_JITTER_SEGUNDOS = float(os.environ.get('DATAJUD_BACKOFF_JITTER_SEGUNDOS', '0.25'))
+DATAJUD_TIMEOUT_CONEXAO = float(os.environ.get('DATAJUD_TIMEOUT_CONEXAO', '5'))
+DATAJUD_TIMEOUT_LEITURA = float(os.environ.get('DATAJUD_TIMEOUT_LEITURA', '30'))
+DATAJUD_LOTE_TERMOS = int(os.environ.get('DATAJUD_LOTE_TERMOS', '500'))
+DATAJUD_TAMANHO_PAGINA = int(os.environ.get('DATAJUD_TAMANHO_PAGINA', '100'))
+DATAJUD_BUSCA_MULTIPLA_TIMEOUT_SEGUNDOS = float(os.environ.get('DATAJUD_BUSCA_MULTIPLA_TIMEOUT_SEGUNDOS', '10'))
+DATAJUD_BUSCA_MULTIPLA_THREADS = int(os.environ.get('DATAJUD_BUSCA_MULTIPLA_THREADS', '8'))
+DATAJUD_CACHE_ALIAS = os.environ.get('DATAJUD_CACHE_ALIAS', 'default')
+DATAJUD_CACHE_SEGUNDOS = int(os.environ.get('DATAJUD_CACHE_SEGUNDOS', str(24 * 60 * 60)))
+DATAJUD_CACHE_OBSOLETO_SEGUNDOS = int(os.environ.get('DATAJUD_CACHE_OBSOLETO_SEGUNDOS', str(6 * 24 * 60 * 60)))
+DATAJUD_CACHE_NEGATIVO_SEGUNDOS = int(os.environ.get('DATAJUD_CACHE_NEGATIVO_SEGUNDOS', '900'))
+DATAJUD_CACHE_LOCAL_ITENS = int(os.environ.get('DATAJUD_CACHE_LOCAL_ITENS', '1024'))
+DATAJUD_CACHE_LOCAL_SEGUNDOS = int(os.environ.get('DATAJUD_CACHE_LOCAL_SEGUNDOS', '60'))
 CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://127.0.0.1:6379/0')
 CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', CELERY_BROKER_URL)
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    'ia-recalcular-riscos-carteira': {
+        'task': 'ia_preditiva.recalcular_riscos_carteira',
+        'schedule': float(os.environ.get('IA_RECALCULO_RISCOS_INTERVALO_SEGUNDOS', str(24 * 60 * 60))),
+    },
+    'consulta-tribunais-monitorar-processos': {
+        'task': 'consulta_tribunais.monitorar_processos',
+        'schedule': float(os.environ.get('CONSULTA_TRIBUNAIS_MONITORAMENTO_INTERVALO_SEGUNDOS', str(6 * 60 * 60))),
+    },
+}
 
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = [
@@ -1,7 +1,7 @@
 from datetime import date, timedelta
 from decimal import Decimal
 
-from django.db.models import Q, Sum, Count, Max
+from django.db.models import Q, Sum
 from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
@@ -9,8 +9,7 @@ from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 
 from accounts.permissions import IsAdvogadoOuAdministradorWrite
-from accounts.rbac import processos_visiveis_queryset, usuario_pode_entrar_processo
-from processos.models import Processo
+from accounts.rbac import contexto_acesso, processos_visiveis_ids
 from core.security import validate_upload_file
 from .models import (
     Lancamento,
@@ -22,6 +21,19 @@ from .models import (
     Fatura,
     FaturaItem,
 )
+from .faturamento import (
+    AGRUPAMENTOS,
+    apontamentos_faturaveis,
+    criar_fatura,
+    despesas_faturaveis,
+    faturar_em_lote,
+    filtrar_alvos,
+    itens_apontamentos,
+    itens_despesas,
+    itens_regra,
+    proximo_numero_fatura,
+)
+from .resumo import linhas_agrupadas, linhas_materializadas, montar_resumo
 from .serializers import (
     LancamentoSerializer,
     CategoriaFinanceiraSerializer,
@@ -34,10 +46,10 @@ from .serializers import (
 )
 
 
-def _processo_disponivel_para_usuario(usuario, processo):
+def _processo_disponivel_para_usuario(request, processo):
     if not processo:
         return True
-    return usuario_pode_entrar_processo(processo, usuario)
+    return contexto_acesso(request).pode_entrar(processo)
 
 
 def _lancamentos_por_usuario(usuario):
@@ -46,18 +58,32 @@ def _lancamentos_por_usuario(usuario):
     ).all()
     if usuario.is_administrador():
         return qs
-    processos_ids = processos_visiveis_queryset(Processo.objects.all(), usuario).values_list('id', flat=True)
     return qs.filter(
         Q(criado_por=usuario)
-        | Q(processo_id__in=processos_ids)
+        | Q(processo_id__in=processos_visiveis_ids(usuario))
+    )
+
+
+def _regras_por_usuario(usuario, qs=None):
+    qs = RegraCobranca.objects.all() if qs is None else qs
+    if usuario.is_administrador():
+        return qs
+    return qs.filter(
+        Q(criado_por=usuario)
+        | Q(processo__advogado=usuario)
+        | Q(processo__responsaveis__usuario=usuario, processo__responsaveis__ativo=True)
+        | Q(cliente__responsavel=usuario)
     ).distinct()
 
 
-def _add_months(inicio_mes, delta_meses):
-    total = (inicio_mes.year * 12 + (inicio_mes.month - 1)) + delta_meses
-    ano = total // 12
-    mes = total % 12 + 1
-    return date(ano, mes, 1)
+def _ids_da_requisicao(valor):
+    if valor in (None, ''):
+        return []
+    if isinstance(valor, (list, tuple)):
+        itens = valor
+    else:
+        itens = str(valor).split(',')
+    return [int(item) for item in itens if str(item).strip().isdigit()]
 
 
 def _to_decimal(value, default=Decimal('0')):
@@ -153,11 +179,28 @@ class ContaBancariaViewSet(viewsets.ModelViewSet):
             conta_bancaria=conta,
             status='pago',
         ).order_by('-data_pagamento', '-id')
-        return Response({
+        saldos_qs = conta.saldos_diarios.order_by('-data')
+        resposta = {
             'conta_id': conta.id,
             'saldo': float(conta.saldo or 0),
             'extrato': LancamentoSerializer(extrato_qs[:100], many=True).data,
-        })
+            'saldos_diarios': [
+                {
+                    'data': dia.data.isoformat(),
+                    'variacao': float(dia.variacao),
+                    'saldo': float((conta.saldo_inicial or 0) + dia.acumulado),
+                }
+                for dia in saldos_qs[:100]
+            ],
+        }
+        data_saldo = request.query_params.get('data')
+        if data_saldo:
+            try:
+                data_saldo = date.fromisoformat(data_saldo)
+            except ValueError:
+                return Response({'detail': 'data inválida. Use YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+            resposta['saldo_na_data'] = float(conta.saldo_em(data_saldo))
+        return Response(resposta)
 
 
 class LancamentoViewSet(viewsets.ModelViewSet):
@@ -165,10 +208,15 @@ class LancamentoViewSet(viewsets.ModelViewSet):
         'cliente', 'processo', 'criado_por', 'categoria', 'conta_bancaria'
     ).all()
     serializer_class = LancamentoSerializer
+    ordenacao_cursor = ('data_vencimento', 'id')
     permission_classes = [IsAdvogadoOuAdministradorWrite]
 
+    def queryset_visivel(self):
+        """Lançamentos visíveis ao usuário, sem os filtros da listagem."""
+        return _lancamentos_por_usuario(self.request.user)
+
     def get_queryset(self):
-        qs = _lancamentos_por_usuario(self.request.user)
+        qs = self.queryset_visivel()
         q = self.request.query_params.get('q', '')
         status_filtro = self.request.query_params.get('status', '')
         tipo_filtro = self.request.query_params.get('tipo', '')
@@ -198,7 +246,7 @@ class LancamentoViewSet(viewsets.ModelViewSet):
         conta = serializer.validated_data.get('conta_bancaria')
         categoria = serializer.validated_data.get('categoria')
 
-        if processo and not _processo_disponivel_para_usuario(self.request.user, processo):
+        if processo and not _processo_disponivel_para_usuario(self.request, processo):
             raise PermissionDenied('Você não pode vincular lançamento a processo de outro advogado.')
         if conta and not self.request.user.is_administrador() and conta.criado_por_id != self.request.user.id:
             raise PermissionDenied('Conta bancária inválida para o seu perfil.')
@@ -213,7 +261,7 @@ class LancamentoViewSet(viewsets.ModelViewSet):
         conta = serializer.validated_data.get('conta_bancaria', serializer.instance.conta_bancaria)
         categoria = serializer.validated_data.get('categoria', serializer.instance.categoria)
 
-        if processo and not _processo_disponivel_para_usuario(self.request.user, processo):
+        if processo and not _processo_disponivel_para_usuario(self.request, processo):
             raise PermissionDenied('Você não pode vincular lançamento a processo de outro advogado.')
         if conta and not self.request.user.is_administrador() and conta.criado_por_id != self.request.user.id:
             raise PermissionDenied('Conta bancária inválida para o seu perfil.')
@@ -268,96 +316,32 @@ class LancamentoViewSet(viewsets.ModelViewSet):
         hoje = timezone.now().date()
         qs = self.get_queryset()
 
-        inicio_mes = hoje.replace(day=1)
-        inicio_proximo_mes = _add_months(inicio_mes, 1)
-
-        totais = qs.aggregate(
-            total_pendente=Sum('valor', filter=Q(status='pendente')),
-            total_pago=Sum('valor', filter=Q(status='pago')),
-            total_atrasado=Sum('valor', filter=Q(status='atrasado') | Q(status='pendente', data_vencimento__lt=hoje)),
-            qtd_pendente=Count('id', filter=Q(status='pendente')),
-            qtd_pago=Count('id', filter=Q(status='pago')),
-            qtd_atrasado=Count('id', filter=Q(status='atrasado') | Q(status='pendente', data_vencimento__lt=hoje)),
-        )
-
+        atrasados_q = Q(status='atrasado') | Q(status='pendente', data_vencimento__lt=hoje)
         proximos = qs.filter(
             status='pendente',
             data_vencimento__gte=hoje,
             data_vencimento__lte=hoje + timedelta(days=7),
         ).order_by('data_vencimento')[:5]
-
-        atrasados = qs.filter(Q(status='atrasado') | Q(status='pendente', data_vencimento__lt=hoje)).order_by('data_vencimento')[:5]
+        atrasados = qs.filter(atrasados_q).order_by('data_vencimento')[:5]
         recentes = qs.filter(status='pago').order_by('-data_pagamento')[:5]
 
-        a_receber_mes = qs.filter(
-            tipo__in=Lancamento.tipos_receber(),
-            status='pendente',
-            data_vencimento__gte=inicio_mes,
-            data_vencimento__lt=inicio_proximo_mes,
-        ).aggregate(total=Sum('valor'))['total'] or 0
-
-        a_pagar_mes = qs.filter(
-            tipo__in=Lancamento.tipos_pagar(),
-            status='pendente',
-            data_vencimento__gte=inicio_mes,
-            data_vencimento__lt=inicio_proximo_mes,
-        ).aggregate(total=Sum('valor'))['total'] or 0
-
-        receitas_mes = qs.filter(
-            tipo__in=Lancamento.tipos_receber(),
-            status='pago',
-            data_pagamento__gte=inicio_mes,
-            data_pagamento__lt=inicio_proximo_mes,
-        ).aggregate(total=Sum('valor'))['total'] or 0
-
-        despesas_mes = qs.filter(
-            tipo__in=Lancamento.tipos_pagar(),
-            status='pago',
-            data_pagamento__gte=inicio_mes,
-            data_pagamento__lt=inicio_proximo_mes,
-        ).aggregate(total=Sum('valor'))['total'] or 0
-
-        atrasados_valor = qs.filter(
-            Q(status='atrasado') | Q(status='pendente', data_vencimento__lt=hoje)
-        ).aggregate(total=Sum('valor'))['total'] or 0
-        atrasados_count = qs.filter(Q(status='atrasado') | Q(status='pendente', data_vencimento__lt=hoje)).count()
+        # Administrador sem filtros enxerga o livro-caixa inteiro: lê o resumo
+        # mensal materializado. Nos demais casos, uma única consulta agrupada.
+        filtros = ('q', 'status', 'tipo', 'faturado')
+        if request.user.is_administrador() and not any(request.query_params.get(f) for f in filtros):
+            linhas = linhas_materializadas(hoje)
+        else:
+            linhas = linhas_agrupadas(qs, hoje)
+        resumo = montar_resumo(linhas, hoje)
 
         contas_qs = ContaBancaria.objects.all()
         if not request.user.is_administrador():
             contas_qs = contas_qs.filter(criado_por=request.user)
         contas = list(contas_qs)
         if contas:
-            saldo_total = sum((conta.saldo or 0) for conta in contas)
+            saldo_total = sum(conta.saldo for conta in contas)
         else:
-            entradas_pagas = qs.filter(
-                tipo__in=Lancamento.tipos_receber(), status='pago'
-            ).aggregate(total=Sum('valor'))['total'] or 0
-            saidas_pagas = qs.filter(
-                tipo__in=Lancamento.tipos_pagar(), status='pago'
-            ).aggregate(total=Sum('valor'))['total'] or 0
-            saldo_total = entradas_pagas - saidas_pagas
-
-        grafico = []
-        for offset in range(-5, 1):
-            inicio_ref = _add_months(inicio_mes, offset)
-            fim_ref = _add_months(inicio_ref, 1)
-            receitas_ref = qs.filter(
-                status='pago',
-                tipo__in=Lancamento.tipos_receber(),
-                data_pagamento__gte=inicio_ref,
-                data_pagamento__lt=fim_ref,
-            ).aggregate(total=Sum('valor'))['total'] or 0
-            despesas_ref = qs.filter(
-                status='pago',
-                tipo__in=Lancamento.tipos_pagar(),
-                data_pagamento__gte=inicio_ref,
-                data_pagamento__lt=fim_ref,
-            ).aggregate(total=Sum('valor'))['total'] or 0
-            grafico.append({
-                'mes': inicio_ref.strftime('%m/%Y'),
-                'receitas': float(receitas_ref),
-                'despesas': float(despesas_ref),
-            })
+            saldo_total = resumo['entradas_pagas'] - resumo['saidas_pagas']
 
         apontamentos_qs = ApontamentoTempo.objects.filter(ativo=True, faturado_em__isnull=True)
         faturas_qs = Fatura.objects.all()
@@ -378,20 +362,20 @@ class LancamentoViewSet(viewsets.ModelViewSet):
 
         return Response({
             'saldo_total': float(saldo_total or 0),
-            'a_receber_mes': float(a_receber_mes or 0),
-            'a_pagar_mes': float(a_pagar_mes or 0),
-            'atrasados_valor': float(atrasados_valor or 0),
-            'atrasados_count': atrasados_count,
-            'receitas_mes': float(receitas_mes or 0),
-            'despesas_mes': float(despesas_mes or 0),
-            'grafico_6_meses': grafico,
+            'a_receber_mes': float(resumo['a_receber_mes']),
+            'a_pagar_mes': float(resumo['a_pagar_mes']),
+            'atrasados_valor': float(resumo['atrasado']),
+            'atrasados_count': resumo['qtd_atrasado'],
+            'receitas_mes': float(resumo['receitas_mes']),
+            'despesas_mes': float(resumo['despesas_mes']),
+            'grafico_6_meses': resumo['grafico'],
             'totais': {
-                'pendente': float(totais['total_pendente'] or 0),
-                'pago': float(totais['total_pago'] or 0),
-                'atrasado': float(totais['total_atrasado'] or 0),
-                'qtd_pendente': totais['qtd_pendente'],
-                'qtd_pago': totais['qtd_pago'],
-                'qtd_atrasado': totais['qtd_atrasado'],
+                'pendente': float(resumo['pendente']),
+                'pago': float(resumo['pago']),
+                'atrasado': float(resumo['atrasado']),
+                'qtd_pendente': resumo['qtd_pendente'],
+                'qtd_pago': resumo['qtd_pago'],
+                'qtd_atrasado': resumo['qtd_atrasado'],
             },
             'proximos_vencimentos': LancamentoSerializer(proximos, many=True).data,
             'atrasados': LancamentoSerializer(atrasados, many=True).data,
@@ -440,26 +424,18 @@ class RegraCobrancaViewSet(viewsets.ModelViewSet):
     ordering_fields = ['criado_em', 'atualizado_em', 'titulo']
 
     def get_queryset(self):
-        qs = super().get_queryset()
-        if self.request.user.is_administrador():
-            return qs
-        return qs.filter(
-            Q(criado_por=self.request.user)
-            | Q(processo__advogado=self.request.user)
-            | Q(processo__responsaveis__usuario=self.request.user, processo__responsaveis__ativo=True)
-            | Q(cliente__responsavel=self.request.user)
-        ).distinct()
+        return _regras_por_usuario(self.request.user, super().get_queryset())
 
     def perform_create(self, serializer):
         processo = serializer.validated_data.get('processo')
-        if processo and not _processo_disponivel_para_usuario(self.request.user, processo):
+        if processo and not _processo_disponivel_para_usuario(self.request, processo):
             raise PermissionDenied('Processo inválido para o seu perfil.')
         serializer.save(criado_por=self.request.user)
 
     def perform_update(self, serializer):
         instancia = self.get_object()
         processo = serializer.validated_data.get('processo', instancia.processo)
-        if processo and not _processo_disponivel_para_usuario(self.request.user, processo):
+        if processo and not _processo_disponivel_para_usuario(self.request, processo):
             raise PermissionDenied('Processo inválido para o seu perfil.')
         if not self.request.user.is_administrador() and instancia.criado_por_id != self.request.user.id:
             raise PermissionDenied('Você não pode editar esta regra de cobrança.')
@@ -490,7 +466,7 @@ class ApontamentoTempoViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         processo = serializer.validated_data.get('processo')
-        if processo and not _processo_disponivel_para_usuario(self.request.user, processo):
+        if processo and not _processo_disponivel_para_usuario(self.request, processo):
             raise PermissionDenied('Processo inválido para o seu perfil.')
         responsavel = serializer.validated_data.get('responsavel')
         if not responsavel:
@@ -499,7 +475,7 @@ class ApontamentoTempoViewSet(viewsets.ModelViewSet):
 
     def perform_update(self, serializer):
         processo = serializer.validated_data.get('processo', serializer.instance.processo)
-        if processo and not _processo_disponivel_para_usuario(self.request.user, processo):
+        if processo and not _processo_disponivel_para_usuario(self.request, processo):
             raise PermissionDenied('Processo inválido para o seu perfil.')
         serializer.save()
 
@@ -551,24 +527,27 @@ class FaturaViewSet(viewsets.ModelViewSet):
         ).distinct()
 
     def _next_numero(self):
-        base = timezone.now().strftime('FAT-%Y%m%d')
-        ultimo = Fatura.objects.filter(numero__startswith=base).aggregate(maior=Max('numero'))['maior']
-        if not ultimo:
-            return f'{base}-001'
-        try:
-            seq = int(str(ultimo).split('-')[-1]) + 1
-        except Exception:
-            seq = 1
-        return f'{base}-{seq:03d}'
+        return proximo_numero_fatura()
+
+    def _apontamentos_visiveis(self):
+        qs = ApontamentoTempo.objects.all()
+        if self.request.user.is_administrador():
+            return qs
+        return qs.filter(
+            Q(responsavel=self.request.user)
+            | Q(criado_por=self.request.user)
+            | Q(processo__advogado=self.request.user)
+            | Q(processo__responsaveis__usuario=self.request.user, processo__responsaveis__ativo=True)
+        ).distinct()
 
     def _validar_acesso(self, cliente, processo=None):
         if self.request.user.is_administrador():
             return
-        if processo and not _processo_disponivel_para_usuario(self.request.user, processo):
+        if processo and not _processo_disponivel_para_usuario(self.request, processo):
             raise PermissionDenied('Processo inválido para o seu perfil.')
         if cliente.responsavel_id == self.request.user.id:
             return
-        if processo and _processo_disponivel_para_usuario(self.request.user, processo):
+        if processo and _processo_disponivel_para_usuario(self.request, processo):
             return
         if cliente.processos.filter(
             Q(advogado=self.request.user)
@@ -635,134 +614,117 @@ class FaturaViewSet(viewsets.ModelViewSet):
         elif isinstance(data_vencimento, str):
             data_vencimento = date.fromisoformat(data_vencimento)
 
-        fatura = Fatura.objects.create(
-            numero=self._next_numero(),
-            cliente=cliente,
-            processo=processo,
-            regra_cobranca=regra,
-            periodo_inicio=periodo_inicio,
-            periodo_fim=periodo_fim,
-            data_vencimento=data_vencimento,
-            status='rascunho',
-            criado_por=request.user,
-            observacoes=request.data.get('observacoes', ''),
-        )
-
-        apontamentos_qs = ApontamentoTempo.objects.filter(
-            cliente=cliente,
-            ativo=True,
-            faturado_em__isnull=True,
-            data__gte=periodo_inicio,
-            data__lte=periodo_fim,
-        )
+        apontamentos_qs = self._apontamentos_visiveis().filter(cliente=cliente)
         if processo:
             apontamentos_qs = apontamentos_qs.filter(processo=processo)
-        if not request.user.is_administrador():
-            apontamentos_qs = apontamentos_qs.filter(
-                Q(responsavel=request.user)
-                | Q(criado_por=request.user)
-                | Q(processo__advogado=request.user)
-                | Q(processo__responsaveis__usuario=request.user, processo__responsaveis__ativo=True)
-            ).distinct()
-
-        for ap in apontamentos_qs:
-            valor_hora = ap.valor_hora
-            if not valor_hora and ap.regra_cobranca and ap.regra_cobranca.valor_hora:
-                valor_hora = ap.regra_cobranca.valor_hora
-            if not valor_hora and regra and regra.valor_hora:
-                valor_hora = regra.valor_hora
-            valor_hora = valor_hora or Decimal('0')
-            quantidade = (Decimal(ap.minutos) / Decimal('60')).quantize(Decimal('0.01'))
-            total = (quantidade * Decimal(valor_hora)).quantize(Decimal('0.01'))
-            FaturaItem.objects.create(
-                fatura=fatura,
-                tipo_item='tempo',
-                descricao=f'Apontamento {ap.data:%d/%m/%Y} - {ap.descricao}',
-                quantidade=quantidade,
-                valor_unitario=valor_hora,
-                valor_total=total,
-                apontamento=ap,
-            )
+        itens = itens_apontamentos(apontamentos_faturaveis(apontamentos_qs, periodo_inicio, periodo_fim), regra)
 
         incluir_despesas = str(request.data.get('incluir_despesas_reembolsaveis', 'true')).lower() not in {'0', 'false', 'nao', 'não'}
         if incluir_despesas:
-            despesas_qs = _lancamentos_por_usuario(request.user).filter(
-                cliente=cliente,
-                status='pago',
-                tipo__in=Lancamento.tipos_pagar(),
-                reembolsavel_cliente=True,
-                faturado_em__isnull=True,
-                data_pagamento__isnull=False,
-                data_pagamento__gte=periodo_inicio,
-                data_pagamento__lte=periodo_fim,
-            )
+            despesas_qs = _lancamentos_por_usuario(request.user).filter(cliente=cliente)
             if processo:
                 despesas_qs = despesas_qs.filter(processo=processo)
+            itens += itens_despesas(despesas_faturaveis(despesas_qs, periodo_inicio, periodo_fim))
 
-            for despesa in despesas_qs:
-                valor = Decimal(despesa.valor or 0).quantize(Decimal('0.01'))
-                FaturaItem.objects.create(
-                    fatura=fatura,
-                    tipo_item='despesa',
-                    descricao=f'Despesa reembolsável - {despesa.descricao}',
-                    quantidade=Decimal('1.00'),
-                    valor_unitario=valor,
-                    valor_total=valor,
-                    lancamento_despesa=despesa,
-                )
-
-        if regra:
-            if regra.tipo_cobranca == 'pacote' and regra.valor_pacote:
-                valor = Decimal(regra.valor_pacote).quantize(Decimal('0.01'))
-                FaturaItem.objects.create(
-                    fatura=fatura,
-                    tipo_item='servico',
-                    descricao=f'Pacote - {regra.titulo}',
-                    quantidade=Decimal('1.00'),
-                    valor_unitario=valor,
-                    valor_total=valor,
-                )
-            if regra.tipo_cobranca == 'recorrencia' and regra.valor_recorrente:
-                valor = Decimal(regra.valor_recorrente).quantize(Decimal('0.01'))
-                FaturaItem.objects.create(
-                    fatura=fatura,
-                    tipo_item='servico',
-                    descricao=f'Recorrência - {regra.titulo}',
-                    quantidade=Decimal('1.00'),
-                    valor_unitario=valor,
-                    valor_total=valor,
-                )
-            if regra.tipo_cobranca == 'exito' and regra.percentual_exito:
-                base_exito = _to_decimal(request.data.get('valor_base_exito'))
-                if base_exito > 0:
-                    percentual = Decimal(regra.percentual_exito) / Decimal('100')
-                    valor = (base_exito * percentual).quantize(Decimal('0.01'))
-                    FaturaItem.objects.create(
-                        fatura=fatura,
-                        tipo_item='servico',
-                        descricao=f'Êxito - {regra.percentual_exito}% sobre base',
-                        quantidade=Decimal('1.00'),
-                        valor_unitario=valor,
-                        valor_total=valor,
-                    )
+        itens += itens_regra(regra, _to_decimal(request.data.get('valor_base_exito')))
 
         adicional_valor = _to_decimal(request.data.get('adicional_valor'))
         adicional_descricao = request.data.get('adicional_descricao')
         if adicional_valor > 0:
-            FaturaItem.objects.create(
-                fatura=fatura,
+            itens.append(FaturaItem(
                 tipo_item='ajuste',
                 descricao=adicional_descricao or 'Ajuste manual',
                 quantidade=Decimal('1.00'),
                 valor_unitario=adicional_valor,
                 valor_total=adicional_valor,
-            )
+            ))
 
-        fatura.recalcular_totais()
-        fatura.save(update_fields=['subtotal_tempo', 'subtotal_despesas', 'subtotal_outros', 'total', 'atualizado_em'])
+        fatura = criar_fatura(
+            itens,
+            cliente=cliente,
+            processo=processo,
+            regra_cobranca=regra,
+            periodo_inicio=periodo_inicio,
+            periodo_fim=periodo_fim,
+            data_vencimento=data_vencimento,
+            criado_por=request.user,
+            observacoes=request.data.get('observacoes', ''),
+        )
 
         return Response(self.get_serializer(fatura).data, status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=['post'], url_path='gerar-lote')
+    def gerar_lote(self, request):
+        """Faturamento em lote: um rascunho por cliente (ou processo) com itens a faturar no período."""
+        hoje = timezone.now().date()
+        try:
+            periodo_inicio = date.fromisoformat(str(request.data.get('periodo_inicio') or hoje.replace(day=1)))
+            periodo_fim = date.fromisoformat(str(request.data.get('periodo_fim') or hoje))
+            data_vencimento = date.fromisoformat(str(request.data.get('data_vencimento') or hoje + timedelta(days=7)))
+        except ValueError:
+            return Response({'detail': 'Datas inválidas. Use YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+        if periodo_inicio > periodo_fim:
+            return Response(
+                {'detail': 'periodo_inicio deve ser anterior ou igual a periodo_fim.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        agrupar_por = request.data.get('agrupar_por') or 'cliente'
+        if agrupar_por not in AGRUPAMENTOS:
+            return Response(
+                {'detail': f'agrupar_por deve ser um de: {", ".join(AGRUPAMENTOS)}.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        # Em form-data o campo pode vir repetido; em JSON, como lista.
+        if hasattr(request.data, 'getlist'):
+            tipos_cobranca = request.data.getlist('tipos_cobranca')
+        else:
+            tipos_cobranca = request.data.get('tipos_cobranca') or []
+        tipos_validos = [tipo for tipo, _ in RegraCobranca.TIPO_COBRANCA_CHOICES]
+        if not isinstance(tipos_cobranca, list) or any(tipo not in tipos_validos for tipo in tipos_cobranca):
+            return Response(
+                {'detail': f'tipos_cobranca deve ser uma lista com valores entre: {", ".join(tipos_validos)}.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        apontamentos_qs = self._apontamentos_visiveis()
+        despesas_qs = _lancamentos_por_usuario(request.user)
+        regras_qs = _regras_por_usuario(request.user)
+        apontamentos_qs, despesas_qs, regras_qs = filtrar_alvos(
+            apontamentos_qs,
+            despesas_qs,
+            regras_qs,
+            clientes=_ids_da_requisicao(request.data.get('clientes')),
+            processos=_ids_da_requisicao(request.data.get('processos')),
+            tipos_cobranca=tipos_cobranca,
+        )
+
+        incluir_despesas = str(request.data.get('incluir_despesas_reembolsaveis', 'true')).lower() not in {'0', 'false', 'nao', 'não'}
+        faturas = faturar_em_lote(
+            apontamentos_qs,
+            despesas_qs,
+            regras_qs,
+            periodo_inicio,
+            periodo_fim,
+            data_vencimento,
+            criado_por=request.user,
+            agrupar_por=agrupar_por,
+            incluir_despesas=incluir_despesas,
+        )
+        return Response({
+            'quantidade': len(faturas),
+            'total': float(sum((f.total for f in faturas), Decimal('0'))),
+            'faturas': [
+                {
+                    'id': f.id,
+                    'numero': f.numero,
+                    'cliente': f.cliente_id,
+                    'processo': f.processo_id,
+                    'total': float(f.total),
+                }
+                for f in faturas
+            ],
+        }, status=status.HTTP_201_CREATED)
+
     @action(detail=True, methods=['post'])
     def enviar(self, request, pk=None):
         fatura = self.get_object()
@@ -809,7 +771,7 @@ class FaturaViewSet(viewsets.ModelViewSet):
         if apontamento_ids:
             ApontamentoTempo.objects.filter(id__in=apontamento_ids).update(faturado_em=agora)
         if despesa_ids:
-            Lancamento.objects.filter(id__in=despesa_ids).update(faturado_em=agora)
+            Lancamento.objects.filter(id__in=despesa_ids).update(faturado_em=agora, atualizado_em=agora)
 
         fatura.status = 'enviada'
         fatura.save(update_fields=['status', 'lancamento_receber', 'atualizado_em'])
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class FinanceiroConfig(AppConfig):
     name = 'financeiro'
     verbose_name = 'Financeiro'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,287 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import ApontamentoTempo, Fatura, FaturaItem, Lancamento, SequenciaFatura
+
+CENTAVO = Decimal('0.01')
+AGRUPAMENTOS = ('cliente', 'processo')
+
+
+def _maior_numero_existente(base):
+    maior = 0
+    for numero in Fatura.objects.filter(numero__startswith=f'{base}-').values_list('numero', flat=True):
+        sufixo = numero.rsplit('-', 1)[-1]
+        if sufixo.isdigit():
+            maior = max(maior, int(sufixo))
+    return maior
+
+
+def reservar_numeros_fatura(quantidade=1, data=None):
+    """
+    Reserva `quantidade` números consecutivos do dia no contador
+    SequenciaFatura. A linha do dia fica bloqueada só durante a reserva, que
+    roda em transação própria: chame fora da transação que cria a fatura
+    para não serializar os workers (números de faturas desfeitas viram lacunas).
+    """
+    data = data or timezone.localdate()
+    base = f'FAT-{data:%Y%m%d}'
+    with transaction.atomic():
+        sequencia = SequenciaFatura.objects.select_for_update().filter(data=data).first()
+        if sequencia is None:
+            try:
+                with transaction.atomic():
+                    sequencia = SequenciaFatura.objects.create(data=data, ultimo=_maior_numero_existente(base))
+            except IntegrityError:
+                pass
+            sequencia = SequenciaFatura.objects.select_for_update().get(data=data)
+        inicio = sequencia.ultimo + 1
+        sequencia.ultimo += quantidade
+        sequencia.save(update_fields=['ultimo'])
+    return [f'{base}-{numero:03d}' for numero in range(inicio, inicio + quantidade)]
+
+
+def proximo_numero_fatura():
+    return reservar_numeros_fatura(1)[0]
+
+
+def _em_fatura_aberta(campo):
+    return Exists(
+        FaturaItem.objects.filter(**{campo: OuterRef('pk')}).exclude(fatura__status='cancelada')
+    )
+
+
+def apontamentos_faturaveis(queryset, periodo_inicio, periodo_fim):
+    """Apontamentos ativos, não faturados e fora de outra fatura em aberto."""
+    return (
+        queryset.filter(
+            ativo=True,
+            faturado_em__isnull=True,
+            data__gte=periodo_inicio,
+            data__lte=periodo_fim,
+        )
+        .exclude(_em_fatura_aberta('apontamento'))
+        .select_related('regra_cobranca')
+        .order_by('data', 'id')
+    )
+
+
+def despesas_faturaveis(queryset, periodo_inicio, periodo_fim):
+    """Despesas pagas reembolsáveis ao cliente, não faturadas e fora de outra fatura em aberto."""
+    return (
+        queryset.filter(
+            status='pago',
+            tipo__in=Lancamento.tipos_pagar(),
+            reembolsavel_cliente=True,
+            faturado_em__isnull=True,
+            data_pagamento__isnull=False,
+            data_pagamento__gte=periodo_inicio,
+            data_pagamento__lte=periodo_fim,
+        )
+        .exclude(_em_fatura_aberta('lancamento_despesa'))
+        .order_by('data_pagamento', 'id')
+    )
+
+
+def itens_apontamentos(apontamentos, regra=None):
+    itens = []
+    for ap in apontamentos:
+        valor_hora = ap.valor_hora
+        if not valor_hora and ap.regra_cobranca and ap.regra_cobranca.valor_hora:
+            valor_hora = ap.regra_cobranca.valor_hora
+        if not valor_hora and regra and regra.valor_hora:
+            valor_hora = regra.valor_hora
+        valor_hora = valor_hora or Decimal('0')
+        quantidade = (Decimal(ap.minutos) / Decimal('60')).quantize(CENTAVO)
+        itens.append(FaturaItem(
+            tipo_item='tempo',
+            descricao=f'Apontamento {ap.data:%d/%m/%Y} - {ap.descricao}',
+            quantidade=quantidade,
+            valor_unitario=valor_hora,
+            valor_total=(quantidade * Decimal(valor_hora)).quantize(CENTAVO),
+            apontamento=ap,
+        ))
+    return itens
+
+
+def itens_despesas(despesas):
+    itens = []
+    for despesa in despesas:
+        valor = Decimal(despesa.valor or 0).quantize(CENTAVO)
+        itens.append(FaturaItem(
+            tipo_item='despesa',
+            descricao=f'Despesa reembolsável - {despesa.descricao}',
+            quantidade=Decimal('1.00'),
+            valor_unitario=valor,
+            valor_total=valor,
+            lancamento_despesa=despesa,
+        ))
+    return itens
+
+
+def _item_servico(descricao, valor):
+    return FaturaItem(
+        tipo_item='servico',
+        descricao=descricao,
+        quantidade=Decimal('1.00'),
+        valor_unitario=valor,
+        valor_total=valor,
+    )
+
+
+def itens_regra(regra, valor_base_exito=Decimal('0')):
+    if not regra:
+        return []
+    itens = []
+    if regra.tipo_cobranca == 'pacote' and regra.valor_pacote:
+        itens.append(_item_servico(f'Pacote - {regra.titulo}', Decimal(regra.valor_pacote).quantize(CENTAVO)))
+    if regra.tipo_cobranca == 'recorrencia' and regra.valor_recorrente:
+        itens.append(_item_servico(f'Recorrência - {regra.titulo}', Decimal(regra.valor_recorrente).quantize(CENTAVO)))
+    if regra.tipo_cobranca == 'exito' and regra.percentual_exito and valor_base_exito > 0:
+        percentual = Decimal(regra.percentual_exito) / Decimal('100')
+        itens.append(_item_servico(
+            f'Êxito - {regra.percentual_exito}% sobre base',
+            (valor_base_exito * percentual).quantize(CENTAVO),
+        ))
+    return itens
+
+
+def _totais(itens):
+    totais = {'subtotal_tempo': Decimal('0'), 'subtotal_despesas': Decimal('0'), 'subtotal_outros': Decimal('0')}
+    for item in itens:
+        campo = {'tempo': 'subtotal_tempo', 'despesa': 'subtotal_despesas'}.get(item.tipo_item, 'subtotal_outros')
+        totais[campo] += item.valor_total
+    totais['total'] = sum(totais.values(), Decimal('0'))
+    return totais
+
+
+def criar_fatura(itens, descartar_vazia=False, **campos):
+    """
+    Cria a fatura rascunho com os totais já calculados e grava os itens com
+    bulk_create, tudo em uma única transação. Apontamentos e despesas que
+    outra fatura aberta reservou nesse meio-tempo são descartados; com
+    `descartar_vazia`, nenhuma fatura é criada se não sobrar item.
+    """
+    if 'numero' not in campos:
+        campos['numero'] = proximo_numero_fatura()
+    with transaction.atomic():
+        apontamentos = [item.apontamento_id for item in itens if item.apontamento_id]
+        despesas = [item.lancamento_despesa_id for item in itens if item.lancamento_despesa_id]
+        if apontamentos or despesas:
+            list(ApontamentoTempo.objects.select_for_update().filter(id__in=apontamentos).values_list('id'))
+            list(Lancamento.objects.select_for_update().filter(id__in=despesas).values_list('id'))
+            reservados = FaturaItem.objects.exclude(fatura__status='cancelada')
+            ap_reservados = set(reservados.filter(apontamento_id__in=apontamentos).values_list('apontamento_id', flat=True))
+            desp_reservadas = set(
+                reservados.filter(lancamento_despesa_id__in=despesas).values_list('lancamento_despesa_id', flat=True)
+            )
+            itens = [
+                item for item in itens
+                if item.apontamento_id not in ap_reservados and item.lancamento_despesa_id not in desp_reservadas
+            ]
+        if descartar_vazia and not itens:
+            return None
+        fatura = Fatura.objects.create(status='rascunho', **campos, **_totais(itens))
+        for item in itens:
+            item.fatura = fatura
+        FaturaItem.objects.bulk_create(itens)
+    return fatura
+
+
+def filtrar_alvos(apontamentos_qs, despesas_qs, regras_qs, clientes=None, processos=None, tipos_cobranca=None):
+    """Restringe o faturamento em lote a clientes, processos e/ou tipos de regra de cobrança."""
+    if clientes:
+        apontamentos_qs = apontamentos_qs.filter(cliente_id__in=clientes)
+        despesas_qs = despesas_qs.filter(cliente_id__in=clientes)
+        regras_qs = regras_qs.filter(cliente_id__in=clientes)
+    if processos:
+        apontamentos_qs = apontamentos_qs.filter(processo_id__in=processos)
+        despesas_qs = despesas_qs.filter(processo_id__in=processos)
+        regras_qs = regras_qs.filter(processo_id__in=processos)
+    if tipos_cobranca:
+        regras_qs = regras_qs.filter(tipo_cobranca__in=tipos_cobranca)
+        clientes_com_regra = regras_qs.filter(ativo=True).values('cliente_id')
+        apontamentos_qs = apontamentos_qs.filter(cliente_id__in=clientes_com_regra)
+        despesas_qs = despesas_qs.filter(cliente_id__in=clientes_com_regra)
+    return apontamentos_qs, despesas_qs, regras_qs
+
+
+def _regra_do_grupo(regras, cliente_id, processo_id):
+    return regras.get((cliente_id, processo_id)) or regras.get((cliente_id, None))
+
+
+def faturar_em_lote(
+    apontamentos_qs,
+    despesas_qs,
+    regras_qs,
+    periodo_inicio,
+    periodo_fim,
+    data_vencimento,
+    criado_por=None,
+    agrupar_por='cliente',
+    incluir_despesas=True,
+):
+    """
+    Gera faturas rascunho para todos os clientes (ou processos, conforme
+    `agrupar_por`) com apontamentos, despesas reembolsáveis ou regras de
+    pacote/recorrência no período. A seleção é feita em poucas consultas
+    sobre os querysets recebidos (já filtrados por cliente, processo e
+    permissão) e cada fatura é gravada em sua própria transação.
+    """
+    if agrupar_por not in AGRUPAMENTOS:
+        raise ValueError(f'agrupar_por deve ser um de {AGRUPAMENTOS}.')
+    por_processo = agrupar_por == 'processo'
+
+    def chave(cliente_id, processo_id):
+        return cliente_id, processo_id if por_processo else None
+
+    grupos = defaultdict(lambda: {'apontamentos': [], 'despesas': [], 'regras': []})
+    for ap in apontamentos_faturaveis(apontamentos_qs, periodo_inicio, periodo_fim):
+        grupos[chave(ap.cliente_id, ap.processo_id)]['apontamentos'].append(ap)
+    if incluir_despesas:
+        for despesa in despesas_faturaveis(despesas_qs, periodo_inicio, periodo_fim):
+            grupos[chave(despesa.cliente_id, despesa.processo_id)]['despesas'].append(despesa)
+
+    faturas_da_regra = Fatura.objects.filter(
+        regra_cobranca=OuterRef('pk'),
+        periodo_inicio__lte=periodo_fim,
+        periodo_fim__gte=periodo_inicio,
+    ).exclude(status='cancelada')
+    regras = {}
+    for regra in regras_qs.filter(ativo=True).annotate(faturada=Exists(faturas_da_regra)).order_by('-atualizado_em', '-id'):
+        regras.setdefault((regra.cliente_id, regra.processo_id), regra)
+        if regra.tipo_cobranca in {'pacote', 'recorrencia'} and not regra.faturada:
+            grupos[chave(regra.cliente_id, regra.processo_id)]['regras'].append(regra)
+
+    lotes = []
+    for (cliente_id, processo_id), grupo in sorted(grupos.items(), key=lambda item: (item[0][0], item[0][1] or 0)):
+        regra = _regra_do_grupo(regras, cliente_id, processo_id)
+        itens = itens_apontamentos(grupo['apontamentos'], regra) + itens_despesas(grupo['despesas'])
+        for regra_servico in grupo['regras']:
+            itens += itens_regra(regra_servico)
+        if itens:
+            lotes.append((cliente_id, processo_id, grupo['regras'][0] if grupo['regras'] else regra, itens))
+
+    # Uma única reserva de números para o lote inteiro.
+    numeros = iter(reservar_numeros_fatura(len(lotes))) if lotes else iter(())
+    faturas = []
+    for cliente_id, processo_id, regra, itens in lotes:
+        fatura = criar_fatura(
+            itens,
+            descartar_vazia=True,
+            numero=next(numeros),
+            cliente_id=cliente_id,
+            processo_id=processo_id,
+            regra_cobranca=regra,
+            periodo_inicio=periodo_inicio,
+            periodo_fim=periodo_fim,
+            data_vencimento=data_vencimento,
+            criado_por=criado_por,
+            observacoes=f'Faturamento em lote {periodo_inicio:%d/%m/%Y} a {periodo_fim:%d/%m/%Y}.',
+        )
+        if fatura is not None:
+            faturas.append(fatura)
+    return faturas
@@ -3,6 +3,7 @@ from django.db.models import Q
 from django.utils import timezone
 
 from financeiro.models import Lancamento
+from financeiro.resumo import alterar_status_em_lote
 
 
 class Command(BaseCommand):
@@ -10,10 +11,13 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         hoje = timezone.localdate()
-        atualizados = Lancamento.objects.filter(
-            Q(status='pendente'),
-            Q(data_vencimento__lt=hoje),
-        ).update(status='atrasado')
+        atualizados = alterar_status_em_lote(
+            Lancamento.objects.filter(
+                Q(status='pendente'),
+                Q(data_vencimento__lt=hoje),
+            ),
+            'atrasado',
+        )
 
         self.stdout.write(
             self.style.SUCCESS(f'Lançamentos atualizados para atrasado: {atualizados}')
@@ -0,0 +1,77 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from accounts.models import Usuario
+from financeiro.faturamento import AGRUPAMENTOS, faturar_em_lote, filtrar_alvos
+from financeiro.models import ApontamentoTempo, Lancamento, RegraCobranca
+
+
+def _data(valor):
+    try:
+        return date.fromisoformat(valor)
+    except ValueError as exc:
+        raise CommandError(f'Data inválida: {valor}. Use YYYY-MM-DD.') from exc
+
+
+class Command(BaseCommand):
+    help = 'Gera faturas rascunho em lote para os clientes (ou processos) com itens a faturar no período.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--inicio', type=_data, help='Início do período (padrão: 1º dia do mês anterior).')
+        parser.add_argument('--fim', type=_data, help='Fim do período (padrão: último dia do mês anterior).')
+        parser.add_argument('--vencimento', type=_data, help='Vencimento das faturas (padrão: hoje + 7 dias).')
+        parser.add_argument('--agrupar-por', choices=AGRUPAMENTOS, default='cliente')
+        parser.add_argument('--cliente', type=int, action='append', default=[], help='Restringe a um cliente (repetível).')
+        parser.add_argument('--processo', type=int, action='append', default=[], help='Restringe a um processo (repetível).')
+        parser.add_argument(
+            '--tipo-cobranca',
+            action='append',
+            default=[],
+            choices=[valor for valor, _ in RegraCobranca.TIPO_COBRANCA_CHOICES],
+            help='Somente clientes com regra ativa deste tipo (repetível).',
+        )
+        parser.add_argument('--sem-despesas', action='store_true', help='Não inclui despesas reembolsáveis.')
+        parser.add_argument('--usuario', help='Username registrado como criador das faturas.')
+
+    def handle(self, *args, **options):
+        hoje = timezone.localdate()
+        fim_mes_anterior = hoje.replace(day=1) - timedelta(days=1)
+        periodo_inicio = options['inicio'] or fim_mes_anterior.replace(day=1)
+        periodo_fim = options['fim'] or fim_mes_anterior
+        if periodo_inicio > periodo_fim:
+            raise CommandError('--inicio deve ser anterior ou igual a --fim.')
+
+        criado_por = None
+        if options['usuario']:
+            try:
+                criado_por = Usuario.objects.get(username=options['usuario'])
+            except Usuario.DoesNotExist as exc:
+                raise CommandError(f"Usuário não encontrado: {options['usuario']}") from exc
+
+        apontamentos_qs, despesas_qs, regras_qs = filtrar_alvos(
+            ApontamentoTempo.objects.all(),
+            Lancamento.objects.all(),
+            RegraCobranca.objects.all(),
+            clientes=options['cliente'],
+            processos=options['processo'],
+            tipos_cobranca=options['tipo_cobranca'],
+        )
+        faturas = faturar_em_lote(
+            apontamentos_qs,
+            despesas_qs,
+            regras_qs,
+            periodo_inicio,
+            periodo_fim,
+            options['vencimento'] or hoje + timedelta(days=7),
+            criado_por=criado_por,
+            agrupar_por=options['agrupar_por'],
+            incluir_despesas=not options['sem_despesas'],
+        )
+        total = sum(fatura.total for fatura in faturas)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Faturas geradas: {len(faturas)} | Período: {periodo_inicio:%d/%m/%Y} a {periodo_fim:%d/%m/%Y} | Total: R$ {total}'
+            )
+        )
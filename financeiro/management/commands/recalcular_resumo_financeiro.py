@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from financeiro.resumo import reconstruir_resumo_mensal
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o resumo mensal de lançamentos usado no dashboard financeiro.'
+
+    def handle(self, *args, **options):
+        total = reconstruir_resumo_mensal()
+        self.stdout.write(
+            self.style.SUCCESS(f'Linhas de resumo gravadas: {total}')
+        )
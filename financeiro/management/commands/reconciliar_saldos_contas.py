@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from financeiro.saldos import reconciliar_saldos
+
+
+class Command(BaseCommand):
+    help = 'Confere o saldo armazenado e o livro diário das contas bancárias com os lançamentos pagos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corrigir', action='store_true', help='Reconstrói as contas divergentes.')
+
+    def handle(self, *args, **options):
+        divergencias = reconciliar_saldos(corrigir=options['corrigir'])
+        for item in divergencias:
+            referencia = item['data'].isoformat() if item['data'] else 'saldo atual'
+            self.stdout.write(self.style.WARNING(
+                f"Conta {item['conta_id']} ({referencia}): esperado {item['esperado']}, registrado {item['registrado']}"
+            ))
+        contas = len({item['conta_id'] for item in divergencias})
+        if not divergencias:
+            self.stdout.write(self.style.SUCCESS('Saldos conferidos: nenhuma divergência.'))
+        elif options['corrigir']:
+            self.stdout.write(self.style.SUCCESS(f'Contas reconstruídas: {contas}'))
+        else:
+            self.stdout.write(self.style.ERROR(
+                f'Contas com divergência: {contas}. Execute com --corrigir para reconstruí-las.'
+            ))
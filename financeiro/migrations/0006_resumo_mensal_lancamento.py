@@ -0,0 +1,65 @@
+# Generated by Django 4.2.30 on 2026-10-17 20:57
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def popular_resumo(apps, schema_editor):
+    Lancamento = apps.get_model('financeiro', 'Lancamento')
+    ResumoMensalLancamento = apps.get_model('financeiro', 'ResumoMensalLancamento')
+    linhas = (
+        Lancamento.objects.order_by()
+        .values(
+            'tipo',
+            'status',
+            mes_vencimento=TruncMonth('data_vencimento'),
+            mes_pagamento=TruncMonth('data_pagamento'),
+        )
+        .annotate(quantidade=Count('id'), total=Sum('valor'))
+    )
+    ResumoMensalLancamento.objects.bulk_create(
+        [ResumoMensalLancamento(**linha) for linha in linhas],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeiro', '0005_alter_apontamentotempo_responsavel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoMensalLancamento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('receber', 'A Receber'), ('pagar', 'A Pagar'), ('honorario', 'Honorário'), ('despesa', 'Despesa'), ('reembolso', 'Reembolso'), ('pagamento', 'Pagamento Recebido')], max_length=20, verbose_name='Tipo')),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('pago', 'Pago'), ('atrasado', 'Atrasado'), ('cancelado', 'Cancelado')], max_length=20, verbose_name='Status')),
+                ('mes_vencimento', models.DateField(verbose_name='Mês de Vencimento')),
+                ('mes_pagamento', models.DateField(blank=True, null=True, verbose_name='Mês de Pagamento')),
+                ('quantidade', models.IntegerField(default=0, verbose_name='Quantidade')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Total (R$)')),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Resumo Mensal de Lançamentos',
+                'verbose_name_plural': 'Resumos Mensais de Lançamentos',
+                'ordering': ['-mes_vencimento', 'tipo', 'status'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='lancamento',
+            index=models.Index(fields=['status', 'data_vencimento'], name='idx_lancamento_status_venc'),
+        ),
+        migrations.AddConstraint(
+            model_name='resumomensallancamento',
+            constraint=models.UniqueConstraint(condition=models.Q(('mes_pagamento__isnull', False)), fields=('tipo', 'status', 'mes_vencimento', 'mes_pagamento'), name='uniq_resumo_mensal_pago'),
+        ),
+        migrations.AddConstraint(
+            model_name='resumomensallancamento',
+            constraint=models.UniqueConstraint(condition=models.Q(('mes_pagamento__isnull', True)), fields=('tipo', 'status', 'mes_vencimento'), name='uniq_resumo_mensal_sem_pagamento'),
+        ),
+        migrations.RunPython(popular_resumo, migrations.RunPython.noop),
+    ]
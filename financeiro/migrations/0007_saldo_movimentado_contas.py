@@ -0,0 +1,77 @@
+# Generated by Django 4.2.30 on 2026-10-17 21:00
+
+from decimal import Decimal
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce
+
+TIPOS_RECEBER = ['receber', 'honorario', 'reembolso', 'pagamento']
+TIPOS_PAGAR = ['pagar', 'despesa']
+
+
+def popular_saldos(apps, schema_editor):
+    ContaBancaria = apps.get_model('financeiro', 'ContaBancaria')
+    Lancamento = apps.get_model('financeiro', 'Lancamento')
+    SaldoDiarioConta = apps.get_model('financeiro', 'SaldoDiarioConta')
+    linhas = (
+        Lancamento.objects.filter(status='pago', conta_bancaria__isnull=False)
+        .order_by()
+        .values('conta_bancaria_id', dia=Coalesce('data_pagamento', 'data_vencimento'))
+        .annotate(
+            entradas=Sum('valor', filter=Q(tipo__in=TIPOS_RECEBER)),
+            saidas=Sum('valor', filter=Q(tipo__in=TIPOS_PAGAR)),
+        )
+        .order_by('conta_bancaria_id', 'dia')
+    )
+    acumulados = {}
+    dias = []
+    for linha in linhas:
+        conta_id = linha['conta_bancaria_id']
+        variacao = (linha['entradas'] or 0) - (linha['saidas'] or 0)
+        acumulados[conta_id] = acumulados.get(conta_id, Decimal('0')) + variacao
+        dias.append(SaldoDiarioConta(
+            conta_id=conta_id,
+            data=linha['dia'],
+            variacao=variacao,
+            acumulado=acumulados[conta_id],
+        ))
+    SaldoDiarioConta.objects.bulk_create(dias, batch_size=500)
+    for conta_id, acumulado in acumulados.items():
+        ContaBancaria.objects.filter(pk=conta_id).update(saldo_movimentado=acumulado)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeiro', '0006_resumo_mensal_lancamento'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contabancaria',
+            name='saldo_movimentado',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=16, verbose_name='Saldo Movimentado'),
+        ),
+        migrations.CreateModel(
+            name='SaldoDiarioConta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField(verbose_name='Data')),
+                ('variacao', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Variação do Dia')),
+                ('acumulado', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Acumulado')),
+                ('conta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos_diarios', to='financeiro.contabancaria', verbose_name='Conta Bancária')),
+            ],
+            options={
+                'verbose_name': 'Saldo Diário da Conta',
+                'verbose_name_plural': 'Saldos Diários das Contas',
+                'ordering': ['conta', '-data'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='saldodiarioconta',
+            constraint=models.UniqueConstraint(fields=('conta', 'data'), name='uniq_saldo_diario_conta_data'),
+        ),
+        migrations.RunPython(popular_saldos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-17 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeiro', '0007_saldo_movimentado_contas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SequenciaFatura',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField(unique=True, verbose_name='Data')),
+                ('ultimo', models.PositiveIntegerField(default=0, verbose_name='Último Número')),
+            ],
+            options={
+                'verbose_name': 'Sequência de Faturas',
+                'verbose_name_plural': 'Sequências de Faturas',
+                'ordering': ['-data'],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 21:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeiro', '0008_sequencia_fatura'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lancamento',
+            index=models.Index(fields=['atualizado_em'], name='idx_lancamento_atualizado'),
+        ),
+    ]
@@ -1,7 +1,7 @@
 from decimal import Decimal
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 
 from processos.models import Cliente, Processo
@@ -42,6 +42,13 @@ class ContaBancaria(models.Model):
     agencia = models.CharField(max_length=30, blank=True, verbose_name='Agência')
     conta_numero = models.CharField(max_length=40, blank=True, verbose_name='Número da Conta')
     saldo_inicial = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name='Saldo Inicial')
+    saldo_movimentado = models.DecimalField(
+        max_digits=16,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        verbose_name='Saldo Movimentado',
+    )
     criado_por = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -61,19 +68,29 @@ class ContaBancaria(models.Model):
     def __str__(self):
         return self.nome
 
+    def save(self, *args, **kwargs):
+        # saldo_movimentado só muda por UPDATE com F() em financeiro.saldos;
+        # regravar o valor carregado aqui desfaria movimentos concorrentes.
+        if not self._state.adding and not kwargs.get('force_insert'):
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None:
+                update_fields = [f.name for f in self._meta.concrete_fields if not f.primary_key]
+            kwargs['update_fields'] = [campo for campo in update_fields if campo != 'saldo_movimentado']
+        super().save(*args, **kwargs)
+
     @property
     def saldo(self):
-        from django.db.models import Sum
-
-        entradas = self.lancamentos.filter(
-            status='pago',
-            tipo__in=Lancamento.tipos_receber(),
-        ).aggregate(total=Sum('valor'))['total'] or 0
-        saidas = self.lancamentos.filter(
-            status='pago',
-            tipo__in=Lancamento.tipos_pagar(),
-        ).aggregate(total=Sum('valor'))['total'] or 0
-        return (self.saldo_inicial or 0) + entradas - saidas
+        return (self.saldo_inicial or 0) + (self.saldo_movimentado or 0)
+
+    def saldo_em(self, data):
+        """Saldo ao final do dia `data`, pelo livro de saldos diários."""
+        acumulado = (
+            self.saldos_diarios.filter(data__lte=data)
+            .order_by('-data')
+            .values_list('acumulado', flat=True)
+            .first()
+        )
+        return (self.saldo_inicial or 0) + (acumulado or 0)
 
 
 class Lancamento(models.Model):
@@ -145,10 +162,20 @@ class Lancamento(models.Model):
         verbose_name = 'Lançamento'
         verbose_name_plural = 'Lançamentos'
         ordering = ['-data_vencimento']
+        indexes = [
+            models.Index(fields=['status', 'data_vencimento'], name='idx_lancamento_status_venc'),
+            models.Index(fields=['atualizado_em'], name='idx_lancamento_atualizado'),
+        ]
 
     def __str__(self):
         return f'{self.get_tipo_display()} – {self.cliente} – R$ {self.valor}'
 
+    def save(self, *args, **kwargs):
+        # Resumo mensal e saldo das contas são ajustados por sinais; a
+        # transação garante que o lançamento e os agregados mudem juntos.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     @property
     def esta_atrasado(self):
         from django.utils import timezone
@@ -183,6 +210,35 @@ class Lancamento(models.Model):
         return 'receber'
 
 
+class SaldoDiarioConta(models.Model):
+    """Variação diária dos lançamentos pagos de uma conta e o acumulado até o dia."""
+
+    conta = models.ForeignKey(
+        ContaBancaria,
+        on_delete=models.CASCADE,
+        related_name='saldos_diarios',
+        verbose_name='Conta Bancária',
+    )
+    data = models.DateField(verbose_name='Data')
+    variacao = models.DecimalField(max_digits=16, decimal_places=2, default=0, verbose_name='Variação do Dia')
+    acumulado = models.DecimalField(max_digits=16, decimal_places=2, default=0, verbose_name='Acumulado')
+
+    class Meta:
+        verbose_name = 'Saldo Diário da Conta'
+        verbose_name_plural = 'Saldos Diários das Contas'
+        ordering = ['conta', '-data']
+        constraints = [
+            models.UniqueConstraint(fields=['conta', 'data'], name='uniq_saldo_diario_conta_data'),
+        ]
+
+    def __str__(self):
+        return f'{self.conta} – {self.data:%d/%m/%Y}'
+
+    @property
+    def saldo(self):
+        return (self.conta.saldo_inicial or 0) + self.acumulado
+
+
 class RegraCobranca(models.Model):
     TIPO_COBRANCA_CHOICES = [
         ('hora', 'Hora'),
@@ -417,6 +473,21 @@ class Fatura(models.Model):
         self.total = agregados.get('total') or Decimal('0')
 
 
+class SequenciaFatura(models.Model):
+    """Contador diário dos números de fatura (FAT-AAAAMMDD-NNN)."""
+
+    data = models.DateField(unique=True, verbose_name='Data')
+    ultimo = models.PositiveIntegerField(default=0, verbose_name='Último Número')
+
+    class Meta:
+        verbose_name = 'Sequência de Faturas'
+        verbose_name_plural = 'Sequências de Faturas'
+        ordering = ['-data']
+
+    def __str__(self):
+        return f'{self.data:%d/%m/%Y}: {self.ultimo}'
+
+
 class FaturaItem(models.Model):
     TIPO_ITEM_CHOICES = [
         ('tempo', 'Tempo'),
@@ -489,3 +560,35 @@ class LancamentoArquivo(models.Model):
 
     def __str__(self):
         return self.nome_original or self.arquivo.name
+
+
+class ResumoMensalLancamento(models.Model):
+    """Totais de lançamentos por mês de vencimento/pagamento, tipo e status."""
+
+    tipo = models.CharField(max_length=20, choices=Lancamento.TIPO_CHOICES, verbose_name='Tipo')
+    status = models.CharField(max_length=20, choices=Lancamento.STATUS_CHOICES, verbose_name='Status')
+    mes_vencimento = models.DateField(verbose_name='Mês de Vencimento')
+    mes_pagamento = models.DateField(null=True, blank=True, verbose_name='Mês de Pagamento')
+    quantidade = models.IntegerField(default=0, verbose_name='Quantidade')
+    total = models.DecimalField(max_digits=16, decimal_places=2, default=0, verbose_name='Total (R$)')
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Resumo Mensal de Lançamentos'
+        verbose_name_plural = 'Resumos Mensais de Lançamentos'
+        ordering = ['-mes_vencimento', 'tipo', 'status']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tipo', 'status', 'mes_vencimento', 'mes_pagamento'],
+                name='uniq_resumo_mensal_pago',
+                condition=models.Q(mes_pagamento__isnull=False),
+            ),
+            models.UniqueConstraint(
+                fields=['tipo', 'status', 'mes_vencimento'],
+                name='uniq_resumo_mensal_sem_pagamento',
+                condition=models.Q(mes_pagamento__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.mes_vencimento:%m/%Y} – {self.get_tipo_display()} – {self.get_status_display()}'
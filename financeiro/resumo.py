@@ -0,0 +1,199 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import BooleanField, Case, Count, F, Sum, Value, When
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Lancamento, ResumoMensalLancamento
+
+CAMPOS_RESUMO = ('tipo', 'status', 'data_vencimento', 'data_pagamento', 'valor')
+MESES_GRAFICO = 6
+
+
+def adicionar_meses(inicio_mes, delta_meses):
+    total = (inicio_mes.year * 12 + (inicio_mes.month - 1)) + delta_meses
+    ano = total // 12
+    mes = total % 12 + 1
+    return date(ano, mes, 1)
+
+
+def _agrupar(queryset, hoje=None):
+    """Uma linha por (tipo, status, mês de vencimento, mês de pagamento) com quantidade e total."""
+    campos = {
+        'mes_vencimento': TruncMonth('data_vencimento'),
+        'mes_pagamento': TruncMonth('data_pagamento'),
+    }
+    if hoje is not None:
+        campos['vencido'] = Case(
+            When(data_vencimento__lt=hoje, then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        )
+    return (
+        queryset.order_by()
+        .values('tipo', 'status', **campos)
+        .annotate(quantidade=Count('id'), total=Sum('valor'))
+    )
+
+
+def linhas_agrupadas(queryset, hoje):
+    return list(_agrupar(queryset, hoje))
+
+
+def linhas_materializadas(hoje):
+    """
+    Linhas equivalentes a `linhas_agrupadas` para todo o livro-caixa, lidas
+    de ResumoMensalLancamento. Só os pendentes do mês corrente dependem do
+    dia de hoje para saber se já venceram; esses vêm direto de Lancamento.
+    """
+    inicio_mes = hoje.replace(day=1)
+    linhas = []
+    for linha in ResumoMensalLancamento.objects.filter(quantidade__gt=0).order_by().values(
+        'tipo', 'status', 'mes_vencimento', 'mes_pagamento', 'quantidade', 'total',
+    ):
+        if linha['status'] == 'pendente' and linha['mes_vencimento'] == inicio_mes:
+            continue
+        linha['vencido'] = linha['mes_vencimento'] < inicio_mes
+        linhas.append(linha)
+    linhas.extend(_agrupar(
+        Lancamento.objects.filter(
+            status='pendente',
+            data_vencimento__gte=inicio_mes,
+            data_vencimento__lt=adicionar_meses(inicio_mes, 1),
+        ),
+        hoje,
+    ))
+    return linhas
+
+
+def montar_resumo(linhas, hoje, meses_grafico=MESES_GRAFICO):
+    """Calcula em memória todos os indicadores do dashboard a partir das linhas agrupadas."""
+    inicio_mes = hoje.replace(day=1)
+    tipos_receber = set(Lancamento.tipos_receber())
+    tipos_pagar = set(Lancamento.tipos_pagar())
+    zero = Decimal('0')
+    resumo = {
+        'pendente': zero, 'pago': zero, 'atrasado': zero,
+        'qtd_pendente': 0, 'qtd_pago': 0, 'qtd_atrasado': 0,
+        'a_receber_mes': zero, 'a_pagar_mes': zero,
+        'receitas_mes': zero, 'despesas_mes': zero,
+        'entradas_pagas': zero, 'saidas_pagas': zero,
+    }
+    meses = [adicionar_meses(inicio_mes, offset) for offset in range(1 - meses_grafico, 1)]
+    grafico = {mes: {'receitas': zero, 'despesas': zero} for mes in meses}
+
+    for linha in linhas:
+        tipo, situacao = linha['tipo'], linha['status']
+        total, quantidade = linha['total'] or zero, linha['quantidade']
+        if situacao in ('pendente', 'pago'):
+            resumo[situacao] += total
+            resumo[f'qtd_{situacao}'] += quantidade
+        if situacao == 'atrasado' or (situacao == 'pendente' and linha['vencido']):
+            resumo['atrasado'] += total
+            resumo['qtd_atrasado'] += quantidade
+        if situacao == 'pendente' and linha['mes_vencimento'] == inicio_mes:
+            if tipo in tipos_receber:
+                resumo['a_receber_mes'] += total
+            elif tipo in tipos_pagar:
+                resumo['a_pagar_mes'] += total
+        if situacao == 'pago':
+            chave = 'receitas' if tipo in tipos_receber else 'despesas' if tipo in tipos_pagar else None
+            if chave is None:
+                continue
+            resumo['entradas_pagas' if chave == 'receitas' else 'saidas_pagas'] += total
+            if linha['mes_pagamento'] in grafico:
+                grafico[linha['mes_pagamento']][chave] += total
+
+    resumo['receitas_mes'] = grafico[inicio_mes]['receitas']
+    resumo['despesas_mes'] = grafico[inicio_mes]['despesas']
+    resumo['grafico'] = [
+        {'mes': mes.strftime('%m/%Y'), 'receitas': float(valores['receitas']), 'despesas': float(valores['despesas'])}
+        for mes, valores in grafico.items()
+    ]
+    return resumo
+
+
+def estado_resumo(tipo, status, data_vencimento, data_pagamento, valor):
+    """Chave do resumo mensal e valor com que um lançamento contribui para ela."""
+    data_vencimento = Lancamento._meta.get_field('data_vencimento').to_python(data_vencimento)
+    if not data_vencimento:
+        return None
+    data_pagamento = Lancamento._meta.get_field('data_pagamento').to_python(data_pagamento)
+    chave = (
+        tipo,
+        status,
+        data_vencimento.replace(day=1),
+        data_pagamento.replace(day=1) if data_pagamento else None,
+    )
+    return chave, Lancamento._meta.get_field('valor').to_python(valor) or Decimal('0')
+
+
+def estado_resumo_de(lancamento):
+    return estado_resumo(*(getattr(lancamento, campo) for campo in CAMPOS_RESUMO))
+
+
+def _aplicar(chave, quantidade, valor):
+    tipo, situacao, mes_vencimento, mes_pagamento = chave
+    linhas = ResumoMensalLancamento.objects.filter(
+        tipo=tipo,
+        status=situacao,
+        mes_vencimento=mes_vencimento,
+        mes_pagamento=mes_pagamento,
+    )
+    incremento = {
+        'quantidade': F('quantidade') + quantidade,
+        'total': F('total') + valor,
+        'atualizado_em': timezone.now(),
+    }
+    if linhas.update(**incremento):
+        return
+    try:
+        with transaction.atomic():
+            ResumoMensalLancamento.objects.create(
+                tipo=tipo,
+                status=situacao,
+                mes_vencimento=mes_vencimento,
+                mes_pagamento=mes_pagamento,
+                quantidade=quantidade,
+                total=valor,
+            )
+    except IntegrityError:
+        linhas.update(**incremento)
+
+
+def registrar_alteracao(anterior, atual):
+    """Move a contribuição de um lançamento do estado anterior para o atual."""
+    if anterior == atual:
+        return
+    if anterior:
+        _aplicar(anterior[0], -1, -anterior[1])
+    if atual:
+        _aplicar(atual[0], 1, atual[1])
+
+
+def alterar_status_em_lote(queryset, novo_status):
+    """`queryset.update(status=...)` mantendo o resumo mensal consistente."""
+    queryset = queryset.exclude(status=novo_status)
+    with transaction.atomic():
+        linhas = list(_agrupar(queryset))
+        atualizados = queryset.update(status=novo_status, atualizado_em=timezone.now())
+        for linha in linhas:
+            total = linha['total'] or Decimal('0')
+            _aplicar((linha['tipo'], linha['status'], linha['mes_vencimento'], linha['mes_pagamento']),
+                     -linha['quantidade'], -total)
+            _aplicar((linha['tipo'], novo_status, linha['mes_vencimento'], linha['mes_pagamento']),
+                     linha['quantidade'], total)
+    return atualizados
+
+
+def reconstruir_resumo_mensal():
+    """Regrava ResumoMensalLancamento a partir de todos os lançamentos."""
+    with transaction.atomic():
+        ResumoMensalLancamento.objects.all().delete()
+        resumos = ResumoMensalLancamento.objects.bulk_create(
+            [ResumoMensalLancamento(**linha) for linha in _agrupar(Lancamento.objects.all())],
+            batch_size=500,
+        )
+    return len(resumos)
@@ -0,0 +1,136 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Coalesce
+
+from .models import ContaBancaria, Lancamento, SaldoDiarioConta
+
+CAMPOS_SALDO = ('tipo', 'status', 'conta_bancaria_id', 'data_pagamento', 'data_vencimento', 'valor')
+
+
+def movimento_conta(tipo, status, conta_bancaria_id, data_pagamento, data_vencimento, valor):
+    """(conta, dia, valor com sinal) com que um lançamento pago afeta o saldo da conta."""
+    if status != 'pago' or not conta_bancaria_id:
+        return None
+    if tipo in Lancamento.tipos_receber():
+        sinal = 1
+    elif tipo in Lancamento.tipos_pagar():
+        sinal = -1
+    else:
+        return None
+    campo_data = Lancamento._meta.get_field('data_pagamento')
+    data = campo_data.to_python(data_pagamento) or campo_data.to_python(data_vencimento)
+    valor = Lancamento._meta.get_field('valor').to_python(valor) or Decimal('0')
+    return conta_bancaria_id, data, sinal * valor
+
+
+def movimento_conta_de(lancamento):
+    return movimento_conta(*(getattr(lancamento, campo) for campo in CAMPOS_SALDO))
+
+
+def _aplicar_movimento(conta_id, data, delta):
+    if not delta:
+        return
+    with transaction.atomic():
+        # O UPDATE na conta bloqueia a linha até o fim da transação e serializa
+        # as gravações concorrentes no livro de saldos da mesma conta.
+        if not ContaBancaria.objects.filter(pk=conta_id).update(saldo_movimentado=F('saldo_movimentado') + delta):
+            return
+        dias = SaldoDiarioConta.objects.filter(conta_id=conta_id)
+        if not dias.filter(data=data).exists():
+            anterior = dias.filter(data__lt=data).order_by('-data').values_list('acumulado', flat=True).first()
+            SaldoDiarioConta.objects.create(conta_id=conta_id, data=data, acumulado=anterior or 0)
+        dias.filter(data=data).update(variacao=F('variacao') + delta)
+        dias.filter(data__gte=data).update(acumulado=F('acumulado') + delta)
+
+
+def registrar_movimento(anterior, atual):
+    """Desfaz o movimento anterior do lançamento na conta e aplica o atual."""
+    if anterior == atual:
+        return
+    if anterior and atual and anterior[:2] == atual[:2]:
+        _aplicar_movimento(atual[0], atual[1], atual[2] - anterior[2])
+        return
+    if anterior:
+        _aplicar_movimento(anterior[0], anterior[1], -anterior[2])
+    if atual:
+        _aplicar_movimento(atual[0], atual[1], atual[2])
+
+
+def _movimentos_esperados(contas_ids=None):
+    """Variação diária esperada por conta, calculada a partir dos lançamentos pagos."""
+    qs = Lancamento.objects.filter(status='pago', conta_bancaria__isnull=False)
+    if contas_ids is not None:
+        qs = qs.filter(conta_bancaria_id__in=contas_ids)
+    esperado = defaultdict(dict)
+    linhas = (
+        qs.order_by()
+        .values('conta_bancaria_id', dia=Coalesce('data_pagamento', 'data_vencimento'))
+        .annotate(
+            entradas=Sum('valor', filter=Q(tipo__in=Lancamento.tipos_receber())),
+            saidas=Sum('valor', filter=Q(tipo__in=Lancamento.tipos_pagar())),
+        )
+    )
+    for linha in linhas:
+        variacao = (linha['entradas'] or 0) - (linha['saidas'] or 0)
+        if variacao:
+            esperado[linha['conta_bancaria_id']][linha['dia']] = variacao
+    return esperado
+
+
+def reconstruir_saldo_conta(conta_id, variacoes):
+    """Regrava o saldo movimentado e o livro diário da conta a partir de {dia: variação}."""
+    acumulado = Decimal('0')
+    dias = []
+    for data in sorted(variacoes):
+        acumulado += variacoes[data]
+        dias.append(SaldoDiarioConta(conta_id=conta_id, data=data, variacao=variacoes[data], acumulado=acumulado))
+    with transaction.atomic():
+        ContaBancaria.objects.filter(pk=conta_id).update(saldo_movimentado=acumulado)
+        SaldoDiarioConta.objects.filter(conta_id=conta_id).delete()
+        SaldoDiarioConta.objects.bulk_create(dias, batch_size=500)
+
+
+def reconciliar_saldos(contas=None, corrigir=False):
+    """
+    Compara o saldo armazenado e o livro diário de cada conta com os
+    lançamentos pagos. Retorna a lista de divergências encontradas e, com
+    `corrigir=True`, reconstrói as contas divergentes.
+    """
+    contas = list(contas if contas is not None else ContaBancaria.objects.all())
+    ids = [conta.pk for conta in contas]
+    esperado = _movimentos_esperados(ids)
+    registrado = defaultdict(dict)
+    for conta_id, data, variacao, acumulado in SaldoDiarioConta.objects.filter(conta_id__in=ids).values_list(
+        'conta_id', 'data', 'variacao', 'acumulado',
+    ):
+        registrado[conta_id][data] = (variacao, acumulado)
+
+    divergencias = []
+    for conta in contas:
+        variacoes = esperado.get(conta.pk, {})
+        livro = registrado.get(conta.pk, {})
+        total = sum(variacoes.values(), Decimal('0'))
+        if conta.saldo_movimentado != total:
+            divergencias.append({
+                'conta_id': conta.pk,
+                'data': None,
+                'esperado': total,
+                'registrado': conta.saldo_movimentado,
+            })
+        acumulado = Decimal('0')
+        for data in sorted(set(variacoes) | set(livro)):
+            acumulado += variacoes.get(data, 0)
+            variacao, acumulado_livro = livro.get(data, (Decimal('0'), None))
+            if variacao != variacoes.get(data, 0) or (acumulado_livro is not None and acumulado_livro != acumulado):
+                divergencias.append({
+                    'conta_id': conta.pk,
+                    'data': data,
+                    'esperado': acumulado,
+                    'registrado': acumulado_livro,
+                })
+        if corrigir and any(d['conta_id'] == conta.pk for d in divergencias):
+            reconstruir_saldo_conta(conta.pk, variacoes)
+    return divergencias
@@ -0,0 +1,48 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from processos.sincronizacao import registrar_exclusao
+
+from .models import Lancamento
+from .resumo import CAMPOS_RESUMO, estado_resumo, estado_resumo_de, registrar_alteracao
+from .saldos import CAMPOS_SALDO, movimento_conta, movimento_conta_de, registrar_movimento
+
+CAMPOS_MONITORADOS = tuple(dict.fromkeys(CAMPOS_RESUMO + CAMPOS_SALDO))
+
+
+def _altera_campos_monitorados(update_fields):
+    if update_fields is None:
+        return True
+    campos = {campo.removesuffix('_id') for campo in CAMPOS_MONITORADOS}
+    return bool(set(update_fields) & (campos | set(CAMPOS_MONITORADOS)))
+
+
+@receiver(pre_save, sender=Lancamento, dispatch_uid='financeiro_lancamento_estado_anterior')
+def guardar_estado_anterior(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._estado_resumo_anterior = None
+    instance._movimento_conta_anterior = None
+    if raw or instance.pk is None or not _altera_campos_monitorados(update_fields):
+        return
+    anterior = Lancamento.objects.filter(pk=instance.pk).values(*CAMPOS_MONITORADOS).first()
+    if anterior:
+        instance._estado_resumo_anterior = estado_resumo(*(anterior[campo] for campo in CAMPOS_RESUMO))
+        instance._movimento_conta_anterior = movimento_conta(*(anterior[campo] for campo in CAMPOS_SALDO))
+
+
+@receiver(post_save, sender=Lancamento, dispatch_uid='financeiro_lancamento_salvo')
+def atualizar_agregados_lancamento(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or not _altera_campos_monitorados(update_fields):
+        return
+    registrar_alteracao(getattr(instance, '_estado_resumo_anterior', None), estado_resumo_de(instance))
+    registrar_movimento(getattr(instance, '_movimento_conta_anterior', None), movimento_conta_de(instance))
+
+
+@receiver(post_delete, sender=Lancamento, dispatch_uid='financeiro_lancamento_removido')
+def remover_dos_agregados(sender, instance, **kwargs):
+    registrar_alteracao(estado_resumo_de(instance), None)
+    registrar_movimento(movimento_conta_de(instance), None)
+
+
+@receiver(pre_delete, sender=Lancamento, dispatch_uid='financeiro_lancamento_exclusao_sincronizacao')
+def registrar_exclusao_lancamento(sender, instance, **kwargs):
+    registrar_exclusao('lancamentos', instance)
@@ -1,4 +1,5 @@
 from datetime import timedelta
+from decimal import Decimal
 
 from django.urls import reverse
 from django.utils import timezone
@@ -7,7 +8,16 @@ from rest_framework.test import APITestCase
 
 from accounts.models import Usuario
 from processos.models import Cliente, Processo, TipoProcesso
-from financeiro.models import Lancamento, ApontamentoTempo
+from financeiro.models import ApontamentoTempo, ContaBancaria, Fatura, Lancamento, RegraCobranca, ResumoMensalLancamento
+from financeiro.resumo import (
+    alterar_status_em_lote,
+    linhas_agrupadas,
+    linhas_materializadas,
+    montar_resumo,
+    reconstruir_resumo_mensal,
+)
+from financeiro.faturamento import proximo_numero_fatura, reservar_numeros_fatura
+from financeiro.saldos import reconciliar_saldos
 
 
 class FinanceiroCobrancaApiTest(APITestCase):
@@ -116,3 +126,198 @@ class FinanceiroCobrancaApiTest(APITestCase):
 
         despesa = Lancamento.objects.get(pk=despesa_id)
         self.assertIsNotNone(despesa.faturado_em)
+
+
+class DashboardFinanceiroResumoTest(APITestCase):
+    def setUp(self):
+        self.admin = Usuario.objects.create_user(username='dash_admin', password='pass', papel='administrador')
+        self.cliente = Cliente.objects.create(nome='Cliente Dashboard', tipo='pf', responsavel=self.admin)
+        self.hoje = timezone.localdate()
+
+    def _lancar(self, tipo, valor, vencimento, status='pendente', pagamento=None):
+        return Lancamento.objects.create(
+            cliente=self.cliente,
+            tipo=tipo,
+            descricao=f'{tipo} {valor}',
+            valor=Decimal(valor),
+            data_vencimento=vencimento,
+            data_pagamento=pagamento,
+            status=status,
+            criado_por=self.admin,
+        )
+
+    def test_resumo_materializado_acompanha_alteracoes_e_bate_com_consulta_agrupada(self):
+        self._lancar('honorario', '1000.00', self.hoje, status='pago', pagamento=self.hoje)
+        self._lancar('despesa', '200.00', self.hoje - timedelta(days=70), status='pago', pagamento=self.hoje - timedelta(days=60))
+        vencido = self._lancar('receber', '300.00', self.hoje - timedelta(days=40))
+        self._lancar('pagar', '150.00', self.hoje + timedelta(days=3))
+        removido = self._lancar('receber', '999.00', self.hoje + timedelta(days=10))
+
+        pago_depois = self._lancar('receber', '400.00', self.hoje + timedelta(days=1))
+        pago_depois.status = 'pago'
+        pago_depois.data_pagamento = self.hoje
+        pago_depois.save()
+        removido.delete()
+        alterar_status_em_lote(Lancamento.objects.filter(pk=vencido.pk), 'atrasado')
+
+        esperado = montar_resumo(linhas_agrupadas(Lancamento.objects.all(), self.hoje), self.hoje)
+        self.assertEqual(montar_resumo(linhas_materializadas(self.hoje), self.hoje), esperado)
+        self.assertEqual(esperado['pago'], Decimal('1600.00'))
+        self.assertEqual(esperado['atrasado'], Decimal('300.00'))
+        self.assertEqual(esperado['receitas_mes'], Decimal('1400.00'))
+
+        linhas = ResumoMensalLancamento.objects.filter(quantidade__gt=0).count()
+        self.assertEqual(reconstruir_resumo_mensal(), linhas)
+        self.assertEqual(montar_resumo(linhas_materializadas(self.hoje), self.hoje), esperado)
+
+        self.client.force_authenticate(user=self.admin)
+        with self.assertNumQueries(9):
+            response = self.client.get(reverse('lancamento-dashboard'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['totais']['pago'], 1600.0)
+        self.assertEqual(response.data['atrasados_count'], 1)
+        self.assertEqual(response.data['saldo_total'], 1200.0)
+        self.assertEqual(len(response.data['grafico_6_meses']), 6)
+
+
+class SaldoContaBancariaTest(APITestCase):
+    def setUp(self):
+        self.admin = Usuario.objects.create_user(username='saldo_admin', password='pass', papel='administrador')
+        self.cliente = Cliente.objects.create(nome='Cliente Saldo', tipo='pf', responsavel=self.admin)
+        self.conta = ContaBancaria.objects.create(nome='Conta Principal', saldo_inicial=Decimal('100.00'), criado_por=self.admin)
+        self.hoje = timezone.localdate()
+        self.client.force_authenticate(user=self.admin)
+
+    def _lancar(self, tipo, valor, dias_atras, status='pago'):
+        data = self.hoje - timedelta(days=dias_atras)
+        return Lancamento.objects.create(
+            cliente=self.cliente,
+            conta_bancaria=self.conta,
+            tipo=tipo,
+            descricao=f'{tipo} {valor}',
+            valor=Decimal(valor),
+            data_vencimento=data,
+            data_pagamento=data if status == 'pago' else None,
+            status=status,
+            criado_por=self.admin,
+        )
+
+    def test_saldo_armazenado_livro_diario_e_reconciliacao(self):
+        self._lancar('honorario', '500.00', 10)
+        despesa = self._lancar('despesa', '200.00', 5)
+        pendente = self._lancar('receber', '300.00', 0, status='pendente')
+
+        response = self.client.post(
+            reverse('lancamento-baixar', args=[pendente.pk]),
+            {'data_pagamento': self.hoje.isoformat()},
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        despesa.valor = Decimal('250.00')
+        despesa.save()
+        self._lancar('despesa', '999.00', 1).delete()
+
+        self.conta.refresh_from_db()
+        self.assertEqual(self.conta.saldo, Decimal('650.00'))
+        self.assertEqual(self.conta.saldo_em(self.hoje - timedelta(days=7)), Decimal('600.00'))
+        self.assertEqual(self.conta.saldo_em(self.hoje - timedelta(days=1)), Decimal('350.00'))
+        self.assertEqual(reconciliar_saldos(), [])
+
+        response = self.client.get(
+            reverse('conta-bancaria-extrato', args=[self.conta.pk]),
+            {'data': (self.hoje - timedelta(days=7)).isoformat()},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['saldo'], 650.0)
+        self.assertEqual(response.data['saldo_na_data'], 600.0)
+        self.assertEqual(response.data['saldos_diarios'][0]['saldo'], 650.0)
+
+        ContaBancaria.objects.filter(pk=self.conta.pk).update(saldo_movimentado=Decimal('0'))
+        self.assertEqual(len(reconciliar_saldos(corrigir=True)), 1)
+        self.assertEqual(reconciliar_saldos(), [])
+        self.conta.refresh_from_db()
+        self.assertEqual(self.conta.saldo, Decimal('650.00'))
+
+        # Uma gravação comum da conta, com saldo carregado antes de um
+        # movimento, não desfaz o movimento.
+        carregada = ContaBancaria.objects.get(pk=self.conta.pk)
+        self._lancar('honorario', '50.00', 0)
+        carregada.nome = 'Conta renomeada'
+        carregada.save()
+        self.conta.refresh_from_db()
+        self.assertEqual(self.conta.nome, 'Conta renomeada')
+        self.assertEqual(self.conta.saldo, Decimal('700.00'))
+
+
+class FaturamentoLoteApiTest(APITestCase):
+    def setUp(self):
+        self.admin = Usuario.objects.create_user(username='lote_admin', password='pass', papel='administrador')
+        self.hoje = timezone.localdate()
+        self.clientes = [
+            Cliente.objects.create(nome=f'Cliente Lote {i}', tipo='pf', responsavel=self.admin)
+            for i in range(3)
+        ]
+        for cliente in self.clientes[:2]:
+            for minutos in (60, 90):
+                ApontamentoTempo.objects.create(
+                    cliente=cliente,
+                    descricao='Reunião',
+                    minutos=minutos,
+                    valor_hora=Decimal('200.00'),
+                    data=self.hoje,
+                )
+        RegraCobranca.objects.create(
+            cliente=self.clientes[2],
+            titulo='Mensalidade',
+            tipo_cobranca='recorrencia',
+            valor_recorrente=Decimal('1500.00'),
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def test_gera_um_rascunho_por_cliente_sem_duplicar_itens(self):
+        payload = {'periodo_inicio': self.hoje.replace(day=1).isoformat(), 'periodo_fim': self.hoje.isoformat()}
+        response = self.client.post(reverse('fatura-gerar-lote'), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['quantidade'], 3)
+        self.assertEqual(response.data['total'], 500.0 + 500.0 + 1500.0)
+
+        fatura = Fatura.objects.get(cliente=self.clientes[0])
+        self.assertEqual(fatura.status, 'rascunho')
+        self.assertEqual(fatura.itens.count(), 2)
+        self.assertEqual(fatura.subtotal_tempo, Decimal('500.00'))
+
+        response = self.client.post(reverse('fatura-gerar-lote'), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['quantidade'], 0)
+        self.assertEqual(Fatura.objects.count(), 3)
+
+    def test_filtros_e_periodo_invalidos(self):
+        for valor in ('recorrencia', ['recorrencia', 7], ['mensal']):
+            response = self.client.post(reverse('fatura-gerar-lote'), {'tipos_cobranca': valor}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        invertido = {'periodo_inicio': self.hoje.isoformat(), 'periodo_fim': (self.hoje - timedelta(days=1)).isoformat()}
+        response = self.client.post(reverse('fatura-gerar-lote'), invertido, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Fatura.objects.exists())
+
+        response = self.client.post(reverse('fatura-gerar-lote'), {'tipos_cobranca': ['recorrencia']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([f['cliente'] for f in response.data['faturas']], [self.clientes[2].id])
+
+    def test_sequencia_continua_numeracao_existente_e_reserva_faixas(self):
+        base = f'FAT-{self.hoje:%Y%m%d}'
+        Fatura.objects.create(
+            numero=f'{base}-007',
+            cliente=self.clientes[0],
+            data_vencimento=self.hoje,
+        )
+        self.assertEqual(reservar_numeros_fatura(3), [f'{base}-008', f'{base}-009', f'{base}-010'])
+        self.assertEqual(proximo_numero_fatura(), f'{base}-011')
+
+        response = self.client.post(reverse('fatura-gerar-lote'), {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            sorted(f['numero'] for f in response.data['faturas']),
+            [f'{base}-012', f'{base}-013', f'{base}-014'],
+        )
@@ -7,6 +7,7 @@ from django.utils import timezone
 from accounts.permissions import usuario_pode_escrever
 from .models import Lancamento, LancamentoArquivo
 from .forms import LancamentoForm, LancamentoArquivoUploadForm
+from .resumo import alterar_status_em_lote
 from processos.models import Processo
 
 
@@ -66,7 +67,7 @@ def lista_lancamentos(request):
     hoje = timezone.now().date()
     ids_atrasados = list(qs.filter(status='pendente', data_vencimento__lt=hoje).values_list('id', flat=True))
     if ids_atrasados:
-        Lancamento.objects.filter(id__in=ids_atrasados).update(status='atrasado')
+        alterar_status_em_lote(Lancamento.objects.filter(id__in=ids_atrasados), 'atrasado')
         qs = _lancamentos_usuario(request.user)
 
     return render(request, 'financeiro/lista_lancamentos.html', {
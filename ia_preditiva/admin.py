@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import AnaliseRisco, IAEventoSistema
+from .models import AnaliseRisco, IAEventoSistema, TarefaIA
 
 
 @admin.register(AnaliseRisco)
@@ -13,3 +13,10 @@ class IAEventoSistemaAdmin(admin.ModelAdmin):
     list_display = ('tipo', 'severidade', 'mensagem', 'resolvido', 'criado_em')
     list_filter = ('tipo', 'severidade', 'resolvido')
     search_fields = ('mensagem', 'rota')
+
+
+@admin.register(TarefaIA)
+class TarefaIAAdmin(admin.ModelAdmin):
+    list_display = ('id', 'tipo', 'status', 'usuario', 'criado_em', 'concluida_em')
+    list_filter = ('tipo', 'status')
+    readonly_fields = ('criado_em', 'concluida_em')
@@ -3,7 +3,6 @@ import os
 import re
 from datetime import timedelta
 
-from django.conf import settings
 from django.db.models import Q
 from django.utils import timezone
 from rest_framework import status, viewsets
@@ -15,21 +14,23 @@ from rest_framework.throttling import UserRateThrottle
 
 from agenda.models import Compromisso
 from accounts.permissions import IsAdvogadoOuAdministradorWrite
-from accounts.rbac import processos_visiveis_queryset
+from accounts.rbac import processos_visiveis_ids, processos_visiveis_queryset
 from consulta_tribunais.models import ConsultaProcesso
+from consulta_tribunais.services import cache_ia, limite_groq
+from core.long_poll import aguardar_conclusao, segundos_aguardar
 from financeiro.models import Lancamento
+from jurisprudencia.busca import buscar_documentos
 from jurisprudencia.models import Documento
 from processos.models import Cliente, Processo
 
-from .models import AnaliseRisco, IAEventoSistema
-from .serializers import AnaliseRiscoSerializer, IAEventoSistemaSerializer
+from .models import AnaliseRisco, IAEventoSistema, TarefaIA
+from .risco import justificativa_padrao, probabilidade_exito
+from .serializers import AnaliseRiscoSerializer, IAEventoSistemaSerializer, TarefaIASerializer
+from .similaridade import ranquear_similares, texto_indexavel, tokenizar
+from .streaming import eventos_ia, resposta_sse, streaming_solicitado
+from .tarefas import assincrono_disponivel, assincrono_solicitado, expirar_se_parada, submeter_tarefa
 from .tasks import gerar_resposta_ia
 
-try:
-    from celery.exceptions import TimeoutError as CeleryTimeoutError
-except Exception:  # pragma: no cover - fallback quando Celery não está instalado
-    CeleryTimeoutError = TimeoutError
-
 logger = logging.getLogger(__name__)
 
 
@@ -44,23 +45,31 @@ def _resposta_fallback_ia():
     )
 
 
-def _gerar_resposta_ia(messages, temperature=0.2, max_tokens=1200):
+def _gerar_resposta_ia(messages, temperature=0.2, max_tokens=1200, usar_cache=True):
+    """
+    Resposta síncrona, gerada no próprio processo: esperar uma task do Celery
+    aqui só ocuparia dois workers com o mesmo pedido. Para não segurar a
+    requisição, use `assincrono=true` (ver tarefas.py).
+    """
     groq_api_key = os.getenv('GROQ_API_KEY')
     if not groq_api_key:
         return ''
 
-    timeout = int(getattr(settings, 'IA_CELERY_RESULT_TIMEOUT', 20))
-    use_celery = bool(getattr(settings, 'IA_USE_CELERY', False))
+    return gerar_resposta_ia.run(messages, temperature=temperature, max_tokens=max_tokens, usar_cache=usar_cache) or ''
 
-    if use_celery:
-        try:
-            return gerar_resposta_ia.delay(messages, temperature=temperature, max_tokens=max_tokens).get(timeout=timeout) or ''
-        except CeleryTimeoutError:
-            logger.warning('Timeout ao aguardar task Celery de IA; fallback síncrono.')
-        except Exception:
-            logger.exception('Falha ao executar task Celery de IA; fallback síncrono.')
 
-    return gerar_resposta_ia.run(messages, temperature=temperature, max_tokens=max_tokens) or ''
+def _submeter_tarefa(request, *args, **kwargs):
+    """202 com a TarefaIA criada (ver tarefas.py), ou 503 sem workers do Celery."""
+    if not assincrono_disponivel():
+        return Response(
+            {'error': 'Modo assíncrono indisponível: ative IA_USE_CELERY ou envie o pedido sem "assincrono".'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+    tarefa = submeter_tarefa(request.user, *args, **kwargs)
+    return Response(
+        TarefaIASerializer(tarefa, context={'request': request}).data,
+        status=status.HTTP_202_ACCEPTED,
+    )
 
 
 def _safe_int(value):
@@ -70,31 +79,6 @@ def _safe_int(value):
         return None
 
 
-def _tokenizar(texto):
-    if not texto:
-        return set()
-    stop = {
-        'para', 'com', 'das', 'dos', 'que', 'uma', 'por', 'não', 'nos',
-        'nas', 'ser', 'sua', 'seu', 'sobre', 'entre', 'processo', 'cliente',
-        'demanda', 'caso', 'juridico', 'jurídico', 'legal', 'ação', 'acao',
-    }
-    termos = {
-        t for t in re.split(r'[^\wÀ-ÿ]+', str(texto).lower())
-        if len(t) >= 4 and t not in stop
-    }
-    return termos
-
-
-def _similaridade(a, b):
-    if not a or not b:
-        return 0.0
-    inter = len(a & b)
-    den = max(len(a), len(b))
-    if den == 0:
-        return 0.0
-    return inter / den
-
-
 def _nivel_risco(probabilidade_sucesso):
     valor = float(probabilidade_sucesso or 0)
     if valor >= 70:
@@ -113,11 +97,11 @@ def _user_clientes_queryset(user):
     qs = Cliente.objects.all()
     if user.is_administrador():
         return qs
-    processos_ids = processos_visiveis_queryset(Processo.objects.all(), user).values_list('id', flat=True)
+    clientes_ids = Processo.objects.filter(id__in=processos_visiveis_ids(user)).values('cliente_id')
     return qs.filter(
-        Q(processos__id__in=processos_ids)
+        Q(pk__in=clientes_ids)
         | Q(responsavel=user)
-    ).distinct()
+    )
 
 
 def _buscar_jurisprudencia_superior(usuario, termos, limite=8):
@@ -143,13 +127,7 @@ def _buscar_jurisprudencia_superior(usuario, termos, limite=8):
             | Q(processo_referencia__isnull=True)
         ).distinct()
 
-    termo_query = Q()
-    for termo in termos:
-        termo_query |= Q(titulo__icontains=termo)
-        termo_query |= Q(conteudo__icontains=termo)
-        termo_query |= Q(tags__icontains=termo)
-
-    docs = docs_qs.filter(termo_query).order_by('-criado_em')[:limite]
+    docs = buscar_documentos(docs_qs, ' '.join(termos))[:limite]
     resultado = []
     for doc in docs:
         resultado.append({
@@ -172,7 +150,7 @@ def _buscar_jurisprudencia_superior(usuario, termos, limite=8):
     for consulta in consultas.order_by('-data_consulta')[:limite]:
         dados = consulta.dados_processo or {}
         blob = f"{dados.get('classe', '')} {' '.join(dados.get('assuntos', []) if isinstance(dados.get('assuntos'), list) else [])}"
-        tokens = _tokenizar(blob)
+        tokens = tokenizar(blob)
         if not any(t in tokens for t in termos):
             continue
         resultado.append({
@@ -190,17 +168,6 @@ def _buscar_jurisprudencia_superior(usuario, termos, limite=8):
     return resultado[:limite]
 
 
-def _movimentacao_favoravel(processo):
-    favoravel_kw = [
-        'procedente', 'provido', 'ganho', 'deferido', 'acolhido', 'favorável', 'favoravel'
-    ]
-    for mov in processo.movimentacoes.all():
-        texto = f"{mov.titulo or ''} {mov.descricao or ''}".lower()
-        if any(k in texto for k in favoravel_kw):
-            return True
-    return False
-
-
 def _heuristica_revisao_texto(texto):
     texto = (texto or '').strip()
     erros_gramatica = []
@@ -304,10 +271,35 @@ def ia_chat(request):
                 mensagens.append({'role': role, 'content': content})
         mensagens.append({'role': 'user', 'content': mensagem})
 
+        if streaming_solicitado(request):
+            return resposta_sse(request, eventos_ia(
+                mensagens,
+                0.25,
+                1700,
+                cache_ia.usar_cache_na_requisicao(request),
+                lambda texto: {'resposta': texto} if texto else {'resposta': _resposta_fallback_ia(), 'fallback': True},
+                usuario=request.user,
+                rota='/api/v1/ia/chat/',
+                mensagem='Falha no endpoint de chat IA',
+                detalhes={'usuario': request.user.id},
+            ))
+        if assincrono_solicitado(request):
+            return _submeter_tarefa(
+                request,
+                'chat',
+                mensagens,
+                0.25,
+                1700,
+                cache_ia.usar_cache_na_requisicao(request),
+                'resposta',
+                contingencia={'resposta': _resposta_fallback_ia(), 'fallback': True},
+            )
+
         resposta = _gerar_resposta_ia(
             mensagens,
             temperature=0.25,
             max_tokens=1700,
+            usar_cache=cache_ia.usar_cache_na_requisicao(request),
         )
         if not resposta:
             raise RuntimeError('Resposta vazia da IA')
@@ -363,12 +355,8 @@ def ia_sugerir(request):
     if not termo:
         return Response({'sugestoes': []}, status=status.HTTP_200_OK)
 
-    tokens = list(_tokenizar(termo))[:6]
-    query = Q()
-    for t in tokens or [termo]:
-        query |= Q(titulo__icontains=t) | Q(conteudo__icontains=t) | Q(tags__icontains=t)
-
-    qs = Documento.objects.filter(query)
+    tokens = list(tokenizar(termo))[:6]
+    qs = Documento.objects.all()
     if not request.user.is_administrador():
         qs = qs.filter(
             Q(processo_referencia__advogado=request.user)
@@ -378,7 +366,7 @@ def ia_sugerir(request):
         ).distinct()
 
     sugestoes = []
-    for doc in qs.order_by('-criado_em')[:12]:
+    for doc in buscar_documentos(qs, ' '.join(tokens) or termo)[:12]:
         sugestoes.append({
             'id': doc.id,
             'titulo': doc.titulo,
@@ -419,27 +407,18 @@ class AnaliseRiscoViewSet(viewsets.ReadOnlyModelViewSet):
         return processo
 
     def _similares_internos(self, processo=None, demanda=''):
-        base_qs = _user_processos_queryset(self.request.user)
-        if processo:
-            base_qs = base_qs.exclude(id=processo.id)
-            referencia = ' '.join(filter(None, [
-                processo.objeto,
-                processo.cliente.demanda if processo.cliente else '',
-                processo.tipo.nome if processo.tipo else '',
-            ]))
-        else:
-            referencia = demanda
-
-        tokens_ref = _tokenizar(referencia)
+        base_qs = processos_visiveis_queryset(Processo.objects.all(), self.request.user)
+        referencia = texto_indexavel(processo) if processo else demanda
+        ranking = ranquear_similares(
+            tokenizar(referencia),
+            base_qs,
+            excluir_id=processo.id if processo else None,
+        )
+        itens = Processo.objects.select_related('cliente', 'tipo').in_bulk([pid for pid, _ in ranking])
         similares = []
-        for item in base_qs.select_related('cliente', 'tipo').order_by('-criado_em')[:250]:
-            texto_item = ' '.join(filter(None, [
-                item.objeto,
-                item.cliente.demanda if item.cliente else '',
-                item.tipo.nome if item.tipo else '',
-            ]))
-            score = _similaridade(tokens_ref, _tokenizar(texto_item))
-            if score < 0.2:
+        for processo_id, score in ranking:
+            item = itens.get(processo_id)
+            if not item:
                 continue
             similares.append({
                 'id': item.id,
@@ -449,8 +428,7 @@ class AnaliseRiscoViewSet(viewsets.ReadOnlyModelViewSet):
                 'status': item.status,
                 'score_similaridade': round(score * 100, 1),
             })
-        similares.sort(key=lambda x: x['score_similaridade'], reverse=True)
-        return similares[:12]
+        return similares
 
     @action(detail=False, methods=['post'])
     def analisar_processo(self, request):
@@ -464,25 +442,19 @@ class AnaliseRiscoViewSet(viewsets.ReadOnlyModelViewSet):
         total_similares = len(similares)
         finalizados_ids = [s['id'] for s in similares]
         finalizados_qs = _user_processos_queryset(request.user).filter(id__in=finalizados_ids, status='finalizado')
-        vitorias = sum(1 for p in finalizados_qs if _movimentacao_favoravel(p))
-
-        base = 55.0
-        if total_similares > 0:
-            base = 45.0 + (vitorias / max(total_similares, 1)) * 45.0
-        if processo.status == 'suspenso':
-            base -= 10
-        if processo.status == 'arquivado':
-            base -= 20
-        if processo.etapa_workflow in {'execucao', 'encerramento'}:
-            base += 5
+        vitorias = finalizados_qs.filter(resultado='favoravel').count()
 
         hoje = timezone.localdate()
         prazos_atrasados = processo.compromissos.filter(tipo='prazo', status='pendente', data__lt=hoje).count()
         tarefas_atrasadas = processo.tarefas.filter(status='pendente', prazo_em__lt=timezone.now()).count()
-        base -= min(20, prazos_atrasados * 6)
-        base -= min(15, tarefas_atrasadas * 4)
-
-        prob = round(max(5.0, min(95.0, base)), 2)
+        prob = probabilidade_exito(
+            total_similares,
+            vitorias,
+            processo.status,
+            processo.etapa_workflow,
+            prazos_atrasados,
+            tarefas_atrasadas,
+        )
 
         fatores_risco = []
         pontos_favoraveis = []
@@ -505,18 +477,14 @@ class AnaliseRiscoViewSet(viewsets.ReadOnlyModelViewSet):
         if not fatores_risco:
             pontos_favoraveis.append('Não foram encontrados riscos operacionais críticos imediatos.')
 
-        termos = list(_tokenizar(' '.join(filter(None, [
+        termos = list(tokenizar(' '.join(filter(None, [
             processo.objeto,
             processo.tipo.nome if processo.tipo else '',
             processo.cliente.demanda if processo.cliente else '',
         ]))))[:8]
         jurisprudencias = _buscar_jurisprudencia_superior(request.user, termos, limite=8)
 
-        justificativa = (
-            f'Probabilidade baseada em {total_similares} similar(es) interno(s), '
-            f'com {vitorias} desfecho(s) favorável(is), considerando status, '
-            f'etapa do workflow e pendências de prazo/tarefas.'
-        )
+        justificativa = justificativa_padrao(total_similares, vitorias)
 
         groq_api_key = os.getenv('GROQ_API_KEY')
         if groq_api_key:
@@ -543,6 +511,7 @@ class AnaliseRiscoViewSet(viewsets.ReadOnlyModelViewSet):
                     ],
                     temperature=0.2,
                     max_tokens=900,
+                    usar_cache=cache_ia.usar_cache_na_requisicao(request),
                 )
                 justificativa = resposta or justificativa
             except Exception:
@@ -613,7 +582,7 @@ class AnaliseRiscoViewSet(viewsets.ReadOnlyModelViewSet):
 
         prob = round(max(5.0, min(95.0, base)), 2)
 
-        termos = list(_tokenizar(' '.join(filter(None, [cliente.demanda, cliente.observacoes, demanda]))))[:8]
+        termos = list(tokenizar(' '.join(filter(None, [cliente.demanda, cliente.observacoes, demanda]))))[:8]
         jurisprudencias = _buscar_jurisprudencia_superior(request.user, termos, limite=8)
 
         return Response({
@@ -647,7 +616,7 @@ class AnaliseRiscoViewSet(viewsets.ReadOnlyModelViewSet):
         similares = self._similares_internos(demanda=demanda)
         finalizados_ids = [s['id'] for s in similares]
         finalizados_qs = _user_processos_queryset(request.user).filter(id__in=finalizados_ids, status='finalizado')
-        vitorias = sum(1 for p in finalizados_qs if _movimentacao_favoravel(p))
+        vitorias = finalizados_qs.filter(resultado='favoravel').count()
         total = len(similares)
 
         prob = 50.0
@@ -655,7 +624,7 @@ class AnaliseRiscoViewSet(viewsets.ReadOnlyModelViewSet):
             prob = 40.0 + (vitorias / max(total, 1)) * 50.0
         prob = round(max(5.0, min(95.0, prob)), 2)
 
-        termos = list(_tokenizar(demanda))[:8]
+        termos = list(tokenizar(demanda))[:8]
         jurisprudencias = _buscar_jurisprudencia_superior(request.user, termos, limite=8)
 
         return Response({
@@ -697,7 +666,7 @@ class AnaliseRiscoViewSet(viewsets.ReadOnlyModelViewSet):
 
         if processo_id:
             processo = self._resolver_processo(processo_id)
-            termos.extend(list(_tokenizar(' '.join(filter(None, [
+            termos.extend(list(tokenizar(' '.join(filter(None, [
                 processo.objeto,
                 processo.tipo.nome if processo.tipo else '',
                 processo.cliente.demanda if processo.cliente else '',
@@ -706,9 +675,9 @@ class AnaliseRiscoViewSet(viewsets.ReadOnlyModelViewSet):
             cliente = _user_clientes_queryset(request.user).filter(id=cliente_id).first()
             if not cliente:
                 raise PermissionDenied('Cliente não disponível para seu perfil.')
-            termos.extend(list(_tokenizar(' '.join(filter(None, [cliente.demanda, cliente.observacoes])))))
+            termos.extend(list(tokenizar(' '.join(filter(None, [cliente.demanda, cliente.observacoes])))))
         if demanda:
-            termos.extend(list(_tokenizar(demanda)))
+            termos.extend(list(tokenizar(demanda)))
 
         termos = list(dict.fromkeys(termos))[:12]
         if not termos:
@@ -758,29 +727,59 @@ class AnaliseRiscoViewSet(viewsets.ReadOnlyModelViewSet):
             '- Termos em que, pede deferimento.'
         )
 
+        def resposta(texto):
+            return {
+                'tipo_peca': tipo_peca,
+                'processo_id': processo.id if processo else None,
+                'texto': texto or template,
+                'contexto': contexto,
+            }
+
+        prompt = (
+            f'Redija uma minuta de {tipo_peca} em português jurídico formal.\n'
+            f'Contexto: {contexto}\n'
+            f'Objetivo: {objetivo}\n'
+            f'Tese principal: {tese}\n'
+            f'Pedidos:\n{pedidos_txt or "- conforme contexto"}\n'
+            'Estruture em Fatos, Direito, Pedidos e Requerimentos Finais.'
+        )
+        mensagens = [
+            {
+                'role': 'system',
+                'content': 'Você é um redator jurídico brasileiro especializado em peças processuais.',
+            },
+            {'role': 'user', 'content': prompt},
+        ]
+
         texto = template
         groq_api_key = os.getenv('GROQ_API_KEY')
+        if groq_api_key and streaming_solicitado(request):
+            return resposta_sse(request, eventos_ia(
+                mensagens, 0.2, 1800, cache_ia.usar_cache_na_requisicao(request), resposta,
+                usuario=request.user,
+                rota='/api/v1/ia/analises/redigir-peca/',
+                mensagem='Falha ao redigir peça com IA',
+                detalhes={'processo_id': processo_id, 'tipo_peca': tipo_peca},
+            ))
+        if groq_api_key and assincrono_solicitado(request):
+            return _submeter_tarefa(
+                request,
+                'redigir_peca',
+                mensagens,
+                0.2,
+                1800,
+                cache_ia.usar_cache_na_requisicao(request),
+                'texto',
+                resposta_base=resposta(template),
+            )
         if groq_api_key:
             try:
-                prompt = (
-                    f'Redija uma minuta de {tipo_peca} em português jurídico formal.\n'
-                    f'Contexto: {contexto}\n'
-                    f'Objetivo: {objetivo}\n'
-                    f'Tese principal: {tese}\n'
-                    f'Pedidos:\n{pedidos_txt or "- conforme contexto"}\n'
-                    'Estruture em Fatos, Direito, Pedidos e Requerimentos Finais.'
-                )
                 texto_ia = (
                     _gerar_resposta_ia(
-                        [
-                            {
-                                'role': 'system',
-                                'content': 'Você é um redator jurídico brasileiro especializado em peças processuais.',
-                            },
-                            {'role': 'user', 'content': prompt},
-                        ],
+                        mensagens,
                         temperature=0.2,
                         max_tokens=1800,
+                        usar_cache=cache_ia.usar_cache_na_requisicao(request),
                     )
                     or ''
                 ).strip()
@@ -797,12 +796,7 @@ class AnaliseRiscoViewSet(viewsets.ReadOnlyModelViewSet):
                     criado_por=request.user,
                 )
 
-        return Response({
-            'tipo_peca': tipo_peca,
-            'processo_id': processo.id if processo else None,
-            'texto': texto,
-            'contexto': contexto,
-        })
+        return Response(resposta(texto))
 
     @action(detail=False, methods=['post'], url_path='revisar-peca')
     def revisar_peca(self, request):
@@ -813,34 +807,59 @@ class AnaliseRiscoViewSet(viewsets.ReadOnlyModelViewSet):
         tipo_peca = (request.data.get('tipo_peca') or 'peticao').strip().lower()
         revisao = _heuristica_revisao_texto(texto)
 
+        def resposta(comentario_ia):
+            return {
+                'tipo_peca': tipo_peca,
+                **revisao,
+                'comentario_ia': comentario_ia,
+            }
+
+        prompt = (
+            f'Revise a seguinte peça ({tipo_peca}) e aponte em tópicos: '\
+            '1) gramática, 2) lógica jurídica, 3) riscos de indeferimento, 4) melhorias de redação.\n\n'
+            f'TEXTO:\n{texto[:6000]}'
+        )
+        mensagens = [
+            {
+                'role': 'system',
+                'content': 'Você é revisor jurídico técnico e objetivo. Responda em português.',
+            },
+            {'role': 'user', 'content': prompt},
+        ]
+
         comentario_ia = ''
         groq_api_key = os.getenv('GROQ_API_KEY')
+        if groq_api_key and streaming_solicitado(request):
+            return resposta_sse(request, eventos_ia(
+                mensagens, 0.15, 1200, cache_ia.usar_cache_na_requisicao(request), resposta,
+                usuario=request.user,
+                rota='/api/v1/ia/analises/revisar-peca/',
+                mensagem='Falha ao revisar peça com IA',
+                detalhes={'tipo_peca': tipo_peca},
+            ))
+        if groq_api_key and assincrono_solicitado(request):
+            return _submeter_tarefa(
+                request,
+                'revisar_peca',
+                mensagens,
+                0.15,
+                1200,
+                cache_ia.usar_cache_na_requisicao(request),
+                'comentario_ia',
+                resposta_base=resposta(''),
+            )
         if groq_api_key:
             try:
-                prompt = (
-                    f'Revise a seguinte peça ({tipo_peca}) e aponte em tópicos: '\
-                    '1) gramática, 2) lógica jurídica, 3) riscos de indeferimento, 4) melhorias de redação.\n\n'
-                    f'TEXTO:\n{texto[:6000]}'
-                )
                 comentario_ia = _gerar_resposta_ia(
-                    [
-                        {
-                            'role': 'system',
-                            'content': 'Você é revisor jurídico técnico e objetivo. Responda em português.',
-                        },
-                        {'role': 'user', 'content': prompt},
-                    ],
+                    mensagens,
                     temperature=0.15,
                     max_tokens=1200,
+                    usar_cache=cache_ia.usar_cache_na_requisicao(request),
                 ) or ''
             except Exception:
                 logger.exception('Falha em revisar_peca com IA')
 
-        return Response({
-            'tipo_peca': tipo_peca,
-            **revisao,
-            'comentario_ia': comentario_ia,
-        })
+        return Response(resposta(comentario_ia))
 
     @action(detail=False, methods=['get'], url_path='monitoramento')
     def monitoramento(self, request):
@@ -923,6 +942,8 @@ class AnaliseRiscoViewSet(viewsets.ReadOnlyModelViewSet):
             'sistema': {
                 'eventos_abertos': len(eventos),
                 'eventos': eventos,
+                'cache_ia': cache_ia.metricas_cache_ia(),
+                'limite_groq': limite_groq.metricas_limite_groq(),
             },
         })
 
@@ -932,3 +953,25 @@ class AnaliseRiscoViewSet(viewsets.ReadOnlyModelViewSet):
         serializer.is_valid(raise_exception=True)
         evento = serializer.save(criado_por=request.user)
         return Response(IAEventoSistemaSerializer(evento).data, status=status.HTTP_201_CREATED)
+
+
+class TarefaIAViewSet(viewsets.ReadOnlyModelViewSet):
+    """Tarefas de IA do usuário (administradores veem todas)."""
+    serializer_class = TarefaIASerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        qs = TarefaIA.objects.all()
+        if self.request.user.is_administrador():
+            return qs
+        return qs.filter(usuario=self.request.user)
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Situação da tarefa. Com `?aguardar=<segundos>` (até
+        LONG_POLL_MAXIMO_SEGUNDOS), segura a resposta até a tarefa terminar.
+        """
+        tarefa = self.get_object()
+        expirar_se_parada(tarefa)
+        aguardar_conclusao(tarefa, lambda t: t.concluida, segundos_aguardar(request))
+        return Response(self.get_serializer(tarefa).data)
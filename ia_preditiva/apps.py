@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class IaPreditivaConfig(AppConfig):
     name = 'ia_preditiva'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from ia_preditiva.similaridade import reindexar_processos
+from processos.models import Processo
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o índice de termos usado na busca de processos similares.'
+
+    def handle(self, *args, **options):
+        total = reindexar_processos(Processo.objects.order_by('id'))
+        self.stdout.write(
+            self.style.SUCCESS(f'Processos indexados: {total}')
+        )
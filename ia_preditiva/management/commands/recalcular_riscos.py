@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ia_preditiva.risco import recalcular_riscos
+
+
+class Command(BaseCommand):
+    help = 'Recalcula a probabilidade de êxito de todos os processos em lote (vetorizado).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=64, help='Processos comparados por iteração.')
+
+    def handle(self, *args, **options):
+        inicio = time.monotonic()
+        resultado = recalcular_riscos(lote=max(1, options['lote']))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Análises atualizadas: {resultado['atualizadas']}; criadas: {resultado['criadas']} "
+                f'({time.monotonic() - inicio:.1f}s)'
+            )
+        )
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-17 20:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('processos', '0008_processo_segredo_justica_and_more'),
+        ('ia_preditiva', '0003_iaeventosistema'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessoTermo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('termo', models.CharField(max_length=80, verbose_name='Termo')),
+                ('total_termos', models.PositiveIntegerField(default=0, verbose_name='Total de Termos do Processo')),
+                ('processo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='termos_indice', to='processos.processo', verbose_name='Processo')),
+            ],
+            options={
+                'verbose_name': 'Termo Indexado de Processo',
+                'verbose_name_plural': 'Termos Indexados de Processos',
+                'indexes': [models.Index(fields=['termo', 'processo'], name='idx_termo_processo')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='processotermo',
+            constraint=models.UniqueConstraint(fields=('processo', 'termo'), name='uniq_processo_termo_indice'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-17 21:47
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('ia_preditiva', '0004_processotermo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TarefaIA',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('chat', 'Chat'), ('redigir_peca', 'Redação de peça'), ('revisar_peca', 'Revisão de peça')], max_length=20, verbose_name='Tipo')),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('processando', 'Processando'), ('concluida', 'Concluída'), ('erro', 'Erro')], default='pendente', max_length=20, verbose_name='Status')),
+                ('chave', models.CharField(db_index=True, max_length=100, verbose_name='Chave da Requisição')),
+                ('mensagens', models.JSONField(verbose_name='Mensagens')),
+                ('temperatura', models.FloatField(default=0.2, verbose_name='Temperatura')),
+                ('max_tokens', models.PositiveIntegerField(default=1200, verbose_name='Máximo de Tokens')),
+                ('usar_cache', models.BooleanField(default=True, verbose_name='Usar Cache')),
+                ('resposta_base', models.JSONField(blank=True, default=dict, verbose_name='Resposta Base')),
+                ('campo_texto', models.CharField(max_length=50, verbose_name='Campo do Texto')),
+                ('contingencia', models.JSONField(blank=True, default=dict, verbose_name='Resposta de Contingência')),
+                ('resposta', models.JSONField(blank=True, null=True, verbose_name='Resposta')),
+                ('erro', models.TextField(blank=True, verbose_name='Erro')),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('concluida_em', models.DateTimeField(blank=True, null=True, verbose_name='Concluída em')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tarefas_ia', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Tarefa de IA',
+                'verbose_name_plural': 'Tarefas de IA',
+                'ordering': ['-criado_em'],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:10
+
+import re
+
+from django.db import migrations
+
+# Cópia da tokenização de ia_preditiva.similaridade no momento desta
+# migração; o módulo pode mudar depois sem alterar o histórico.
+STOPWORDS = {
+    'para', 'com', 'das', 'dos', 'que', 'uma', 'por', 'não', 'nos',
+    'nas', 'ser', 'sua', 'seu', 'sobre', 'entre', 'processo', 'cliente',
+    'demanda', 'caso', 'juridico', 'jurídico', 'legal', 'ação', 'acao',
+}
+TERMO_MAX_LENGTH = 80
+
+
+def tokenizar(texto):
+    if not texto:
+        return set()
+    return {
+        t[:TERMO_MAX_LENGTH] for t in re.split(r'[^\wÀ-ÿ]+', str(texto).lower())
+        if len(t) >= 4 and t not in STOPWORDS
+    }
+
+
+def indexar_existentes(apps, schema_editor):
+    Processo = apps.get_model('processos', 'Processo')
+    ProcessoTermo = apps.get_model('ia_preditiva', 'ProcessoTermo')
+    pendentes = []
+    for processo in Processo.objects.select_related('cliente', 'tipo').iterator():
+        termos = tokenizar(' '.join(filter(None, [
+            processo.objeto,
+            processo.cliente.demanda if processo.cliente else '',
+            processo.tipo.nome if processo.tipo else '',
+        ])))
+        pendentes.extend(
+            ProcessoTermo(processo_id=processo.pk, termo=termo, total_termos=len(termos))
+            for termo in termos
+        )
+        if len(pendentes) >= 1000:
+            ProcessoTermo.objects.bulk_create(pendentes, ignore_conflicts=True)
+            pendentes = []
+    ProcessoTermo.objects.bulk_create(pendentes, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ia_preditiva', '0005_tarefaia'),
+    ]
+
+    operations = [
+        migrations.RunPython(indexar_existentes, migrations.RunPython.noop),
+    ]
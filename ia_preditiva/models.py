@@ -27,6 +27,31 @@ class AnaliseRisco(models.Model):
         return f'Análise – {self.processo}'
 
 
+class ProcessoTermo(models.Model):
+    """Índice invertido de termos do processo para busca de similares internos."""
+    processo = models.ForeignKey(
+        'processos.Processo',
+        on_delete=models.CASCADE,
+        related_name='termos_indice',
+        verbose_name='Processo',
+    )
+    termo = models.CharField(max_length=80, verbose_name='Termo')
+    total_termos = models.PositiveIntegerField(default=0, verbose_name='Total de Termos do Processo')
+
+    class Meta:
+        verbose_name = 'Termo Indexado de Processo'
+        verbose_name_plural = 'Termos Indexados de Processos'
+        constraints = [
+            models.UniqueConstraint(fields=['processo', 'termo'], name='uniq_processo_termo_indice'),
+        ]
+        indexes = [
+            models.Index(fields=['termo', 'processo'], name='idx_termo_processo'),
+        ]
+
+    def __str__(self):
+        return f'{self.termo} – {self.processo_id}'
+
+
 class IAEventoSistema(models.Model):
     TIPO_CHOICES = [
         ('frontend', 'Frontend'),
@@ -66,3 +91,55 @@ class IAEventoSistema(models.Model):
 
     def __str__(self):
         return f'{self.get_severidade_display()} - {self.mensagem}'
+
+
+class TarefaIA(models.Model):
+    """
+    Pedido à IA processado fora da requisição HTTP (`assincrono=true` no chat,
+    na redação e na revisão de peças). Guarda as mensagens enviadas ao modelo
+    e, ao terminar, o mesmo corpo que o endpoint devolveria de forma síncrona.
+    """
+    TIPO_CHOICES = [
+        ('chat', 'Chat'),
+        ('redigir_peca', 'Redação de peça'),
+        ('revisar_peca', 'Revisão de peça'),
+    ]
+    STATUS_CHOICES = [
+        ('pendente', 'Pendente'),
+        ('processando', 'Processando'),
+        ('concluida', 'Concluída'),
+        ('erro', 'Erro'),
+    ]
+
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='tarefas_ia',
+        verbose_name='Usuário',
+    )
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES, verbose_name='Tipo')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pendente', verbose_name='Status')
+    chave = models.CharField(max_length=100, db_index=True, verbose_name='Chave da Requisição')
+    mensagens = models.JSONField(verbose_name='Mensagens')
+    temperatura = models.FloatField(default=0.2, verbose_name='Temperatura')
+    max_tokens = models.PositiveIntegerField(default=1200, verbose_name='Máximo de Tokens')
+    usar_cache = models.BooleanField(default=True, verbose_name='Usar Cache')
+    resposta_base = models.JSONField(default=dict, blank=True, verbose_name='Resposta Base')
+    campo_texto = models.CharField(max_length=50, verbose_name='Campo do Texto')
+    contingencia = models.JSONField(default=dict, blank=True, verbose_name='Resposta de Contingência')
+    resposta = models.JSONField(blank=True, null=True, verbose_name='Resposta')
+    erro = models.TextField(blank=True, verbose_name='Erro')
+    criado_em = models.DateTimeField(auto_now_add=True)
+    concluida_em = models.DateTimeField(blank=True, null=True, verbose_name='Concluída em')
+
+    class Meta:
+        verbose_name = 'Tarefa de IA'
+        verbose_name_plural = 'Tarefas de IA'
+        ordering = ['-criado_em']
+
+    @property
+    def concluida(self):
+        return self.status in ('concluida', 'erro')
+
+    def __str__(self):
+        return f'{self.get_tipo_display()} #{self.pk} ({self.get_status_display()})'
@@ -0,0 +1,185 @@
+from decimal import Decimal
+
+import numpy as np
+from django.db.models import Count
+from django.utils import timezone
+
+from agenda.models import Compromisso
+from processos.models import Processo, ProcessoTarefa
+
+from .models import AnaliseRisco, ProcessoTermo
+
+LIMITE_SIMILARES = 12
+SCORE_MINIMO_SIMILAR = 0.2
+
+
+def probabilidade_exito(total_similares, vitorias, status, etapa_workflow, prazos_atrasados, tarefas_atrasadas):
+    base = 55.0
+    if total_similares > 0:
+        base = 45.0 + (vitorias / max(total_similares, 1)) * 45.0
+    if status == 'suspenso':
+        base -= 10
+    if status == 'arquivado':
+        base -= 20
+    if etapa_workflow in {'execucao', 'encerramento'}:
+        base += 5
+    base -= min(20, prazos_atrasados * 6)
+    base -= min(15, tarefas_atrasadas * 4)
+    return round(max(5.0, min(95.0, base)), 2)
+
+
+def justificativa_padrao(total_similares, vitorias):
+    return (
+        f'Probabilidade baseada em {total_similares} similar(es) interno(s), '
+        f'com {vitorias} desfecho(s) favorável(is), considerando status, '
+        f'etapa do workflow e pendências de prazo/tarefas.'
+    )
+
+
+def probabilidade_exito_vetorizada(total_similares, vitorias, status, etapa_workflow, prazos_atrasados, tarefas_atrasadas):
+    """Mesma regra de `probabilidade_exito`, aplicada a colunas NumPy."""
+    base = np.where(
+        total_similares > 0,
+        45.0 + (vitorias / np.maximum(total_similares, 1)) * 45.0,
+        55.0,
+    )
+    base -= np.where(status == 'suspenso', 10.0, 0.0)
+    base -= np.where(status == 'arquivado', 20.0, 0.0)
+    base += np.where(np.isin(etapa_workflow, ['execucao', 'encerramento']), 5.0, 0.0)
+    base -= np.minimum(20.0, prazos_atrasados * 6.0)
+    base -= np.minimum(15.0, tarefas_atrasadas * 4.0)
+    return np.round(np.clip(base, 5.0, 95.0), 2)
+
+
+def _contagem_por_processo(queryset, indice):
+    contagem = np.zeros(len(indice), dtype=np.int64)
+    for processo_id, total in queryset.values('processo_id').annotate(total=Count('id')).values_list('processo_id', 'total'):
+        posicao = indice.get(processo_id)
+        if posicao is not None:
+            contagem[posicao] = total
+    return contagem
+
+
+def _matriz_termos(indice):
+    """Postings (processo, termo) do índice invertido em formato CSR por termo e por processo."""
+    linhas = list(ProcessoTermo.objects.values_list('processo_id', 'termo'))
+    if not linhas:
+        vazio = np.zeros(0, dtype=np.int64)
+        return vazio, np.zeros(1, dtype=np.int64), vazio, np.zeros(len(indice) + 1, dtype=np.int64)
+
+    vocabulario = {}
+    docs = np.fromiter((indice.get(pid, -1) for pid, _ in linhas), dtype=np.int64, count=len(linhas))
+    termos = np.fromiter((vocabulario.setdefault(t, len(vocabulario)) for _, t in linhas), dtype=np.int64, count=len(linhas))
+    validos = docs >= 0
+    docs, termos = docs[validos], termos[validos]
+
+    por_termo = np.argsort(termos, kind='stable')
+    docs_por_termo = docs[por_termo]
+    ptr_termo = np.concatenate([[0], np.cumsum(np.bincount(termos, minlength=len(vocabulario)))])
+
+    por_doc = np.argsort(docs, kind='stable')
+    termos_por_doc = termos[por_doc]
+    ptr_doc = np.concatenate([[0], np.cumsum(np.bincount(docs, minlength=len(indice)))])
+    return docs_por_termo, ptr_termo, termos_por_doc, ptr_doc
+
+
+def _expandir_intervalos(inicios, tamanhos):
+    total = int(tamanhos.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    deslocamentos = np.repeat(inicios - np.concatenate([[0], np.cumsum(tamanhos)[:-1]]), tamanhos)
+    return deslocamentos + np.arange(total)
+
+
+def _similares_em_lote(indice, vitoria, lote):
+    """
+    Para cada processo, conta os similares (top 12 com score >= 0.2, mesma
+    regra do endpoint) e quantos deles são vitórias, processando `lote`
+    linhas da matriz de sobreposição de termos por vez.
+    """
+    n = len(indice)
+    total_similares = np.zeros(n, dtype=np.int64)
+    vitorias = np.zeros(n, dtype=np.int64)
+    docs_por_termo, ptr_termo, termos_por_doc, ptr_doc = _matriz_termos(indice)
+    qtd_termos = np.diff(ptr_doc)
+
+    for inicio in range(0, n, lote):
+        fim = min(inicio + lote, n)
+        linhas = np.arange(inicio, fim)
+        termos = termos_por_doc[ptr_doc[inicio]:ptr_doc[fim]]
+        rotulos = np.repeat(linhas - inicio, qtd_termos[inicio:fim])
+        tamanhos = ptr_termo[termos + 1] - ptr_termo[termos]
+        colunas = docs_por_termo[_expandir_intervalos(ptr_termo[termos], tamanhos)]
+        linhas_rep = np.repeat(rotulos, tamanhos)
+
+        comuns = np.bincount(linhas_rep * n + colunas, minlength=(fim - inicio) * n).reshape(fim - inicio, n)
+        denominador = np.maximum(np.maximum(qtd_termos[linhas][:, None], qtd_termos[None, :]), 1)
+        score = comuns / denominador
+        score[linhas - inicio, linhas] = 0.0
+        score[score < SCORE_MINIMO_SIMILAR] = 0.0
+
+        k = min(LIMITE_SIMILARES, n)
+        topo = np.argpartition(-score, k - 1, axis=1)[:, :k]
+        selecionados = np.take_along_axis(score, topo, axis=1) > 0
+        total_similares[inicio:fim] = selecionados.sum(axis=1)
+        vitorias[inicio:fim] = (selecionados & vitoria[topo]).sum(axis=1)
+    return total_similares, vitorias
+
+
+def recalcular_riscos(lote=64):
+    """
+    Recalcula `AnaliseRisco.probabilidade_exito` de toda a carteira, com as
+    variáveis carregadas em colunas NumPy e gravação via bulk_update.
+    Retorna quantas análises foram atualizadas e criadas.
+    """
+    registros = list(Processo.objects.order_by('id').values_list('id', 'status', 'etapa_workflow', 'resultado'))
+    if not registros:
+        return {'atualizadas': 0, 'criadas': 0}
+
+    ids = np.array([r[0] for r in registros], dtype=np.int64)
+    status = np.array([r[1] for r in registros], dtype=object)
+    etapas = np.array([r[2] for r in registros], dtype=object)
+    resultados = np.array([r[3] for r in registros], dtype=object)
+    indice = {int(pid): pos for pos, pid in enumerate(ids)}
+
+    hoje = timezone.localdate()
+    prazos_atrasados = _contagem_por_processo(
+        Compromisso.objects.filter(processo__isnull=False, tipo='prazo', status='pendente', data__lt=hoje),
+        indice,
+    )
+    tarefas_atrasadas = _contagem_por_processo(
+        ProcessoTarefa.objects.filter(status='pendente', prazo_em__lt=timezone.now()),
+        indice,
+    )
+    vitoria = (status == 'finalizado') & (resultados == 'favoravel')
+
+    total_similares, vitorias = _similares_em_lote(indice, vitoria, lote)
+    probabilidades = probabilidade_exito_vetorizada(
+        total_similares, vitorias, status, etapas, prazos_atrasados, tarefas_atrasadas,
+    )
+
+    agora = timezone.now()
+    existentes = {a.processo_id: a for a in AnaliseRisco.objects.all()}
+    atualizar, criar = [], []
+    for pos, pid in enumerate(ids.tolist()):
+        analise = existentes.get(pid)
+        if analise is None:
+            analise = AnaliseRisco(
+                processo_id=pid,
+                justificativa=justificativa_padrao(int(total_similares[pos]), int(vitorias[pos])),
+            )
+            criar.append(analise)
+        else:
+            atualizar.append(analise)
+        analise.probabilidade_exito = Decimal(str(probabilidades[pos]))
+        analise.processos_similares = int(total_similares[pos])
+        analise.vitorias_similares = int(vitorias[pos])
+        analise.atualizado_em = agora
+
+    AnaliseRisco.objects.bulk_update(
+        atualizar,
+        ['probabilidade_exito', 'processos_similares', 'vitorias_similares', 'atualizado_em'],
+        batch_size=500,
+    )
+    AnaliseRisco.objects.bulk_create(criar, batch_size=500)
+    return {'atualizadas': len(atualizar), 'criadas': len(criar)}
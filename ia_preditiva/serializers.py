@@ -1,5 +1,7 @@
+from django.urls import reverse
 from rest_framework import serializers
-from .models import AnaliseRisco, IAEventoSistema
+
+from .models import AnaliseRisco, IAEventoSistema, TarefaIA
 
 
 class AnaliseRiscoSerializer(serializers.ModelSerializer):
@@ -50,3 +52,31 @@ class IAEventoSistemaSerializer(serializers.ModelSerializer):
             'criado_em',
             'atualizado_em',
         ]
+
+
+class TarefaIASerializer(serializers.ModelSerializer):
+    tipo_display = serializers.CharField(source='get_tipo_display', read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    concluida = serializers.BooleanField(read_only=True)
+    status_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = TarefaIA
+        fields = [
+            'id',
+            'tipo',
+            'tipo_display',
+            'status',
+            'status_display',
+            'concluida',
+            'resposta',
+            'erro',
+            'status_url',
+            'criado_em',
+            'concluida_em',
+        ]
+
+    def get_status_url(self, obj):
+        url = reverse('ia-tarefa-detail', args=[obj.id])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
@@ -0,0 +1,33 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from processos.models import Cliente, Processo, TipoProcesso
+
+from .similaridade import indexar_processo, reindexar_processos
+
+CAMPOS_INDEXADOS_PROCESSO = {'objeto', 'cliente', 'cliente_id', 'tipo', 'tipo_id'}
+
+
+def _campos_alterados(update_fields, campos):
+    return update_fields is None or bool(set(update_fields) & campos)
+
+
+@receiver(post_save, sender=Processo, dispatch_uid='ia_preditiva_indexar_processo')
+def indexar_processo_salvo(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or not _campos_alterados(update_fields, CAMPOS_INDEXADOS_PROCESSO):
+        return
+    indexar_processo(instance)
+
+
+@receiver(post_save, sender=Cliente, dispatch_uid='ia_preditiva_reindexar_cliente')
+def reindexar_processos_do_cliente(sender, instance, created=False, update_fields=None, raw=False, **kwargs):
+    if raw or created or not _campos_alterados(update_fields, {'demanda'}):
+        return
+    reindexar_processos(instance.processos.all())
+
+
+@receiver(post_save, sender=TipoProcesso, dispatch_uid='ia_preditiva_reindexar_tipo')
+def reindexar_processos_do_tipo(sender, instance, created=False, update_fields=None, raw=False, **kwargs):
+    if raw or created or not _campos_alterados(update_fields, {'nome'}):
+        return
+    reindexar_processos(Processo.objects.filter(tipo=instance))
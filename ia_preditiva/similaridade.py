@@ -0,0 +1,81 @@
+import re
+
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Max, Value
+from django.db.models.functions import Cast, Greatest
+
+from .models import ProcessoTermo
+
+STOPWORDS = {
+    'para', 'com', 'das', 'dos', 'que', 'uma', 'por', 'não', 'nos',
+    'nas', 'ser', 'sua', 'seu', 'sobre', 'entre', 'processo', 'cliente',
+    'demanda', 'caso', 'juridico', 'jurídico', 'legal', 'ação', 'acao',
+}
+TERMO_MAX_LENGTH = 80
+
+
+def tokenizar(texto):
+    if not texto:
+        return set()
+    return {
+        t[:TERMO_MAX_LENGTH] for t in re.split(r'[^\wÀ-ÿ]+', str(texto).lower())
+        if len(t) >= 4 and t not in STOPWORDS
+    }
+
+
+def texto_indexavel(processo):
+    return ' '.join(filter(None, [
+        processo.objeto,
+        processo.cliente.demanda if processo.cliente else '',
+        processo.tipo.nome if processo.tipo else '',
+    ]))
+
+
+def indexar_processo(processo):
+    """Regrava os termos do processo usados na busca de similares internos."""
+    termos = tokenizar(texto_indexavel(processo))
+    with transaction.atomic():
+        ProcessoTermo.objects.filter(processo_id=processo.pk).delete()
+        ProcessoTermo.objects.bulk_create([
+            ProcessoTermo(processo_id=processo.pk, termo=termo, total_termos=len(termos))
+            for termo in termos
+        ])
+    return len(termos)
+
+
+def reindexar_processos(queryset):
+    total = 0
+    for processo in queryset.select_related('cliente', 'tipo').iterator():
+        indexar_processo(processo)
+        total += 1
+    return total
+
+
+def ranquear_similares(termos_referencia, processos_qs, excluir_id=None, limite=12, score_minimo=0.2):
+    """
+    Ranqueia no banco, em uma única consulta, os processos visíveis que
+    compartilham termos com a referência.
+    Retorna lista de (processo_id, score) com score entre 0 e 1.
+    """
+    termos = {t[:TERMO_MAX_LENGTH] for t in termos_referencia if t}
+    if not termos:
+        return []
+
+    candidatos = ProcessoTermo.objects.filter(
+        termo__in=termos,
+        processo_id__in=processos_qs.values('id'),
+    )
+    if excluir_id:
+        candidatos = candidatos.exclude(processo_id=excluir_id)
+
+    ranking = (
+        candidatos.values('processo_id')
+        .annotate(comuns=Count('id'), total=Max('total_termos'))
+        .annotate(
+            score=Cast(F('comuns'), FloatField())
+            / Greatest(F('total'), Value(len(termos)), output_field=FloatField())
+        )
+        .filter(score__gte=score_minimo)
+        .order_by('-score', '-processo_id')[:limite]
+    )
+    return [(item['processo_id'], item['score']) for item in ranking]
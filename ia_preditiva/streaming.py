@@ -0,0 +1,86 @@
+"""
+Respostas da IA em Server-Sent Events.
+
+Cada trecho gerado pelo modelo vai num evento `token`; ao final, um evento
+`fim` traz o mesmo corpo da resposta JSON do endpoint, e `erro` indica
+falha no meio do caminho. Sob ASGI (crm_advocacia/asgi.py) o gerador é
+consumido por um iterador assíncrono, trecho a trecho; sob WSGI, pelo
+iterador síncrono normal. Em ambos os casos nada é acumulado antes de ser
+enviado.
+"""
+import json
+import logging
+import os
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+from consulta_tribunais.services.groq_service import GroqService
+
+from .models import IAEventoSistema
+
+logger = logging.getLogger(__name__)
+
+_FIM = object()
+
+
+def streaming_solicitado(request):
+    """`stream=true` no corpo ou na query string."""
+    valor = request.data.get('stream', request.query_params.get('stream', ''))
+    return str(valor).strip().lower() in {'1', 'true', 't', 'sim', 'yes'}
+
+
+def evento_sse(nome, dados):
+    return f'event: {nome}\ndata: {json.dumps(dados, ensure_ascii=False, default=str)}\n\n'
+
+
+def eventos_ia(messages, temperature, max_tokens, usar_cache, montar_final, usuario, rota, mensagem, detalhes=None):
+    """
+    Repassa os trechos do modelo como eventos `token` e termina com
+    `fim`, cujo corpo é `montar_final(texto_completo)`; após uma falha o
+    texto passado é vazio, para o endpoint montar a resposta de contingência.
+    A falha fica registrada em IAEventoSistema com `mensagem`, `rota` e
+    `detalhes`, como nos endpoints sem fluxo.
+    """
+    partes = []
+    try:
+        groq = GroqService(os.getenv('GROQ_API_KEY'))
+        for trecho in groq.completar_em_fluxo(messages, temperature=temperature, max_tokens=max_tokens, usar_cache=usar_cache):
+            partes.append(trecho)
+            yield evento_sse('token', {'texto': trecho})
+    except Exception:
+        logger.exception('Falha na resposta em fluxo da IA')
+        IAEventoSistema.objects.create(
+            tipo='ia',
+            severidade='alerta',
+            mensagem=mensagem,
+            rota=rota,
+            detalhes={**(detalhes or {}), 'stream': True},
+            criado_por=usuario,
+        )
+        yield evento_sse('erro', {'error': 'Falha ao gerar a resposta da IA.'})
+        partes = []
+    yield evento_sse('fim', montar_final(''.join(partes).strip()))
+
+
+async def _em_assincrono(eventos):
+    # thread_sensitive: todos os passos rodam na thread síncrona da própria
+    # requisição (o ASGIHandler abre um ThreadSensitiveContext por
+    # requisição), e a conexão de banco aberta pelo gerador é a mesma que
+    # o request_finished fecha ao final da resposta.
+    proximo = sync_to_async(next, thread_sensitive=True)
+    while True:
+        evento = await proximo(eventos, _FIM)
+        if evento is _FIM:
+            return
+        yield evento
+
+
+def resposta_sse(request, eventos):
+    conteudo = _em_assincrono(eventos) if isinstance(request._request, ASGIRequest) else eventos
+    response = StreamingHttpResponse(conteudo, content_type='text/event-stream; charset=utf-8')
+    response['Cache-Control'] = 'no-cache'
+    # Impede o nginx de segurar os eventos em buffer.
+    response['X-Accel-Buffering'] = 'no'
+    return response
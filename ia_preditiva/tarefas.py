@@ -0,0 +1,113 @@
+"""
+Pedidos à IA fora da requisição HTTP.
+
+Com `assincrono=true`, o chat e a redação/revisão de peças respondem `202`
+com o id de uma TarefaIA; a resposta do modelo é gerada por um worker do
+Celery (task `ia_preditiva.executar_tarefa_ia`) e consultada em
+`GET /ia/tarefas/{id}/`. O modo só existe com IA_USE_CELERY: sem workers a
+task rodaria na própria requisição. Um pedido igual a outro do mesmo usuário
+ainda em andamento há menos de IA_TAREFAS_VALIDADE_SEGUNDOS devolve a tarefa
+existente; as mais antigas que isso são dadas como perdidas (worker caído ou
+mensagem extraviada) e encerradas com erro. Um pedido já presente no cache
+de respostas nasce concluído.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from consulta_tribunais.services import cache_ia
+from consulta_tribunais.services.groq_service import GroqService
+
+from .models import TarefaIA
+from .tasks import executar_tarefa_ia
+
+logger = logging.getLogger(__name__)
+
+STATUS_EM_ANDAMENTO = ('pendente', 'processando')
+VALIDADE_PADRAO_SEGUNDOS = 600
+ERRO_EXPIRADA = 'Tarefa expirada sem conclusão.'
+
+
+def assincrono_solicitado(request):
+    """`assincrono=true` no corpo ou na query string."""
+    valor = request.data.get('assincrono', request.query_params.get('assincrono', ''))
+    return str(valor).strip().lower() in {'1', 'true', 't', 'sim', 'yes'}
+
+
+def assincrono_disponivel():
+    return getattr(settings, 'IA_USE_CELERY', False)
+
+
+def _limite_em_andamento():
+    return timezone.now() - timedelta(seconds=getattr(settings, 'IA_TAREFAS_VALIDADE_SEGUNDOS', VALIDADE_PADRAO_SEGUNDOS))
+
+
+def _encerrar_com_erro(tarefa, erro):
+    tarefa.status = 'erro'
+    tarefa.erro = erro
+    tarefa.resposta = montar_resposta(tarefa, '')
+    tarefa.concluida_em = timezone.now()
+    tarefa.save(update_fields=['status', 'erro', 'resposta', 'concluida_em'])
+
+
+def expirar_se_parada(tarefa):
+    """Encerra com erro a tarefa em andamento há mais de IA_TAREFAS_VALIDADE_SEGUNDOS."""
+    if tarefa.status in STATUS_EM_ANDAMENTO and tarefa.criado_em < _limite_em_andamento():
+        _encerrar_com_erro(tarefa, ERRO_EXPIRADA)
+
+
+def montar_resposta(tarefa, texto):
+    """Corpo final: o texto no campo da tarefa ou, sem texto, a contingência."""
+    texto = (texto or '').strip()
+    if texto:
+        return {**tarefa.resposta_base, tarefa.campo_texto: texto}
+    return {**tarefa.resposta_base, **tarefa.contingencia}
+
+
+def enfileirar(tarefa):
+    try:
+        executar_tarefa_ia.delay(tarefa.id)
+    except Exception:
+        # Sem fallback síncrono: ele prenderia o worker web que o modo assíncrono deve liberar.
+        logger.exception('Falha ao enfileirar a tarefa de IA %s.', tarefa.id)
+        _encerrar_com_erro(tarefa, 'Falha ao enfileirar a tarefa.')
+
+
+def submeter_tarefa(usuario, tipo, mensagens, temperatura, max_tokens, usar_cache, campo_texto,
+                    resposta_base=None, contingencia=None):
+    """Cria (ou reaproveita) a TarefaIA do pedido e agenda sua execução."""
+    chave = cache_ia.chave(GroqService.model, mensagens, temperatura, max_tokens)
+    em_andamento = TarefaIA.objects.filter(usuario=usuario, chave=chave, status__in=STATUS_EM_ANDAMENTO)
+    limite = _limite_em_andamento()
+    for parada in em_andamento.filter(criado_em__lt=limite):
+        _encerrar_com_erro(parada, ERRO_EXPIRADA)
+    existente = em_andamento.filter(criado_em__gte=limite).order_by('criado_em').first()
+    if existente is not None:
+        return existente
+
+    tarefa = TarefaIA(
+        usuario=usuario,
+        tipo=tipo,
+        chave=chave,
+        mensagens=mensagens,
+        temperatura=temperatura,
+        max_tokens=max_tokens,
+        usar_cache=usar_cache,
+        resposta_base=resposta_base or {},
+        campo_texto=campo_texto,
+        contingencia=contingencia or {},
+    )
+    texto = cache_ia.obter(chave) if usar_cache else None
+    if texto:
+        tarefa.status = 'concluida'
+        tarefa.resposta = montar_resposta(tarefa, texto)
+        tarefa.concluida_em = timezone.now()
+        tarefa.save()
+        return tarefa
+
+    tarefa.save()
+    transaction.on_commit(lambda: enfileirar(tarefa))
+    return tarefa
@@ -2,54 +2,71 @@ import logging
 import os
 
 from consulta_tribunais.services.groq_service import GroqService
+from core.tasks import shared_task
 
 logger = logging.getLogger(__name__)
 
 
-class _SyncResult:
-    def __init__(self, value):
-        self.value = value
-
-    def get(self, timeout=None):
-        return self.value
-
-
-try:
-    from celery import shared_task
-except Exception:  # pragma: no cover - fallback quando Celery não está instalado
-    def shared_task(*task_args, **task_kwargs):  # type: ignore
-        def _decorate(func):
-            func.delay = lambda *args, **kwargs: _SyncResult(func(*args, **kwargs))
-            func.apply_async = lambda args=None, kwargs=None, **opts: _SyncResult(
-                func(*(args or ()), **(kwargs or {}))
-            )
-            func.run = func
-            return func
-
-        if task_args and callable(task_args[0]) and len(task_args) == 1 and not task_kwargs:
-            return _decorate(task_args[0])
-        return _decorate
-
-
-def _chamar_groq(messages, temperature=0.2, max_tokens=1200):
+def _chamar_groq(messages, temperature=0.2, max_tokens=1200, usar_cache=True):
     groq_api_key = os.getenv('GROQ_API_KEY')
     if not groq_api_key:
         return ''
 
     groq = GroqService(groq_api_key)
-    completion = groq.client.chat.completions.create(
-        messages=messages,
-        model=groq.model,
-        temperature=temperature,
-        max_tokens=max_tokens,
-    )
-    return completion.choices[0].message.content or ''
+    return groq.completar(messages, temperature=temperature, max_tokens=max_tokens, usar_cache=usar_cache)
 
 
 @shared_task(name='ia_preditiva.gerar_resposta_ia')
-def gerar_resposta_ia(messages, temperature=0.2, max_tokens=1200):
+def gerar_resposta_ia(messages, temperature=0.2, max_tokens=1200, usar_cache=True):
     try:
-        return _chamar_groq(messages=messages, temperature=temperature, max_tokens=max_tokens)
+        return _chamar_groq(messages=messages, temperature=temperature, max_tokens=max_tokens, usar_cache=usar_cache)
     except Exception as exc:
         logger.warning('Falha na task gerar_resposta_ia: %s', exc)
         return ''
+
+
+@shared_task(name='ia_preditiva.executar_tarefa_ia')
+def executar_tarefa_ia(tarefa_id):
+    """Gera a resposta de uma TarefaIA pendente e guarda o corpo final."""
+    from django.utils import timezone
+
+    from .models import IAEventoSistema, TarefaIA
+    from .tarefas import montar_resposta
+
+    # Só um worker assume a tarefa, mesmo que a mensagem seja entregue duas vezes.
+    if not TarefaIA.objects.filter(pk=tarefa_id, status='pendente').update(status='processando'):
+        return
+    tarefa = TarefaIA.objects.get(pk=tarefa_id)
+    try:
+        texto = _chamar_groq(
+            tarefa.mensagens,
+            temperature=tarefa.temperatura,
+            max_tokens=tarefa.max_tokens,
+            usar_cache=tarefa.usar_cache,
+        )
+        tarefa.status = 'concluida'
+    except Exception as exc:
+        logger.exception('Falha na tarefa de IA %s', tarefa_id)
+        texto = ''
+        tarefa.status = 'erro'
+        tarefa.erro = str(exc)[:1000]
+        IAEventoSistema.objects.create(
+            tipo='ia',
+            severidade='alerta',
+            mensagem=f'Falha na tarefa assíncrona de IA ({tarefa.get_tipo_display()})',
+            rota='/api/v1/ia/tarefas/',
+            detalhes={'tarefa_id': tarefa.id, 'usuario': tarefa.usuario_id},
+            criado_por_id=tarefa.usuario_id,
+        )
+    tarefa.resposta = montar_resposta(tarefa, texto)
+    tarefa.concluida_em = timezone.now()
+    tarefa.save(update_fields=['status', 'erro', 'resposta', 'concluida_em'])
+
+
+@shared_task(name='ia_preditiva.recalcular_riscos_carteira')
+def recalcular_riscos_carteira(lote=64):
+    from .risco import recalcular_riscos
+
+    resultado = recalcular_riscos(lote=lote)
+    logger.info('Riscos recalculados em lote: %s', resultado)
+    return resultado
@@ -1,3 +1,59 @@
 from django.test import TestCase
 
-# Create your tests here.
+from accounts.models import Usuario
+from processos.models import Cliente, Processo, TipoProcesso
+
+from .models import ProcessoTermo
+from .similaridade import ranquear_similares, tokenizar
+
+
+class IndiceSimilaridadeTest(TestCase):
+    def setUp(self):
+        self.adv = Usuario.objects.create_user(username='idx_adv', password='pass', papel='advogado')
+        self.tipo = TipoProcesso.objects.create(nome='Consumidor')
+        self.cliente = Cliente.objects.create(nome='Cliente Índice', responsavel=self.adv, demanda='Negativação indevida')
+        self.processo = Processo.objects.create(
+            numero='9100000-00.2026.8.26.0001',
+            cliente=self.cliente,
+            advogado=self.adv,
+            tipo=self.tipo,
+            objeto='Cobrança bancária abusiva',
+        )
+
+    def _termos(self, processo):
+        return set(ProcessoTermo.objects.filter(processo=processo).values_list('termo', flat=True))
+
+    def test_indice_atualizado_ao_salvar(self):
+        self.assertEqual(
+            self._termos(self.processo),
+            tokenizar('Cobrança bancária abusiva Negativação indevida Consumidor'),
+        )
+
+        self.processo.objeto = 'Revisão contratual'
+        self.processo.save()
+        self.assertIn('revisão', self._termos(self.processo))
+        self.assertNotIn('abusiva', self._termos(self.processo))
+
+        self.cliente.demanda = 'Superendividamento'
+        self.cliente.save()
+        self.assertIn('superendividamento', self._termos(self.processo))
+
+    def test_ranking_considera_todo_portfolio_visivel(self):
+        outro = Processo.objects.create(
+            numero='9100000-00.2026.8.26.0002',
+            cliente=self.cliente,
+            advogado=self.adv,
+            tipo=self.tipo,
+            objeto='Cobrança bancária abusiva em cartão',
+        )
+        Processo.objects.filter(pk=outro.pk).update(criado_em='2000-01-01T00:00:00Z')
+
+        ranking = ranquear_similares(
+            tokenizar('cobrança bancária abusiva'),
+            Processo.objects.filter(advogado=self.adv),
+            excluir_id=self.processo.id,
+        )
+        self.assertEqual([pid for pid, _ in ranking], [outro.id])
+        self.assertGreater(ranking[0][1], 0.2)
+
+        self.assertEqual(ranquear_similares(tokenizar('cobrança'), Processo.objects.none()), [])
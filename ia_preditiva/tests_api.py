@@ -1,12 +1,19 @@
+import json
 from datetime import timedelta
 
+from django.core.cache import cache
+from django.test import override_settings
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
 
 from accounts.models import Usuario
 from agenda.models import Compromisso
+from consulta_tribunais.services import cache_ia
+from core.testing import StubHttp, completion_groq, completion_groq_em_fluxo, groq_local
 from financeiro.models import Lancamento
+from ia_preditiva.models import IAEventoSistema, TarefaIA
+from ia_preditiva.tasks import executar_tarefa_ia
 from processos.models import Cliente, Processo, TipoProcesso, Movimentacao
 
 
@@ -103,3 +110,149 @@ class IAPreditivaApiTest(APITestCase):
         self.assertIn('prazos', monitor.data)
         self.assertIn('financeiro', monitor.data)
         self.assertIn('sistema', monitor.data)
+
+    def test_recalculo_em_lote_equivale_a_analise_individual(self):
+        from ia_preditiva.models import AnaliseRisco
+        from ia_preditiva.risco import recalcular_riscos
+
+        response = self.client.post('/api/v1/ia/analises/analisar/', {'processo_id': self.processo.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        resultado = recalcular_riscos(lote=1)
+        self.assertEqual(resultado, {'atualizadas': 1, 'criadas': 1})
+
+        analise = AnaliseRisco.objects.get(processo=self.processo)
+        self.assertEqual(float(analise.probabilidade_exito), response.data['probabilidade_sucesso'])
+        self.assertEqual(analise.processos_similares, response.data['processos_similares'])
+        self.assertEqual(analise.vitorias_similares, response.data['vitorias_similares'])
+
+
+class IARespostaEmFluxoApiTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        cache_ia.limpar_local()
+        self.adv = Usuario.objects.create_user(username='ia_fluxo', password='pass', papel='advogado')
+        self.client.force_authenticate(self.adv)
+        self.stub = StubHttp([(200, completion_groq_em_fluxo('EXCELENTÍSSIMO ', 'SENHOR ', 'JUIZ'))])
+        groq = groq_local(self.stub)
+        groq.__enter__()
+        self.addCleanup(groq.__exit__, None, None, None)
+        self.addCleanup(self.stub.encerrar)
+
+    def eventos(self, response):
+        corpo = b''.join(response.streaming_content).decode()
+        eventos = []
+        for bloco in corpo.strip().split('\n\n'):
+            nome, dados = bloco.split('\n')
+            eventos.append((nome.removeprefix('event: '), json.loads(dados.removeprefix('data: '))))
+        return eventos
+
+    def test_redigir_peca_em_fluxo_e_texto_final_em_cache(self):
+        payload = {'tipo_peca': 'peticao', 'objetivo': 'Cobrança', 'stream': True}
+        response = self.client.post('/api/v1/ia/analises/redigir-peca/', payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/event-stream'))
+        eventos = self.eventos(response)
+        self.assertEqual(
+            [dados['texto'] for nome, dados in eventos if nome == 'token'],
+            ['EXCELENTÍSSIMO ', 'SENHOR ', 'JUIZ'],
+        )
+        self.assertEqual(eventos[-1][0], 'fim')
+        self.assertEqual(eventos[-1][1]['texto'], 'EXCELENTÍSSIMO SENHOR JUIZ')
+        self.assertTrue(self.stub.requisicoes[0]['corpo']['stream'])
+
+        repetida = self.eventos(self.client.post('/api/v1/ia/analises/redigir-peca/', payload, format='json'))
+        self.assertEqual(repetida[0], ('token', {'texto': 'EXCELENTÍSSIMO SENHOR JUIZ'}))
+        self.assertEqual(len(self.stub.requisicoes), 1)
+
+    def test_chat_em_fluxo_com_falha_devolve_contingencia(self):
+        self.stub.respostas = [(500, {'error': 'indisponível'})] * 3
+        response = self.client.post('/api/v1/ia/chat/?stream=1', {'mensagem': 'Qual o prazo?'}, format='json')
+
+        eventos = self.eventos(response)
+        self.assertEqual([nome for nome, _ in eventos], ['erro', 'fim'])
+        self.assertTrue(eventos[-1][1]['fallback'])
+        evento = IAEventoSistema.objects.get()
+        self.assertEqual(evento.rota, '/api/v1/ia/chat/')
+        self.assertEqual(evento.criado_por, self.adv)
+
+
+@override_settings(IA_USE_CELERY=True)
+class TarefaIAApiTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        cache_ia.limpar_local()
+        self.adv = Usuario.objects.create_user(username='ia_tarefa', password='pass', papel='advogado')
+        self.outro = Usuario.objects.create_user(username='ia_tarefa2', password='pass', papel='advogado')
+        self.client.force_authenticate(self.adv)
+        self.stub = StubHttp([(200, completion_groq('1) Gramática correta.'))])
+        groq = groq_local(self.stub)
+        groq.__enter__()
+        self.addCleanup(groq.__exit__, None, None, None)
+        self.addCleanup(self.stub.encerrar)
+
+    def test_revisao_assincrona_deduplicada_e_consultada_pelo_id(self):
+        payload = {'texto': 'Requer a procedência dos pedidos.', 'assincrono': True}
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.client.post('/api/v1/ia/analises/revisar-peca/', payload, format='json')
+            repetida = self.client.post('/api/v1/ia/analises/revisar-peca/', payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], 'pendente')
+        self.assertFalse(response.data['concluida'])
+        self.assertEqual(repetida.data['id'], response.data['id'])
+        self.assertEqual(TarefaIA.objects.count(), 1)
+        self.assertEqual(self.stub.requisicoes, [])
+        self.assertEqual(len(callbacks), 1)
+
+        # O que o worker do Celery faria ao receber a task.
+        executar_tarefa_ia.run(response.data['id'])
+        situacao = self.client.get(f"/api/v1/ia/tarefas/{response.data['id']}/", {'aguardar': 1})
+        self.assertEqual(situacao.data['status'], 'concluida')
+        self.assertEqual(situacao.data['resposta']['comentario_ia'], '1) Gramática correta.')
+        self.assertIn('score_qualidade', situacao.data['resposta'])
+        self.assertEqual(len(self.stub.requisicoes), 1)
+
+        # Pedido já em cache nasce concluído, sem nova chamada ao modelo.
+        em_cache = self.client.post('/api/v1/ia/analises/revisar-peca/', payload, format='json')
+        self.assertEqual(em_cache.status_code, status.HTTP_202_ACCEPTED)
+        self.assertTrue(em_cache.data['concluida'])
+        self.assertNotEqual(em_cache.data['id'], response.data['id'])
+        self.assertEqual(len(self.stub.requisicoes), 1)
+
+        self.client.force_authenticate(self.outro)
+        negado = self.client.get(f"/api/v1/ia/tarefas/{response.data['id']}/")
+        self.assertEqual(negado.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_chat_assincrono_com_falha_guarda_contingencia(self):
+        self.stub.respostas = [(500, {'error': 'indisponível'})] * 3
+        with self.captureOnCommitCallbacks(execute=False):
+            response = self.client.post('/api/v1/ia/chat/', {'mensagem': 'Qual o prazo?', 'assincrono': 'sim'}, format='json')
+        executar_tarefa_ia.run(response.data['id'])
+
+        tarefa = TarefaIA.objects.get(pk=response.data['id'])
+        self.assertEqual(tarefa.status, 'erro')
+        self.assertTrue(tarefa.resposta['fallback'])
+        self.assertTrue(IAEventoSistema.objects.filter(detalhes__tarefa_id=tarefa.id).exists())
+
+    def test_tarefa_parada_expira_e_nao_e_reaproveitada(self):
+        payload = {'mensagem': 'Qual o prazo?', 'assincrono': True}
+        with self.captureOnCommitCallbacks(execute=False):
+            perdida = self.client.post('/api/v1/ia/chat/', payload, format='json').data['id']
+        # Worker caído: a tarefa nunca sai de `pendente`.
+        TarefaIA.objects.filter(pk=perdida).update(criado_em=timezone.now() - timedelta(hours=1))
+
+        with self.captureOnCommitCallbacks(execute=False):
+            nova = self.client.post('/api/v1/ia/chat/', payload, format='json').data['id']
+        self.assertNotEqual(nova, perdida)
+        expirada = self.client.get(f'/api/v1/ia/tarefas/{perdida}/').data
+        self.assertEqual(expirada['status'], 'erro')
+        self.assertTrue(expirada['resposta']['fallback'])
+
+    @override_settings(IA_USE_CELERY=False)
+    def test_sem_celery_modo_assincrono_e_recusado(self):
+        response = self.client.post('/api/v1/ia/chat/', {'mensagem': 'Qual o prazo?', 'assincrono': True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertFalse(TarefaIA.objects.exists())
+        self.assertEqual(self.stub.requisicoes, [])
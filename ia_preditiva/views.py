@@ -23,10 +23,8 @@ def _calcular_probabilidade(processo):
     if total == 0:
         return None, 0, 0, 'Não há processos similares finalizados nesta vara para calcular a probabilidade.'
 
-    # Considera "vitória" processos cujas movimentações mencionem "procedente" ou "ganho"
-    vitorias = similares.filter(
-        movimentacoes__descricao__icontains='procedente'
-    ).distinct().count()
+    # Considera "vitória" processos cuja última movimentação decisiva foi favorável
+    vitorias = similares.filter(resultado='favoravel').count()
 
     prob = round((vitorias / total) * 100, 1)
     justificativa = (
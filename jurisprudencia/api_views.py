@@ -4,8 +4,8 @@ from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 from django.db.models import Q
 from accounts.permissions import IsAdvogadoOuAdministradorWrite
-from accounts.rbac import processos_visiveis_queryset, usuario_pode_entrar_processo
-from processos.models import Processo
+from accounts.rbac import contexto_acesso, processos_visiveis_ids
+from .busca import buscar_documentos
 from .models import Documento
 from .serializers import DocumentoSerializer
 
@@ -19,23 +19,16 @@ class DocumentoViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         queryset = super().get_queryset()
         if not self.request.user.is_administrador():
-            processos_ids = processos_visiveis_queryset(
-                Processo.objects.all(),
-                self.request.user,
-            ).values_list('id', flat=True)
+            processos_ids = processos_visiveis_ids(self.request.user)
             queryset = queryset.filter(
                 Q(adicionado_por=self.request.user)
                 | Q(processo_referencia_id__in=processos_ids)
-            ).distinct()
+            )
         
-        # Busca textual
+        # Busca textual ordenada por relevância
         q = self.request.query_params.get('q', '')
         if q:
-            queryset = queryset.filter(
-                Q(titulo__icontains=q) |
-                Q(conteudo__icontains=q) |
-                Q(tags__icontains=q)
-            )
+            queryset = buscar_documentos(queryset, q)
         
         # Filtro por categoria
         categoria = self.request.query_params.get('categoria')
@@ -54,7 +47,7 @@ class DocumentoViewSet(viewsets.ModelViewSet):
         if (
             processo_referencia
             and not self.request.user.is_administrador()
-            and not usuario_pode_entrar_processo(processo_referencia, self.request.user)
+            and not contexto_acesso(self.request).pode_entrar(processo_referencia)
         ):
             raise PermissionDenied('Você não pode vincular documento a processo de outro advogado.')
         serializer.save(adicionado_por=self.request.user)
@@ -66,7 +59,7 @@ class DocumentoViewSet(viewsets.ModelViewSet):
         if (
             processo_referencia
             and not self.request.user.is_administrador()
-            and not usuario_pode_entrar_processo(processo_referencia, self.request.user)
+            and not contexto_acesso(self.request).pode_entrar(processo_referencia)
         ):
             raise PermissionDenied('Você não pode vincular documento a processo de outro advogado.')
         serializer.save(adicionado_por=serializer.instance.adicionado_por)
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class JurisprudenciaConfig(AppConfig):
     name = 'jurisprudencia'
+
+    def ready(self):
+        from . import signals  # noqa: F401
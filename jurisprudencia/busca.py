@@ -0,0 +1,185 @@
+import math
+import re
+import unicodedata
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import (
+    Case, Count, ExpressionWrapper, F, FloatField, Func, OuterRef, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Cast, Coalesce
+
+from .models import DocumentoTermo
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+PESOS_CAMPOS = (('titulo', 3), ('tags', 2), ('conteudo', 1))
+TERMO_MAX_LENGTH = 80
+CACHE_ESTATISTICAS = 'jurisprudencia:bm25:estatisticas'
+CACHE_ESTATISTICAS_TTL = 600
+
+STOPWORDS = {
+    'a', 'ao', 'aos', 'as', 'com', 'da', 'das', 'de', 'do', 'dos', 'e', 'em', 'entre',
+    'na', 'nas', 'no', 'nos', 'nao', 'o', 'os', 'ou', 'para', 'pela', 'pelas', 'pelo',
+    'pelos', 'por', 'que', 'se', 'sem', 'ser', 'seu', 'sua', 'sobre', 'um', 'uma',
+}
+
+# Expressão idêntica à do índice GIN criado na migração 0002 (PostgreSQL).
+TS_CONFIG = 'portuguese'
+_ACENTOS = 'áàâãäéèêëíìîïóòôõöúùûüç'
+_SEM_ACENTOS = 'aaaaaeeeeiiiiooooouuuuc'
+
+
+def vetor_busca():
+    """tsvector dos campos do documento, com as colunas resolvidas pelo alias da consulta."""
+    from django.contrib.postgres.search import SearchVectorField
+
+    texto = Func(
+        *[Coalesce(F(campo), Value('')) for campo, _peso in PESOS_CAMPOS],
+        template='%(expressions)s',
+        arg_joiner=" || ' ' || ",
+    )
+    return Func(
+        Func(texto, function='lower'),
+        template=f"to_tsvector('{TS_CONFIG}', translate(%(expressions)s, '{_ACENTOS}', '{_SEM_ACENTOS}'))",
+        output_field=SearchVectorField(),
+    )
+
+def remover_acentos(texto):
+    decomposto = unicodedata.normalize('NFKD', str(texto or ''))
+    return ''.join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def tokenizar(texto):
+    """Tokens minúsculos, sem acento e sem stopwords (com repetições)."""
+    return [
+        t[:TERMO_MAX_LENGTH]
+        for t in re.split(r'\W+', remover_acentos(texto).lower())
+        if len(t) >= 2 and t not in STOPWORDS
+    ]
+
+
+def backend_busca():
+    backend = getattr(settings, 'JURISPRUDENCIA_BUSCA_BACKEND', 'auto')
+    if backend == 'auto':
+        return 'postgres' if connection.vendor == 'postgresql' else 'indice'
+    return backend
+
+
+def frequencias_documento(documento):
+    """Frequência de cada termo do documento, ponderada pelo peso do campo."""
+    frequencias = Counter()
+    for campo, peso in PESOS_CAMPOS:
+        for termo in tokenizar(getattr(documento, campo, '')):
+            frequencias[termo] += peso
+    return frequencias
+
+
+def indexar_documento(documento):
+    frequencias = frequencias_documento(documento)
+    comprimento = sum(frequencias.values())
+    with transaction.atomic():
+        DocumentoTermo.objects.filter(documento_id=documento.pk).delete()
+        DocumentoTermo.objects.bulk_create([
+            DocumentoTermo(documento_id=documento.pk, termo=termo, frequencia=freq, comprimento=comprimento)
+            for termo, freq in frequencias.items()
+        ])
+    cache.delete(CACHE_ESTATISTICAS)
+    return len(frequencias)
+
+
+def reindexar_documentos(queryset):
+    total = 0
+    for documento in queryset.only('id', 'titulo', 'tags', 'conteudo').iterator():
+        indexar_documento(documento)
+        total += 1
+    return total
+
+
+def estatisticas_corpus():
+    estatisticas = cache.get(CACHE_ESTATISTICAS)
+    if estatisticas is None:
+        agregado = DocumentoTermo.objects.aggregate(
+            documentos=Count('documento_id', distinct=True),
+            termos=Sum('frequencia'),
+        )
+        total_docs = agregado['documentos'] or 0
+        estatisticas = {
+            'documentos': total_docs,
+            'comprimento_medio': (agregado['termos'] or 0) / total_docs if total_docs else 0.0,
+        }
+        cache.set(CACHE_ESTATISTICAS, estatisticas, CACHE_ESTATISTICAS_TTL)
+    return estatisticas
+
+
+def _buscar_indice(queryset, termos):
+    estatisticas = estatisticas_corpus()
+    total_docs = estatisticas['documentos']
+    comprimento_medio = estatisticas['comprimento_medio'] or 1.0
+    frequencia_docs = dict(
+        DocumentoTermo.objects.filter(termo__in=termos)
+        .values('termo')
+        .annotate(df=Count('id'))
+        .values_list('termo', 'df')
+    )
+    if not frequencia_docs:
+        return queryset.none()
+
+    idf = Case(
+        *[
+            When(termo=termo, then=Value(math.log(1 + (total_docs - df + 0.5) / (df + 0.5))))
+            for termo, df in frequencia_docs.items()
+        ],
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    tf = Cast('frequencia', FloatField())
+    saturacao = ExpressionWrapper(
+        tf * (BM25_K1 + 1)
+        / (tf + BM25_K1 * (1 - BM25_B + BM25_B * Cast('comprimento', FloatField()) / comprimento_medio)),
+        output_field=FloatField(),
+    )
+    relevancia = (
+        DocumentoTermo.objects.filter(documento_id=OuterRef('pk'), termo__in=list(frequencia_docs))
+        .values('documento_id')
+        .annotate(score=Sum(idf * saturacao, output_field=FloatField()))
+        .values('score')
+    )
+    candidatos = DocumentoTermo.objects.filter(termo__in=list(frequencia_docs)).values('documento_id')
+    return (
+        queryset.filter(id__in=candidatos)
+        .annotate(relevancia=Subquery(relevancia, output_field=FloatField()))
+        .order_by('-relevancia', '-criado_em')
+    )
+
+
+def _buscar_postgres(queryset, termos):
+    from django.contrib.postgres.search import SearchQuery, SearchRank
+
+    consulta = SearchQuery(termos[0], config=TS_CONFIG)
+    for termo in termos[1:]:
+        consulta |= SearchQuery(termo, config=TS_CONFIG)
+    return (
+        queryset.annotate(vetor_busca=vetor_busca())
+        .filter(vetor_busca=consulta)
+        .annotate(relevancia=SearchRank(F('vetor_busca'), consulta, cover_density=True))
+        .order_by('-relevancia', '-criado_em')
+    )
+
+
+def buscar_documentos(queryset, texto):
+    """
+    Filtra e ordena o queryset de Documento por relevância (campo anotado
+    `relevancia`). Usa tsvector/GIN no PostgreSQL e BM25 sobre o índice
+    invertido DocumentoTermo nos demais bancos.
+    """
+    termos = list(dict.fromkeys(tokenizar(texto)))
+    if not termos:
+        return queryset.filter(
+            Q(titulo__icontains=texto) | Q(conteudo__icontains=texto) | Q(tags__icontains=texto)
+        )
+    if backend_busca() == 'postgres':
+        return _buscar_postgres(queryset, termos)
+    return _buscar_indice(queryset, termos)
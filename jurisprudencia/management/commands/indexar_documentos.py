@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from jurisprudencia.busca import reindexar_documentos
+from jurisprudencia.models import Documento
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o índice invertido usado no ranking BM25 de documentos.'
+
+    def handle(self, *args, **options):
+        total = reindexar_documentos(Documento.objects.order_by('id'))
+        self.stdout.write(
+            self.style.SUCCESS(f'Documentos indexados: {total}')
+        )
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.30 on 2026-10-17 20:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+INDICE_GIN_SQL = (
+    "CREATE INDEX IF NOT EXISTS idx_documento_busca_gin ON jurisprudencia_documento USING GIN ("
+    "to_tsvector('portuguese', translate(lower("
+    "coalesce(titulo, '') || ' ' || "
+    "coalesce(tags, '') || ' ' || "
+    "coalesce(conteudo, '')"
+    "), 'áàâãäéèêëíìîïóòôõöúùûüç', 'aaaaaeeeeiiiiooooouuuuc')))"
+)
+
+
+def criar_indice_gin(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(INDICE_GIN_SQL)
+
+
+def remover_indice_gin(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS idx_documento_busca_gin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jurisprudencia', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentoTermo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('termo', models.CharField(max_length=80, verbose_name='Termo')),
+                ('frequencia', models.PositiveIntegerField(default=1, verbose_name='Frequência Ponderada')),
+                ('comprimento', models.PositiveIntegerField(default=0, verbose_name='Comprimento do Documento')),
+                ('documento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='termos_indice', to='jurisprudencia.documento', verbose_name='Documento')),
+            ],
+            options={
+                'verbose_name': 'Termo Indexado de Documento',
+                'verbose_name_plural': 'Termos Indexados de Documentos',
+                'indexes': [models.Index(fields=['termo', 'documento'], name='idx_termo_documento')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='documentotermo',
+            constraint=models.UniqueConstraint(fields=('documento', 'termo'), name='uniq_documento_termo_indice'),
+        ),
+        migrations.RunPython(criar_indice_gin, remover_indice_gin),
+    ]
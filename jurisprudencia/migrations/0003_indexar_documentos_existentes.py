@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-17 21:40
+
+from django.db import migrations
+
+
+def indexar_existentes(apps, schema_editor):
+    from jurisprudencia.busca import frequencias_documento
+
+    Documento = apps.get_model('jurisprudencia', 'Documento')
+    DocumentoTermo = apps.get_model('jurisprudencia', 'DocumentoTermo')
+    pendentes = []
+    for documento in Documento.objects.only('id', 'titulo', 'tags', 'conteudo').iterator():
+        frequencias = frequencias_documento(documento)
+        comprimento = sum(frequencias.values())
+        pendentes.extend(
+            DocumentoTermo(documento_id=documento.pk, termo=termo, frequencia=freq, comprimento=comprimento)
+            for termo, freq in frequencias.items()
+        )
+        if len(pendentes) >= 1000:
+            DocumentoTermo.objects.bulk_create(pendentes, ignore_conflicts=True)
+            pendentes = []
+    DocumentoTermo.objects.bulk_create(pendentes, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jurisprudencia', '0002_documentotermo_busca_textual'),
+    ]
+
+    operations = [
+        migrations.RunPython(indexar_existentes, migrations.RunPython.noop),
+    ]
@@ -44,3 +44,29 @@ class Documento(models.Model):
 
     def get_tags_list(self):
         return [t.strip() for t in self.tags.split(',') if t.strip()]
+
+
+class DocumentoTermo(models.Model):
+    """Índice invertido (termo normalizado sem acento) usado no ranking BM25."""
+    documento = models.ForeignKey(
+        Documento,
+        on_delete=models.CASCADE,
+        related_name='termos_indice',
+        verbose_name='Documento',
+    )
+    termo = models.CharField(max_length=80, verbose_name='Termo')
+    frequencia = models.PositiveIntegerField(default=1, verbose_name='Frequência Ponderada')
+    comprimento = models.PositiveIntegerField(default=0, verbose_name='Comprimento do Documento')
+
+    class Meta:
+        verbose_name = 'Termo Indexado de Documento'
+        verbose_name_plural = 'Termos Indexados de Documentos'
+        constraints = [
+            models.UniqueConstraint(fields=['documento', 'termo'], name='uniq_documento_termo_indice'),
+        ]
+        indexes = [
+            models.Index(fields=['termo', 'documento'], name='idx_termo_documento'),
+        ]
+
+    def __str__(self):
+        return f'{self.termo} – {self.documento_id}'
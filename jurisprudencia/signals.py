@@ -0,0 +1,23 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .busca import CACHE_ESTATISTICAS, indexar_documento
+from .models import Documento
+
+CAMPOS_INDEXADOS = {'titulo', 'tags', 'conteudo'}
+
+
+@receiver(post_save, sender=Documento, dispatch_uid='jurisprudencia_indexar_documento')
+def indexar_documento_salvo(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not set(update_fields) & CAMPOS_INDEXADOS:
+        return
+    indexar_documento(instance)
+
+
+@receiver(post_delete, sender=Documento, dispatch_uid='jurisprudencia_documento_excluido')
+def invalidar_estatisticas_documento_excluido(sender, instance, **kwargs):
+    # Os termos saem em cascata; as estatísticas do corpus mudam junto.
+    cache.delete(CACHE_ESTATISTICAS)
@@ -5,6 +5,7 @@ from rest_framework.test import APITestCase
 from accounts.models import Usuario
 from processos.models import Cliente, Processo, TipoProcesso
 
+from .busca import estatisticas_corpus, vetor_busca
 from .models import Documento
 
 
@@ -82,3 +83,42 @@ class DocumentoApiIsolamentoTest(APITestCase):
         self.assertIn(self.doc_adv1.titulo, titulos)
         self.assertIn(self.doc_adv2.titulo, titulos)
         self.assertIn(self.doc_sem_processo_adv2.titulo, titulos)
+
+    def test_busca_ordena_por_relevancia_e_ignora_acentos(self):
+        relevante = Documento.objects.create(
+            titulo='Dano moral por negativação indevida',
+            categoria='acordao',
+            conteudo='Negativação indevida gera dano moral in re ipsa. Negativacao mantida.',
+            tags='negativação, consumidor',
+            adicionado_por=self.adv1,
+        )
+        secundario = Documento.objects.create(
+            titulo='Revisão contratual',
+            categoria='acordao',
+            conteudo='Cláusulas abusivas; menção lateral a negativação.',
+            adicionado_por=self.adv1,
+        )
+        self.client.force_authenticate(user=self.adv1)
+        response = self.client.get(reverse('documento-list'), {'q': 'negativacao INDEVIDA'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [item['id'] for item in response.data['results']]
+        self.assertEqual(ids, [relevante.id, secundario.id])
+
+        relevante.titulo = 'Tema repetitivo'
+        relevante.conteudo = 'Sem relação'
+        relevante.tags = ''
+        relevante.save()
+        response = self.client.get(reverse('documento-list'), {'q': 'negativação'})
+        ids = [item['id'] for item in response.data['results']]
+        self.assertEqual(ids, [secundario.id])
+
+    def test_exclusao_atualiza_estatisticas_do_corpus(self):
+        antes = estatisticas_corpus()['documentos']
+        self.doc_adv1.delete()
+        self.assertEqual(estatisticas_corpus()['documentos'], antes - 1)
+
+    def test_vetor_de_busca_usa_o_alias_da_consulta(self):
+        interna = Documento.objects.annotate(vetor=vetor_busca()).filter(vetor__isnull=False).values('pk')
+        sql = str(Documento.objects.filter(pk__in=interna).query)
+        self.assertIn('COALESCE(U0."titulo"', sql)
+        self.assertIn('COALESCE(U0."conteudo"', sql)
@@ -1,5 +1,5 @@
 from rest_framework import viewsets, permissions
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view
 from rest_framework import status
 from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.response import Response
@@ -8,12 +8,14 @@ from django.utils import timezone
 from accounts.permissions import IsAdvogadoOuAdministradorWrite
 from accounts.models import Usuario
 from accounts.rbac import (
+    contexto_acesso,
+    processos_visiveis_ids,
     processos_visiveis_queryset,
-    usuario_pode_entrar_processo,
     validar_vinculo_junior_no_processo,
 )
 from agenda.models import Compromisso
 from agenda.serializers import CompromissoSerializer
+from core.consultas import PlanoConsultaMixin
 from core.security import validate_upload_file
 from .models import (
     Comarca,
@@ -33,6 +35,7 @@ from .models import (
     ProcessoArquivo,
     ProcessoPeca,
 )
+from .sincronizacao import RECURSOS_SINCRONIZACAO, decodificar_continuacao, decodificar_token, montar_sincronizacao
 from .serializers import (
     ComarcaSerializer, VaraSerializer, TipoProcessoSerializer,
     ClienteSerializer, ProcessoSerializer, ProcessoListSerializer,
@@ -81,8 +84,19 @@ class ClienteViewSet(viewsets.ModelViewSet):
     search_fields = ['nome', 'cpf_cnpj', 'email', 'demanda', 'lead_origem', 'lead_campanha']
     ordering_fields = ['nome', 'tipo', 'lead_etapa', 'lead_sla_resposta_em', 'qualificacao_score']
 
-    def get_queryset(self):
+    def queryset_visivel(self):
+        """Clientes visíveis ao usuário, sem os filtros da listagem."""
         queryset = super().get_queryset()
+        if self.request.user.is_administrador():
+            return queryset
+        clientes_ids = Processo.objects.filter(id__in=processos_visiveis_ids(self.request.user)).values('cliente_id')
+        return queryset.filter(
+            Q(pk__in=clientes_ids)
+            | Q(responsavel=self.request.user)
+        )
+
+    def get_queryset(self):
+        queryset = self.queryset_visivel()
         ativo = self.request.query_params.get('ativo')
         if ativo is not None:
             ativo_normalizado = str(ativo).strip().lower()
@@ -90,14 +104,7 @@ class ClienteViewSet(viewsets.ModelViewSet):
                 queryset = queryset.filter(ativo=True)
             elif ativo_normalizado in {'0', 'false', 'f', 'nao', 'não', 'no'}:
                 queryset = queryset.filter(ativo=False)
-
-        if self.request.user.is_administrador():
-            return queryset
-        processos_ids = processos_visiveis_queryset(Processo.objects.all(), self.request.user).values_list('id', flat=True)
-        return queryset.filter(
-            Q(processos__id__in=processos_ids)
-            | Q(responsavel=self.request.user)
-        ).distinct()
+        return queryset
 
     def perform_create(self, serializer):
         if self.request.user.is_administrador():
@@ -370,26 +377,49 @@ class ClienteViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class ProcessoViewSet(viewsets.ModelViewSet):
-    queryset = Processo.objects.select_related(
-        'cliente', 'advogado', 'tipo', 'vara', 'vara__comarca'
-    ).prefetch_related(
-        'movimentacoes',
-        'partes',
-        'responsaveis__usuario',
-        'tarefas__responsavel',
-        'pecas',
-    ).all()
+PLANO_PROCESSO_DETALHE = {
+    'select_related': ['cliente', 'advogado', 'tipo', 'vara__comarca'],
+    'prefetch_related': ['movimentacoes__autor'],
+}
+
+
+class ProcessoViewSet(PlanoConsultaMixin, viewsets.ModelViewSet):
+    queryset = Processo.objects.all()
+    ordenacao_cursor = ('-criado_em', '-id')
+    # Sub-actions que só precisam da linha do processo usam o plano '*';
+    # as que respondem com ProcessoSerializer carregam o detalhe completo.
+    planos_consulta = {
+        'list': {
+            'select_related': ['cliente', 'advogado', 'tipo'],
+            'only': [
+                'id', 'numero', 'valor_causa', 'objeto', 'vara', 'segredo_justica',
+                'tipo_caso', 'etapa_workflow', 'status', 'criado_em', 'atualizado_em',
+                'cliente__nome', 'tipo__nome',
+                'advogado__first_name', 'advogado__last_name',
+            ],
+        },
+        'retrieve': PLANO_PROCESSO_DETALHE,
+        'update': PLANO_PROCESSO_DETALHE,
+        'partial_update': PLANO_PROCESSO_DETALHE,
+        'inativar': PLANO_PROCESSO_DETALHE,
+        'concluir': PLANO_PROCESSO_DETALHE,
+        'arquivar': PLANO_PROCESSO_DETALHE,
+        'workflow': PLANO_PROCESSO_DETALHE,
+        '*': {},
+    }
     permission_classes = [IsAdvogadoOuAdministradorWrite]
     search_fields = ['numero', 'cliente__nome', 'objeto']
     ordering_fields = ['criado_em', 'numero', 'status', 'tipo_caso', 'etapa_workflow']
 
-    def get_queryset(self):
+    def queryset_visivel(self):
+        """Processos visíveis ao usuário, sem os filtros da listagem."""
         queryset = super().get_queryset()
         if self.request.user.is_administrador():
-            queryset_base = queryset
-        else:
-            queryset_base = processos_visiveis_queryset(queryset, self.request.user)
+            return queryset
+        return processos_visiveis_queryset(queryset, self.request.user)
+
+    def get_queryset(self):
+        queryset_base = self.queryset_visivel()
 
         status_filtro = self.request.query_params.get('status')
         if status_filtro:
@@ -414,7 +444,7 @@ class ProcessoViewSet(viewsets.ModelViewSet):
         return self.request.user.is_administrador() or processo.advogado_id == self.request.user.id
 
     def _is_responsavel_do_processo(self, processo):
-        return usuario_pode_entrar_processo(processo, self.request.user)
+        return contexto_acesso(self.request).pode_entrar(processo)
 
     def _workflow_etapas_para(self, tipo_caso):
         return WORKFLOW_ETAPAS.get(tipo_caso, WORKFLOW_ETAPAS['contencioso'])
@@ -874,23 +904,53 @@ class ProcessoViewSet(viewsets.ModelViewSet):
 class MovimentacaoViewSet(viewsets.ModelViewSet):
     queryset = Movimentacao.objects.select_related('processo', 'autor').all()
     serializer_class = MovimentacaoSerializer
+    ordenacao_cursor = ('-data', '-id')
     permission_classes = [IsAdvogadoOuAdministradorWrite]
 
     def get_queryset(self):
         queryset = super().get_queryset()
         if self.request.user.is_administrador():
             return queryset
-        processos_ids = processos_visiveis_queryset(Processo.objects.all(), self.request.user).values_list('id', flat=True)
-        return queryset.filter(processo_id__in=processos_ids).distinct()
+        return queryset.filter(processo_id__in=processos_visiveis_ids(self.request.user))
 
     def perform_create(self, serializer):
         processo = serializer.validated_data['processo']
-        if not usuario_pode_entrar_processo(processo, self.request.user):
+        if not contexto_acesso(self.request).pode_entrar(processo):
             raise PermissionDenied('Você não pode registrar movimentações neste processo.')
         serializer.save(autor=self.request.user)
 
     def perform_update(self, serializer):
         processo = serializer.validated_data.get('processo', serializer.instance.processo)
-        if not usuario_pode_entrar_processo(processo, self.request.user):
+        if not contexto_acesso(self.request).pode_entrar(processo):
             raise PermissionDenied('Você não pode editar movimentações deste processo.')
         serializer.save(autor=self.request.user)
+
+
+@api_view(['GET'])
+def sincronizacao(request):
+    """
+    Sincronização incremental: `?desde=<token>` devolve, por recurso, os
+    registros criados, atualizados e excluídos desde o token anterior.
+    `?recursos=processos,clientes` limita os recursos consultados e
+    `?continuacao=` pede a próxima página dos recursos que ficaram pendentes.
+    """
+    try:
+        desde = decodificar_token(request.query_params.get('desde'))
+    except (TypeError, ValueError, OverflowError):
+        return Response({'detail': 'Token de sincronização inválido.'}, status=status.HTTP_400_BAD_REQUEST)
+    continuacao = request.query_params.get('continuacao')
+    if continuacao:
+        try:
+            continuacao = decodificar_continuacao(continuacao)
+        except (TypeError, ValueError, OverflowError):
+            return Response({'detail': 'Continuação de sincronização inválida.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(montar_sincronizacao(request, desde, list(continuacao), continuacao))
+    recursos = [r.strip() for r in request.query_params.get('recursos', '').split(',') if r.strip()]
+    recursos = recursos or list(RECURSOS_SINCRONIZACAO)
+    invalidos = [r for r in recursos if r not in RECURSOS_SINCRONIZACAO]
+    if invalidos:
+        return Response(
+            {'detail': 'Recurso inválido.', 'invalidos': invalidos, 'recursos_disponiveis': list(RECURSOS_SINCRONIZACAO)},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return Response(montar_sincronizacao(request, desde, recursos))
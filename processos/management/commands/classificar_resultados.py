@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from processos.models import Movimentacao, Processo
+from processos.resultados import atualizar_resultado_processos, classificar_texto
+
+
+class Command(BaseCommand):
+    help = 'Reclassifica o resultado das movimentações e recalcula o resultado dos processos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=500, help='Movimentações gravadas por lote.')
+
+    def handle(self, *args, **options):
+        lote = max(1, options['lote'])
+        alteradas = []
+        total_alteradas = 0
+        for mov in Movimentacao.objects.only('id', 'titulo', 'descricao', 'resultado').iterator(chunk_size=lote):
+            resultado = classificar_texto(mov.titulo, mov.descricao)
+            if resultado != mov.resultado:
+                mov.resultado = resultado
+                alteradas.append(mov)
+            if len(alteradas) >= lote:
+                Movimentacao.objects.bulk_update(alteradas, ['resultado'])
+                total_alteradas += len(alteradas)
+                alteradas = []
+        Movimentacao.objects.bulk_update(alteradas, ['resultado'])
+        total_alteradas += len(alteradas)
+
+        processos = atualizar_resultado_processos(Processo.objects.all())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Movimentações reclassificadas: {total_alteradas} | Processos atualizados: {processos}'
+            )
+        )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from processos.models import AlteracaoAcesso, RegistroExclusao
+from processos.sincronizacao import retencao_exclusoes
+
+
+class Command(BaseCommand):
+    help = (
+        'Remove marcas de exclusão e alterações de acesso da sincronização '
+        'mais antigas que SINCRONIZACAO_RETENCAO_DIAS.'
+    )
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - retencao_exclusoes()
+        removidas, _ = RegistroExclusao.objects.filter(excluido_em__lt=limite).delete()
+        alteracoes, _ = AlteracaoAcesso.objects.filter(alterado_em__lt=limite).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'Marcas de exclusão removidas: {removidas} | alterações de acesso removidas: {alteracoes}'
+        ))
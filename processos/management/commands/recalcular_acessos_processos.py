@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from accounts.rbac import reconstruir_acessos
+
+
+class Command(BaseCommand):
+    help = 'Recalcula a tabela de acessos (usuário x processo) usada na visibilidade por perfil.'
+
+    def handle(self, *args, **options):
+        total = reconstruir_acessos()
+        self.stdout.write(self.style.SUCCESS(f'Acessos recalculados para {total} processo(s).'))
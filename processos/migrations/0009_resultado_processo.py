@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-17 20:52
+
+from django.db import migrations, models
+
+
+def classificar_existentes(apps, schema_editor):
+    from processos.resultados import atualizar_resultado_processos, classificar_texto
+
+    Movimentacao = apps.get_model('processos', 'Movimentacao')
+    Processo = apps.get_model('processos', 'Processo')
+    pendentes = []
+    for mov in Movimentacao.objects.only('id', 'titulo', 'descricao').iterator():
+        mov.resultado = classificar_texto(mov.titulo, mov.descricao)
+        if mov.resultado:
+            pendentes.append(mov)
+        if len(pendentes) >= 500:
+            Movimentacao.objects.bulk_update(pendentes, ['resultado'])
+            pendentes = []
+    Movimentacao.objects.bulk_update(pendentes, ['resultado'])
+    atualizar_resultado_processos(Processo.objects.all(), movimentacoes=Movimentacao.objects.all())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('processos', '0008_processo_segredo_justica_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movimentacao',
+            name='resultado',
+            field=models.CharField(blank=True, editable=False, max_length=20, verbose_name='Resultado Identificado'),
+        ),
+        migrations.AddField(
+            model_name='processo',
+            name='resultado',
+            field=models.CharField(choices=[('indefinido', 'Indefinido'), ('favoravel', 'Favorável'), ('desfavoravel', 'Desfavorável')], default='indefinido', editable=False, max_length=20, verbose_name='Resultado'),
+        ),
+        migrations.AddIndex(
+            model_name='processo',
+            index=models.Index(fields=['status', 'resultado'], name='idx_processo_status_resultado'),
+        ),
+        migrations.RunPython(classificar_existentes, migrations.RunPython.noop),
+    ]
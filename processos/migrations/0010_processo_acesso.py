@@ -0,0 +1,58 @@
+# Generated by Django 4.2.30 on 2026-10-17 21:08
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def popular_acessos(apps, schema_editor):
+    from accounts.rbac import calcular_acessos
+
+    Processo = apps.get_model('processos', 'Processo')
+    ProcessoResponsavel = apps.get_model('processos', 'ProcessoResponsavel')
+    ProcessoAcesso = apps.get_model('processos', 'ProcessoAcesso')
+    Usuario = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+
+    acessos = calcular_acessos(
+        dict(Processo.objects.values_list('id', 'advogado_id')),
+        list(ProcessoResponsavel.objects.filter(ativo=True).values_list('processo_id', 'usuario_id')),
+        {
+            usuario_id: (papel, supervisor_id)
+            for usuario_id, papel, supervisor_id in Usuario.objects.values_list(
+                'id', 'papel', 'responsavel_advogado_id',
+            )
+        },
+    )
+    ProcessoAcesso.objects.bulk_create(
+        [ProcessoAcesso(usuario_id=u, processo_id=p) for u, p in acessos],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('processos', '0009_resultado_processo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessoAcesso',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('processo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='acessos', to='processos.processo', verbose_name='Processo')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='acessos_processo', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Acesso ao Processo',
+                'verbose_name_plural': 'Acessos aos Processos',
+                'indexes': [models.Index(fields=['processo', 'usuario'], name='idx_acesso_processo_usuario')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='processoacesso',
+            constraint=models.UniqueConstraint(fields=('usuario', 'processo'), name='uniq_acesso_usuario_processo'),
+        ),
+        migrations.RunPython(popular_acessos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.30 on 2026-10-17 21:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('processos', '0010_processo_acesso'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistroExclusao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recurso', models.CharField(max_length=30, verbose_name='Recurso')),
+                ('objeto_id', models.PositiveBigIntegerField(verbose_name='ID do Registro')),
+                ('excluido_em', models.DateTimeField(auto_now_add=True, verbose_name='Excluído em')),
+            ],
+            options={
+                'verbose_name': 'Registro de Exclusão',
+                'verbose_name_plural': 'Registros de Exclusão',
+                'ordering': ['excluido_em'],
+            },
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['atualizado_em'], name='idx_cliente_atualizado'),
+        ),
+        migrations.AddIndex(
+            model_name='processo',
+            index=models.Index(fields=['atualizado_em'], name='idx_processo_atualizado'),
+        ),
+        migrations.AddField(
+            model_name='registroexclusao',
+            name='usuario',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='exclusoes_sincronizacao', to=settings.AUTH_USER_MODEL, verbose_name='Usuário'),
+        ),
+        migrations.AddIndex(
+            model_name='registroexclusao',
+            index=models.Index(fields=['usuario', 'excluido_em'], name='idx_exclusao_usuario_data'),
+        ),
+        migrations.AddIndex(
+            model_name='registroexclusao',
+            index=models.Index(fields=['excluido_em'], name='idx_exclusao_data'),
+        ),
+    ]
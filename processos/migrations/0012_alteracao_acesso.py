@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:53
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('processos', '0011_sincronizacao_incremental'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlteracaoAcesso',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('processo_id', models.PositiveBigIntegerField(verbose_name='ID do Processo')),
+                ('concedido', models.BooleanField(verbose_name='Concedido')),
+                ('alterado_em', models.DateTimeField(auto_now_add=True, verbose_name='Alterado em')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alteracoes_acesso', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Alteração de Acesso',
+                'verbose_name_plural': 'Alterações de Acesso',
+                'ordering': ['alterado_em', 'id'],
+                'indexes': [models.Index(fields=['usuario', 'alterado_em'], name='idx_alteracao_acesso_usuario'), models.Index(fields=['alterado_em'], name='idx_alteracao_acesso_data')],
+            },
+        ),
+    ]
@@ -125,11 +125,15 @@ class Cliente(models.Model):
     )
     observacoes = models.TextField(blank=True, null=True, verbose_name='Observações')
     criado_em = models.DateTimeField(auto_now_add=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = 'Cliente'
         verbose_name_plural = 'Clientes'
         ordering = ['nome']
+        indexes = [
+            models.Index(fields=['atualizado_em'], name='idx_cliente_atualizado'),
+        ]
 
     def __str__(self):
         return self.nome
@@ -294,6 +298,11 @@ class Processo(models.Model):
         ('finalizado', 'Finalizado'),
         ('arquivado', 'Arquivado'),
     ]
+    RESULTADO_CHOICES = [
+        ('indefinido', 'Indefinido'),
+        ('favoravel', 'Favorável'),
+        ('desfavoravel', 'Desfavorável'),
+    ]
     TIPO_CASO_CHOICES = [
         ('contencioso', 'Contencioso'),
         ('consultivo', 'Consultivo'),
@@ -342,6 +351,13 @@ class Processo(models.Model):
     valor_causa = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True, verbose_name='Valor da Causa (R$)')
     objeto = models.TextField(verbose_name='Objeto / Descrição')
     segredo_justica = models.BooleanField(default=False, verbose_name='Segredo de Justiça')
+    resultado = models.CharField(
+        max_length=20,
+        choices=RESULTADO_CHOICES,
+        default='indefinido',
+        editable=False,
+        verbose_name='Resultado',
+    )
     criado_em = models.DateTimeField(auto_now_add=True)
     atualizado_em = models.DateTimeField(auto_now=True)
 
@@ -349,6 +365,10 @@ class Processo(models.Model):
         verbose_name = 'Processo'
         verbose_name_plural = 'Processos'
         ordering = ['-criado_em']
+        indexes = [
+            models.Index(fields=['status', 'resultado'], name='idx_processo_status_resultado'),
+            models.Index(fields=['atualizado_em'], name='idx_processo_atualizado'),
+        ]
 
     def __str__(self):
         return f'{self.numero} - {self.cliente}'
@@ -434,6 +454,72 @@ class ProcessoResponsavel(models.Model):
         return f'{self.usuario} - {self.processo.numero}'
 
 
+class ProcessoAcesso(models.Model):
+    """
+    Acesso materializado usuário → processo, derivado de Processo.advogado,
+    ProcessoResponsavel e Usuario.responsavel_advogado (ver accounts.rbac).
+    """
+
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='acessos_processo',
+        verbose_name='Usuário',
+    )
+    processo = models.ForeignKey(
+        Processo,
+        on_delete=models.CASCADE,
+        related_name='acessos',
+        verbose_name='Processo',
+    )
+
+    class Meta:
+        verbose_name = 'Acesso ao Processo'
+        verbose_name_plural = 'Acessos aos Processos'
+        constraints = [
+            models.UniqueConstraint(fields=['usuario', 'processo'], name='uniq_acesso_usuario_processo'),
+        ]
+        indexes = [
+            models.Index(fields=['processo', 'usuario'], name='idx_acesso_processo_usuario'),
+        ]
+
+    def __str__(self):
+        return f'{self.usuario} → {self.processo}'
+
+
+class RegistroExclusao(models.Model):
+    """
+    Marca de exclusão (tombstone) lida pela sincronização incremental.
+
+    Uma linha por usuário que enxergava o registro no momento da exclusão;
+    `usuario` nulo indica registro visível apenas a administradores.
+    """
+
+    recurso = models.CharField(max_length=30, verbose_name='Recurso')
+    objeto_id = models.PositiveBigIntegerField(verbose_name='ID do Registro')
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='exclusoes_sincronizacao',
+        verbose_name='Usuário',
+    )
+    excluido_em = models.DateTimeField(auto_now_add=True, verbose_name='Excluído em')
+
+    class Meta:
+        verbose_name = 'Registro de Exclusão'
+        verbose_name_plural = 'Registros de Exclusão'
+        ordering = ['excluido_em']
+        indexes = [
+            models.Index(fields=['usuario', 'excluido_em'], name='idx_exclusao_usuario_data'),
+            models.Index(fields=['excluido_em'], name='idx_exclusao_data'),
+        ]
+
+    def __str__(self):
+        return f'{self.recurso} #{self.objeto_id}'
+
+
 class ProcessoTarefa(models.Model):
     STATUS_CHOICES = [
         ('pendente', 'Pendente'),
@@ -676,6 +762,12 @@ class Movimentacao(models.Model):
     titulo = models.CharField(max_length=200, verbose_name='Título')
     descricao = models.TextField(verbose_name='Descrição')
     documento = models.FileField(upload_to='movimentacoes/', blank=True, null=True, verbose_name='Documento Anexo')
+    resultado = models.CharField(
+        max_length=20,
+        blank=True,
+        editable=False,
+        verbose_name='Resultado Identificado',
+    )
     criado_em = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -685,3 +777,43 @@ class Movimentacao(models.Model):
 
     def __str__(self):
         return f'{self.data} - {self.titulo}'
+
+    def save(self, *args, **kwargs):
+        from .resultados import classificar_texto
+
+        self.resultado = classificar_texto(self.titulo, self.descricao)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'resultado' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'resultado']
+        return super().save(*args, **kwargs)
+
+
+class AlteracaoAcesso(models.Model):
+    """
+    Acesso a um processo concedido ou retirado de um usuário, lido pela
+    sincronização incremental para enviar ou remover os registros que
+    passaram a ser (ou deixaram de ser) visíveis sem terem sido alterados.
+    """
+
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='alteracoes_acesso',
+        verbose_name='Usuário',
+    )
+    processo_id = models.PositiveBigIntegerField(verbose_name='ID do Processo')
+    concedido = models.BooleanField(verbose_name='Concedido')
+    alterado_em = models.DateTimeField(auto_now_add=True, verbose_name='Alterado em')
+
+    class Meta:
+        verbose_name = 'Alteração de Acesso'
+        verbose_name_plural = 'Alterações de Acesso'
+        ordering = ['alterado_em', 'id']
+        indexes = [
+            models.Index(fields=['usuario', 'alterado_em'], name='idx_alteracao_acesso_usuario'),
+            models.Index(fields=['alterado_em'], name='idx_alteracao_acesso_data'),
+        ]
+
+    def __str__(self):
+        acao = 'concedido' if self.concedido else 'retirado'
+        return f'Processo #{self.processo_id} {acao} a {self.usuario_id}'
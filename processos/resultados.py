@@ -0,0 +1,61 @@
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+# Regras avaliadas em ordem; a primeira que casar define o resultado da
+# movimentação. As desfavoráveis vêm antes para que "improcedente" ou
+# "não provido" não sejam lidos como "procedente"/"provido".
+REGRAS_RESULTADO_PADRAO = [
+    ('desfavoravel', r'\bimprocedente'),
+    ('desfavoravel', r'\b(?:nao|não)\s+(?:provido|conhecido|acolhido)'),
+    ('desfavoravel', r'\b(?:desprovido|indeferid[oa]s?|rejeitad[oa]s?|denegad[oa])\b'),
+    ('favoravel', r'\b(?:procedente|provido|ganho|deferid[oa]s?|acolhid[oa]s?|favor[aá]vel)\b'),
+]
+
+
+@lru_cache(maxsize=None)
+def _regras_compiladas(regras):
+    return [(resultado, re.compile(padrao, re.IGNORECASE)) for resultado, padrao in regras]
+
+
+def regras_resultado():
+    """Regras (resultado, regex) configuráveis via settings.PROCESSO_RESULTADO_REGRAS."""
+    regras = getattr(settings, 'PROCESSO_RESULTADO_REGRAS', None) or REGRAS_RESULTADO_PADRAO
+    return _regras_compiladas(tuple(tuple(regra) for regra in regras))
+
+
+def classificar_texto(*textos):
+    texto = ' '.join(t for t in textos if t)
+    if not texto:
+        return ''
+    for resultado, padrao in regras_resultado():
+        if padrao.search(texto):
+            return resultado
+    return ''
+
+
+def atualizar_resultado_processos(queryset, movimentacoes=None):
+    """
+    Grava em Processo.resultado a classificação da movimentação decisiva
+    mais recente. Só os processos cujo resultado mudou são gravados, com
+    `atualizado_em` renovado para a sincronização incremental.
+    """
+    if movimentacoes is None:
+        from .models import Movimentacao
+
+        movimentacoes = Movimentacao.objects.all()
+    decisiva = (
+        movimentacoes.filter(processo_id=OuterRef('pk'))
+        .exclude(resultado='')
+        .order_by('-data', '-criado_em', '-id')
+        .values('resultado')[:1]
+    )
+    return (
+        queryset.annotate(novo_resultado=Coalesce(Subquery(decisiva), Value('indefinido')))
+        .exclude(resultado=F('novo_resultado'))
+        .update(resultado=F('novo_resultado'), atualizado_em=timezone.now())
+    )
@@ -343,6 +343,7 @@ class ProcessoSerializer(serializers.ModelSerializer):
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     tipo_caso_display = serializers.CharField(source='get_tipo_caso_display', read_only=True)
     etapa_workflow_display = serializers.CharField(source='get_etapa_workflow_display', read_only=True)
+    resultado_display = serializers.CharField(source='get_resultado_display', read_only=True)
     movimentacoes = MovimentacaoSerializer(many=True, read_only=True)
     
     class Meta:
@@ -354,9 +355,11 @@ class ProcessoSerializer(serializers.ModelSerializer):
                   'segredo_justica',
                   'tipo_caso', 'tipo_caso_display',
                   'etapa_workflow', 'etapa_workflow_display',
+                  'resultado', 'resultado_display',
                   'objeto', 'valor_causa',
                   'criado_em', 'atualizado_em',
                   'movimentacoes']
+        read_only_fields = ['resultado']
 
     def validate(self, attrs):
         instance = getattr(self, 'instance', None)
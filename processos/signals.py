@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from accounts.rbac import sincronizar_acessos, sincronizar_acessos_do_usuario
+
+from .models import Cliente, Movimentacao, Processo, ProcessoResponsavel
+from .resultados import atualizar_resultado_processos
+from .sincronizacao import registrar_exclusao
+
+CAMPOS_ACESSO_USUARIO = {'papel', 'responsavel_advogado', 'responsavel_advogado_id'}
+
+
+@receiver(post_save, sender=Movimentacao, dispatch_uid='processos_resultado_movimentacao_salva')
+@receiver(post_delete, sender=Movimentacao, dispatch_uid='processos_resultado_movimentacao_removida')
+def atualizar_resultado_do_processo(sender, instance, raw=False, **kwargs):
+    if raw or not instance.processo_id:
+        return
+    atualizar_resultado_processos(Processo.objects.filter(pk=instance.processo_id))
+
+
+@receiver(post_save, sender=Processo, dispatch_uid='processos_acesso_processo_salvo')
+def atualizar_acessos_do_processo(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and 'advogado' not in update_fields):
+        return
+    sincronizar_acessos([instance.pk])
+
+
+@receiver(post_save, sender=ProcessoResponsavel, dispatch_uid='processos_acesso_responsavel_salvo')
+@receiver(post_delete, sender=ProcessoResponsavel, dispatch_uid='processos_acesso_responsavel_removido')
+def atualizar_acessos_do_responsavel(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    sincronizar_acessos([instance.processo_id])
+
+
+@receiver(post_save, sender=get_user_model(), dispatch_uid='processos_acesso_usuario_salvo')
+def atualizar_acessos_do_usuario(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if raw or created:
+        return
+    if update_fields is not None and not CAMPOS_ACESSO_USUARIO & set(update_fields):
+        return
+    sincronizar_acessos_do_usuario(instance.pk)
+
+
+@receiver(pre_delete, sender=Processo, dispatch_uid='processos_exclusao_processo')
+def registrar_exclusao_processo(sender, instance, **kwargs):
+    registrar_exclusao('processos', instance)
+
+
+@receiver(pre_delete, sender=Cliente, dispatch_uid='processos_exclusao_cliente')
+def registrar_exclusao_cliente(sender, instance, **kwargs):
+    registrar_exclusao('clientes', instance)
@@ -0,0 +1,200 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+# Recursos expostos pela sincronização incremental. `dono` e `processo` são os
+# campos usados para saber quem enxergava um registro no momento da exclusão;
+# `via_processo` é o lookup até os processos cujo acesso torna o registro
+# visível (ver AlteracaoAcesso).
+RECURSOS_SINCRONIZACAO = {
+    'processos': {
+        'viewset': 'processos.api_views.ProcessoViewSet',
+        'dono': None,
+        'processo': 'pk',
+        'via_processo': 'pk',
+    },
+    'clientes': {
+        'viewset': 'processos.api_views.ClienteViewSet',
+        'dono': 'responsavel_id',
+        'processo': None,
+        'via_processo': 'processos',
+    },
+    'compromissos': {
+        'viewset': 'agenda.api_views.CompromissoViewSet',
+        'dono': 'advogado_id',
+        'processo': 'processo_id',
+        'via_processo': 'processo_id',
+    },
+    'lancamentos': {
+        'viewset': 'financeiro.api_views.LancamentoViewSet',
+        'dono': 'criado_por_id',
+        'processo': 'processo_id',
+        'via_processo': 'processo_id',
+    },
+}
+MARGEM_PADRAO_SEGUNDOS = 5
+RETENCAO_PADRAO_DIAS = 90
+TAMANHO_PAGINA_PADRAO = 500
+EPOCA = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def margem_sincronizacao():
+    return timedelta(seconds=getattr(settings, 'SINCRONIZACAO_MARGEM_SEGUNDOS', MARGEM_PADRAO_SEGUNDOS))
+
+
+def retencao_exclusoes():
+    return timedelta(days=getattr(settings, 'SINCRONIZACAO_RETENCAO_DIAS', RETENCAO_PADRAO_DIAS))
+
+
+def tamanho_pagina_sincronizacao():
+    return max(getattr(settings, 'SINCRONIZACAO_TAMANHO_PAGINA', TAMANHO_PAGINA_PADRAO), 1)
+
+
+def codificar_token(momento):
+    return str((momento - EPOCA) // timedelta(microseconds=1))
+
+
+def decodificar_token(token):
+    """Instante representado pelo token; None para token vazio. ValueError se inválido."""
+    if not token:
+        return None
+    microssegundos = int(token)
+    if microssegundos < 0:
+        raise ValueError(token)
+    return EPOCA + timedelta(microseconds=microssegundos)
+
+
+def codificar_continuacao(posicoes):
+    """`recurso:token:pk` de cada recurso com páginas pendentes, separados por vírgula."""
+    return ','.join(f'{recurso}:{codificar_token(momento)}:{pk}' for recurso, (momento, pk) in posicoes.items())
+
+
+def decodificar_continuacao(texto):
+    """{recurso: (atualizado_em, pk)} da continuação. ValueError se inválida."""
+    posicoes = {}
+    for parte in texto.split(','):
+        recurso, token, pk = parte.split(':')
+        if recurso not in RECURSOS_SINCRONIZACAO or not token:
+            raise ValueError(parte)
+        posicoes[recurso] = (decodificar_token(token), int(pk))
+    return posicoes
+
+
+def registrar_exclusao(recurso, instancia):
+    """Grava a marca de exclusão para cada usuário que enxergava o registro."""
+    from .models import ProcessoAcesso, RegistroExclusao
+
+    config = RECURSOS_SINCRONIZACAO[recurso]
+    usuarios = set()
+    if config['dono']:
+        usuarios.add(getattr(instancia, config['dono']))
+    processo_id = getattr(instancia, config['processo']) if config['processo'] else None
+    if processo_id:
+        usuarios.update(ProcessoAcesso.objects.filter(processo_id=processo_id).values_list('usuario_id', flat=True))
+    usuarios.discard(None)
+    RegistroExclusao.objects.bulk_create(
+        [RegistroExclusao(recurso=recurso, objeto_id=instancia.pk, usuario_id=u) for u in sorted(usuarios)]
+        or [RegistroExclusao(recurso=recurso, objeto_id=instancia.pk)]
+    )
+
+
+def alteracoes_de_acesso(usuario, desde):
+    """(processos concedidos, processos retirados) ao usuário desde `desde`, pelo estado final."""
+    from .models import AlteracaoAcesso
+
+    estado = {}
+    for processo_id, concedido in (
+        AlteracaoAcesso.objects.filter(usuario=usuario, alterado_em__gte=desde)
+        .order_by('alterado_em', 'id')
+        .values_list('processo_id', 'concedido')
+    ):
+        estado[processo_id] = concedido
+    concedidos = {processo_id for processo_id, concedido in estado.items() if concedido}
+    return concedidos, set(estado) - concedidos
+
+
+def montar_sincronizacao(request, desde, recursos, continuacao=None):
+    """
+    Registros criados, alterados e excluídos desde o instante `desde`, para
+    os recursos pedidos e com a mesma visibilidade das listagens da API.
+
+    O token devolvido fica `SINCRONIZACAO_MARGEM_SEGUNDOS` antes de agora,
+    para não perder gravações ainda não confirmadas; o cliente pode receber
+    de novo registros que já tem e deve tratá-los como atualização. Sem
+    token, ou com token anterior à retenção das marcas de exclusão, a
+    resposta é completa (`completo: true`) e o cliente deve descartar o cache.
+    Registros de processos cujo acesso foi concedido desde o token vêm em
+    `atualizados`, mesmo sem alteração; os que deixaram de ser visíveis com
+    a retirada de um acesso vêm em `excluidos`. As listas partem só da
+    visibilidade do usuário, sem os filtros da listagem.
+
+    Cada recurso traz no máximo `SINCRONIZACAO_TAMANHO_PAGINA` registros, em
+    ordem de (atualizado_em, pk). Se algum ficou com registros pendentes, a
+    resposta traz `continuacao`: o cliente repete a chamada com o mesmo
+    `desde` e essa continuação até ela vir nula, e guarda o `token` da
+    última página. `continuacao` é o {recurso: (atualizado_em, pk)} do
+    último registro entregue de cada recurso pendente.
+    """
+    from .models import RegistroExclusao
+
+    agora = timezone.now()
+    completo = desde is None or desde < agora - retencao_exclusoes()
+    usuario = request.user
+    tamanho = tamanho_pagina_sincronizacao()
+    pendentes = {}
+    concedidos, retirados = set(), set()
+    if not completo and not usuario.is_administrador():
+        concedidos, retirados = alteracoes_de_acesso(usuario, desde)
+    resposta = {'token': codificar_token(agora - margem_sincronizacao()), 'completo': completo, 'recursos': {}}
+    for recurso in recursos:
+        config = RECURSOS_SINCRONIZACAO[recurso]
+        viewset = import_string(config['viewset'])(
+            request=request,
+            action='list',
+            format_kwarg=None,
+            args=(),
+            kwargs={},
+        )
+        visiveis = viewset.queryset_visivel()
+        modelo = visiveis.model
+        queryset = visiveis.order_by('atualizado_em', 'pk')
+        if not completo:
+            novidades = Q(atualizado_em__gte=desde)
+            if concedidos:
+                via_concedidos = modelo.objects.filter(**{f"{config['via_processo']}__in": concedidos}).values('pk')
+                novidades |= Q(pk__in=via_concedidos)
+            queryset = queryset.filter(novidades)
+        if continuacao and recurso in continuacao:
+            momento, pk = continuacao[recurso]
+            queryset = queryset.filter(Q(atualizado_em__gt=momento) | Q(atualizado_em=momento, pk__gt=pk))
+        objetos = list(queryset[:tamanho + 1])
+        if len(objetos) > tamanho:
+            del objetos[tamanho:]
+            pendentes[recurso] = (objetos[-1].atualizado_em, objetos[-1].pk)
+        criados = [o for o in objetos if completo or o.criado_em >= desde]
+        atualizados = [o for o in objetos if not completo and o.criado_em < desde]
+
+        excluidos = []
+        if not completo:
+            exclusoes = RegistroExclusao.objects.filter(recurso=recurso, excluido_em__gte=desde)
+            if not usuario.is_administrador():
+                exclusoes = exclusoes.filter(usuario=usuario)
+            excluidos = set(exclusoes.values_list('objeto_id', flat=True))
+            if retirados:
+                excluidos.update(
+                    modelo.objects.filter(**{f"{config['via_processo']}__in": retirados})
+                    .exclude(pk__in=visiveis.values('pk'))
+                    .values_list('pk', flat=True)
+                )
+            excluidos = sorted(excluidos)
+
+        resposta['recursos'][recurso] = {
+            'criados': viewset.get_serializer(criados, many=True).data,
+            'atualizados': viewset.get_serializer(atualizados, many=True).data,
+            'excluidos': excluidos,
+        }
+    resposta['continuacao'] = codificar_continuacao(pendentes) if pendentes else None
+    return resposta
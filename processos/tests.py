@@ -1,12 +1,16 @@
-from django.test import TestCase, Client
+from datetime import date
+
+from django.test import Client, RequestFactory, TestCase
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 
 from accounts.models import Usuario
-from .models import Cliente, Processo, ProcessoArquivo, TipoProcesso
+from accounts.rbac import contexto_acesso, processos_visiveis_queryset, reconstruir_acessos
+from core.testing import MidiaTemporariaTestMixin
+from .models import Cliente, Movimentacao, Processo, ProcessoAcesso, ProcessoArquivo, ProcessoResponsavel, TipoProcesso
 
 
-class ClienteSegurancaUploadTest(TestCase):
+class ClienteSegurancaUploadTest(MidiaTemporariaTestMixin, TestCase):
     def setUp(self):
         self.client = Client()
         self.adv1 = Usuario.objects.create_user(username='adv_cli_1', password='pass', papel='advogado')
@@ -91,7 +95,7 @@ class ClienteSegurancaUploadTest(TestCase):
         self.assertEqual(cliente.arquivos.count(), 2)
 
 
-class ProcessoUploadIntegracaoTest(TestCase):
+class ProcessoUploadIntegracaoTest(MidiaTemporariaTestMixin, TestCase):
     def setUp(self):
         self.client = Client()
         self.adv1 = Usuario.objects.create_user(username='adv_proc_1', password='pass', papel='advogado')
@@ -186,3 +190,120 @@ class ProcessoUploadIntegracaoTest(TestCase):
         self.assertEqual(response.status_code, 302)
         self.processo.refresh_from_db()
         self.assertEqual(self.processo.arquivos.count(), 2)
+
+
+class ResultadoProcessoTest(TestCase):
+    def setUp(self):
+        adv = Usuario.objects.create_user(username='adv_resultado', password='pass', papel='advogado')
+        cliente = Cliente.objects.create(nome='Cliente Resultado', tipo='pf', responsavel=adv)
+        self.processo = Processo.objects.create(
+            numero='3000000-00.2026.8.26.0001',
+            cliente=cliente,
+            advogado=adv,
+            status='finalizado',
+            objeto='Processo com sentença',
+        )
+
+    def _movimentar(self, dia, descricao):
+        return Movimentacao.objects.create(
+            processo=self.processo,
+            data=date(2026, 1, dia),
+            titulo='Sentença',
+            descricao=descricao,
+        )
+
+    def test_improcedente_nao_conta_como_favoravel(self):
+        mov = self._movimentar(10, 'Pedido julgado improcedente.')
+        self.processo.refresh_from_db()
+        self.assertEqual(mov.resultado, 'desfavoravel')
+        self.assertEqual(self.processo.resultado, 'desfavoravel')
+
+    def test_resultado_segue_movimentacao_decisiva_mais_recente(self):
+        self._movimentar(10, 'Pedido julgado improcedente.')
+        recurso = self._movimentar(20, 'Recurso provido para julgar procedente o pedido.')
+        self._movimentar(25, 'Autos conclusos.')
+        self.processo.refresh_from_db()
+        self.assertEqual(self.processo.resultado, 'favoravel')
+
+        recurso.descricao = 'Recurso não provido.'
+        recurso.save()
+        self.processo.refresh_from_db()
+        self.assertEqual(self.processo.resultado, 'desfavoravel')
+
+        Movimentacao.objects.filter(processo=self.processo).delete()
+        self.processo.refresh_from_db()
+        self.assertEqual(self.processo.resultado, 'indefinido')
+
+
+class ProcessoAcessoTest(TestCase):
+    def setUp(self):
+        self.adv = Usuario.objects.create_user(username='adv_acesso', password='pass', papel='advogado')
+        self.outro_adv = Usuario.objects.create_user(username='adv_acesso_2', password='pass', papel='advogado')
+        self.estagiario = Usuario.objects.create_user(
+            username='estagiario_acesso',
+            password='pass',
+            papel='estagiario',
+            responsavel_advogado=self.adv,
+        )
+        cliente = Cliente.objects.create(nome='Cliente Acesso', tipo='pf', responsavel=self.adv)
+        self.processo = Processo.objects.create(
+            numero='3000000-00.2026.8.26.0101',
+            cliente=cliente,
+            advogado=self.adv,
+            status='em_andamento',
+            objeto='Processo com equipe',
+        )
+
+    def _visiveis(self, usuario):
+        return list(processos_visiveis_queryset(Processo.objects.all(), usuario).values_list('id', flat=True))
+
+    def test_acessos_acompanham_equipe_e_supervisor(self):
+        self.assertEqual(self._visiveis(self.adv), [self.processo.id])
+        self.assertEqual(self._visiveis(self.estagiario), [])
+
+        vinculo = ProcessoResponsavel.objects.create(processo=self.processo, usuario=self.estagiario, papel='estagiario')
+        self.assertEqual(self._visiveis(self.estagiario), [self.processo.id])
+
+        self.estagiario.responsavel_advogado = self.outro_adv
+        self.estagiario.save(update_fields=['responsavel_advogado'])
+        self.assertEqual(self._visiveis(self.estagiario), [])
+
+        ProcessoResponsavel.objects.create(processo=self.processo, usuario=self.outro_adv, papel='apoio')
+        self.assertEqual(self._visiveis(self.estagiario), [self.processo.id])
+        self.assertEqual(self._visiveis(self.outro_adv), [self.processo.id])
+
+        vinculo.delete()
+        self.assertEqual(self._visiveis(self.estagiario), [])
+
+        self.processo.advogado = self.outro_adv
+        self.processo.save()
+        self.assertNotIn(self.processo.id, self._visiveis(self.adv))
+
+    def test_consulta_visivel_sem_distinct_e_reconstrucao(self):
+        sql = str(processos_visiveis_queryset(Processo.objects.all(), self.adv).query).upper()
+        self.assertNotIn('DISTINCT', sql)
+
+        ProcessoAcesso.objects.all().delete()
+        self.assertEqual(self._visiveis(self.adv), [])
+        reconstruir_acessos()
+        self.assertEqual(self._visiveis(self.adv), [self.processo.id])
+
+    def test_contexto_da_requisicao_carrega_acessos_uma_vez(self):
+        ProcessoResponsavel.objects.create(processo=self.processo, usuario=self.estagiario, papel='estagiario')
+        request = RequestFactory().get('/')
+        request.user = Usuario.objects.get(pk=self.estagiario.pk)
+        outro = Processo.objects.create(
+            numero='3000000-00.2026.8.26.0102',
+            cliente=self.processo.cliente,
+            advogado=self.outro_adv,
+            status='em_andamento',
+            objeto='Processo de outra equipe',
+        )
+
+        with self.assertNumQueries(1):
+            for _ in range(3):
+                self.assertTrue(contexto_acesso(request).pode_entrar(self.processo))
+                self.assertFalse(contexto_acesso(request).pode_entrar(outro))
+            self.assertEqual(contexto_acesso(request).visiveis([self.processo.id, outro.id]), {self.processo.id})
+        self.assertIs(contexto_acesso(request), request._contexto_acesso)
+        self.assertEqual(request._contexto_acesso.consultas_economizadas, 6)
@@ -1,13 +1,18 @@
+from datetime import date
+
+from django.test import override_settings
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 from rest_framework import status
 from rest_framework.test import APITestCase
 
 from accounts.models import Usuario
-from processos.models import Cliente, Processo, TipoProcesso
+from agenda.models import Compromisso
+from core.testing import MidiaTemporariaTestMixin, PlanoConsultaTestMixin
+from processos.models import Cliente, Movimentacao, Processo, ProcessoParte, ProcessoPeca, ProcessoResponsavel, TipoProcesso
 
 
-class ProcessosApiPermissoesTest(APITestCase):
+class ProcessosApiPermissoesTest(MidiaTemporariaTestMixin, APITestCase):
     def setUp(self):
         self.admin = Usuario.objects.create_user(
             username='api_admin',
@@ -467,3 +472,232 @@ class ProcessosApiPermissoesTest(APITestCase):
         response_busca = self.client.get(url_upload, {'q': 'procuracao_cliente'})
         self.assertEqual(response_busca.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response_busca.data), 2)
+
+
+class ProcessoPlanoConsultaTest(PlanoConsultaTestMixin, APITestCase):
+    def setUp(self):
+        self.adv = Usuario.objects.create_user(
+            username='plano_adv',
+            password='pass',
+            papel='advogado',
+            first_name='Ana',
+            last_name='Plano',
+        )
+        self.tipo = TipoProcesso.objects.create(nome='Cível Plano')
+        cliente = Cliente.objects.create(nome='Cliente Plano', tipo='pf', responsavel=self.adv)
+        self.processos = []
+        for indice in range(3):
+            processo = Processo.objects.create(
+                numero=f'3100000-0{indice}.2026.8.26.0001',
+                cliente=cliente,
+                advogado=self.adv,
+                tipo=self.tipo,
+                status='em_andamento',
+                objeto=f'Processo plano {indice}',
+            )
+            for dia in range(1, 4):
+                Movimentacao.objects.create(
+                    processo=processo,
+                    data=f'2026-01-0{dia}',
+                    titulo='Despacho',
+                    autor=self.adv,
+                )
+            ProcessoParte.objects.create(processo=processo, nome=f'Parte {indice}')
+            ProcessoPeca.objects.create(processo=processo, titulo='Inicial', conteudo='texto ' * 500, criado_por=self.adv)
+            self.processos.append(processo)
+        self.client.force_authenticate(user=self.adv)
+
+    def test_listagem_nao_carrega_relacoes_do_detalhe(self):
+        with self.assertConsultas(2, linhas={Processo: 3, Movimentacao: 0, ProcessoParte: 0, ProcessoPeca: 0}):
+            response = self.client.get(reverse('processo-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 3)
+        item = response.data['results'][0]
+        self.assertEqual(item['advogado_nome'], 'Ana Plano')
+        self.assertEqual(item['cliente_nome'], 'Cliente Plano')
+        self.assertEqual(item['tipo_nome'], 'Cível Plano')
+
+    def test_detalhe_e_sub_actions_carregam_apenas_o_necessario(self):
+        processo = self.processos[0]
+        with self.assertConsultas(3, linhas={Processo: 1, Movimentacao: 3, ProcessoPeca: 0}):
+            response = self.client.get(reverse('processo-detail', args=[processo.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['movimentacoes']), 3)
+
+        with self.assertConsultas(2, linhas={Processo: 1, Movimentacao: 0, ProcessoParte: 1, ProcessoPeca: 0}):
+            response = self.client.get(reverse('processo-partes', args=[processo.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_paginacao_por_cursor_estavel_com_insercoes(self):
+        Processo.objects.bulk_create([
+            Processo(
+                numero=f'3200000-{indice:02d}.2026.8.26.0001',
+                cliente=self.processos[0].cliente,
+                advogado=self.adv,
+                tipo=self.tipo,
+                objeto=f'Processo volume {indice}',
+            )
+            for indice in range(22)
+        ])
+        admin = Usuario.objects.create_user(username='plano_admin', password='pass', papel='administrador')
+        self.client.force_authenticate(user=admin)
+
+        primeira = self.client.get(reverse('processo-list'), {'paginacao': 'cursor'})
+        self.assertEqual(primeira.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', primeira.data)
+        self.assertEqual(len(primeira.data['results']), 20)
+
+        Processo.objects.create(
+            numero='3300000-00.2026.8.26.0001',
+            cliente=self.processos[0].cliente,
+            advogado=self.adv,
+            tipo=self.tipo,
+            objeto='Processo inserido durante a rolagem',
+        )
+        with self.assertConsultas(1):
+            segunda = self.client.get(primeira.data['next'])
+        ids = [item['id'] for item in primeira.data['results'] + segunda.data['results']]
+        self.assertEqual(len(ids), 25)
+        self.assertEqual(len(set(ids)), 25)
+        self.assertIsNone(segunda.data['next'])
+
+        sem_total = self.client.get(reverse('processo-list'), {'total': '0', 'page': 2})
+        self.assertNotIn('count', sem_total.data)
+        self.assertEqual(len(sem_total.data['results']), 6)
+        self.assertIsNone(sem_total.data['next'])
+        self.assertIsNotNone(sem_total.data['previous'])
+
+
+    def test_cursor_com_muitas_linhas_na_mesma_data(self):
+        processo = self.processos[0]
+        Movimentacao.objects.bulk_create([
+            Movimentacao(processo=processo, data=date(2026, 3, 2), titulo=f'Movimento {indice}')
+            for indice in range(45)
+        ])
+        admin = Usuario.objects.create_user(username='cursor_admin', password='pass', papel='administrador')
+        self.client.force_authenticate(user=admin)
+        esperados = list(Movimentacao.objects.order_by('-data', '-id').values_list('id', flat=True))
+
+        paginas = [self.client.get(reverse('movimentacao-list'), {'paginacao': 'cursor'}).data]
+        while paginas[-1]['next']:
+            paginas.append(self.client.get(paginas[-1]['next']).data)
+        self.assertEqual([item['id'] for pagina in paginas for item in pagina['results']], esperados)
+
+        anterior = self.client.get(paginas[-1]['previous']).data
+        self.assertEqual(anterior['results'], paginas[-2]['results'])
+
+
+@override_settings(SINCRONIZACAO_MARGEM_SEGUNDOS=0)
+class SincronizacaoApiTest(APITestCase):
+    def setUp(self):
+        self.adv = Usuario.objects.create_user(username='sync_adv', password='pass', papel='advogado')
+        self.outro = Usuario.objects.create_user(username='sync_outro', password='pass', papel='advogado')
+        self.cliente = Cliente.objects.create(nome='Cliente Sync', tipo='pf', responsavel=self.adv)
+        self.processo = Processo.objects.create(
+            numero='3400000-00.2026.8.26.0001',
+            cliente=self.cliente,
+            advogado=self.adv,
+            objeto='Processo sincronizado',
+        )
+        self.compromisso = Compromisso.objects.create(
+            titulo='Audiência',
+            data='2026-03-10',
+            advogado=self.adv,
+            processo=self.processo,
+        )
+
+    def _sincronizar(self, usuario, token=None, **params):
+        self.client.force_authenticate(user=usuario)
+        if token:
+            params['desde'] = token
+        response = self.client.get(reverse('sincronizacao'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_delta_com_criados_atualizados_e_excluidos(self):
+        inicial = self._sincronizar(self.adv)
+        self.assertTrue(inicial['completo'])
+        self.assertEqual([p['id'] for p in inicial['recursos']['processos']['criados']], [self.processo.id])
+        token_outro = self._sincronizar(self.outro)['token']
+
+        self.processo.objeto = 'Objeto revisado'
+        self.processo.save()
+        novo = Compromisso.objects.create(titulo='Reunião', data='2026-03-11', advogado=self.adv)
+        compromisso_id = self.compromisso.id
+        self.compromisso.delete()
+
+        delta = self._sincronizar(self.adv, inicial['token'])
+        self.assertFalse(delta['completo'])
+        processos = delta['recursos']['processos']
+        self.assertEqual(processos['criados'], [])
+        self.assertEqual([p['objeto'] for p in processos['atualizados']], ['Objeto revisado'])
+        compromissos = delta['recursos']['compromissos']
+        self.assertEqual([c['id'] for c in compromissos['criados']], [novo.id])
+        self.assertEqual(compromissos['excluidos'], [compromisso_id])
+        self.assertEqual(delta['recursos']['clientes']['atualizados'], [])
+
+        vazio = self._sincronizar(self.adv, delta['token'], recursos='processos')
+        self.assertEqual(list(vazio['recursos']), ['processos'])
+        self.assertEqual(vazio['recursos']['processos'], {'criados': [], 'atualizados': [], 'excluidos': []})
+
+        alheio = self._sincronizar(self.outro, token_outro)
+        self.assertEqual(alheio['recursos']['processos']['atualizados'], [])
+        self.assertEqual(alheio['recursos']['compromissos']['excluidos'], [])
+
+    def test_acesso_concedido_e_retirado_entra_no_delta(self):
+        token = self._sincronizar(self.outro)['token']
+        vinculo = ProcessoResponsavel.objects.create(processo=self.processo, usuario=self.outro)
+
+        delta = self._sincronizar(self.outro, token)
+        for recurso, esperado in (('processos', self.processo.id), ('clientes', self.cliente.id), ('compromissos', self.compromisso.id)):
+            self.assertEqual(delta['recursos'][recurso]['criados'], [])
+            self.assertEqual([item['id'] for item in delta['recursos'][recurso]['atualizados']], [esperado])
+
+        vinculo.delete()
+        delta = self._sincronizar(self.outro, delta['token'])
+        for recurso, esperado in (('processos', self.processo.id), ('clientes', self.cliente.id), ('compromissos', self.compromisso.id)):
+            self.assertEqual(delta['recursos'][recurso]['atualizados'], [])
+            self.assertEqual(delta['recursos'][recurso]['excluidos'], [esperado])
+
+        # O advogado do processo não perdeu nada.
+        self.assertEqual(self._sincronizar(self.adv, token)['recursos']['processos']['excluidos'], [])
+
+    def test_filtros_da_listagem_nao_limitam_a_sincronizacao(self):
+        dados = self._sincronizar(self.adv, recursos='processos,clientes', status='arquivado', ativo='false')
+        self.assertEqual([p['id'] for p in dados['recursos']['processos']['criados']], [self.processo.id])
+        self.assertEqual([c['id'] for c in dados['recursos']['clientes']['criados']], [self.cliente.id])
+
+    @override_settings(SINCRONIZACAO_TAMANHO_PAGINA=2)
+    def test_paginas_com_continuacao(self):
+        for indice in range(4):
+            Cliente.objects.create(nome=f'Cliente Extra {indice}', tipo='pf', responsavel=self.adv)
+        esperados = list(Cliente.objects.filter(responsavel=self.adv).order_by('atualizado_em', 'pk').values_list('id', flat=True))
+
+        pagina = self._sincronizar(self.adv, recursos='clientes,processos')
+        recebidos = [c['id'] for c in pagina['recursos']['clientes']['criados']]
+        paginas = 1
+        while pagina['continuacao']:
+            pagina = self._sincronizar(self.adv, continuacao=pagina['continuacao'])
+            # Só o recurso com registros pendentes volta nas páginas seguintes.
+            self.assertEqual(list(pagina['recursos']), ['clientes'])
+            recebidos += [c['id'] for c in pagina['recursos']['clientes']['criados']]
+            paginas += 1
+        self.assertEqual(recebidos, esperados)
+        self.assertEqual(paginas, 3)
+
+        response = self.client.get(reverse('sincronizacao'), {'continuacao': 'faturas:1:1'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_novo_resultado_do_processo_entra_no_delta(self):
+        inicial = self._sincronizar(self.adv, recursos='processos')
+        Movimentacao.objects.create(processo=self.processo, data=date(2026, 3, 5), titulo='Sentença', descricao='Julgo procedente o pedido.')
+
+        delta = self._sincronizar(self.adv, inicial['token'], recursos='processos')
+        self.assertEqual([p['id'] for p in delta['recursos']['processos']['atualizados']], [self.processo.id])
+
+    def test_token_ou_recurso_invalido(self):
+        self.client.force_authenticate(user=self.adv)
+        response = self.client.get(reverse('sincronizacao'), {'desde': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('sincronizacao'), {'recursos': 'faturas'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)